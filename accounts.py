@@ -0,0 +1,405 @@
+"""
+Account Registry
+Loads trading accounts and account groups from a JSON config file and fans a
+single webhook signal out across every account in a group concurrently.
+
+Example accounts.json:
+
+    {
+        "accounts": {
+            "main": {"oanda_account_id": "101-001-0000000-001"},
+            "sub1": {
+                "oanda_account_id": "101-001-0000000-002",
+                "oanda_api_key_env": "OANDA_API_KEY_SUB1",
+                "binance_api_key_env": "BINANCE_API_KEY_SUB1",
+                "binance_api_secret_env": "BINANCE_API_SECRET_SUB1",
+                "units_multiplier": 0.5
+            }
+        },
+        "groups": {
+            "all": ["main", "sub1"]
+        }
+    }
+
+Secrets are never stored in the file itself; each account names the
+environment variables that hold its API keys.
+"""
+
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from analytics import PerformanceAnalytics, build_fill
+from circuit_breaker import is_unsent
+from exchange_handler import MultiExchangeHandler
+from execution_wal import ExecutionWAL
+from journal import journal
+from risk_engine import RiskCheckFailed, RiskEngine
+from signal_schema import SignalValidationError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ACCOUNT = 'default'
+
+
+class UnknownTargetError(SignalValidationError):
+    """A signal names an account, group or symbol that cannot be routed"""
+
+
+def blocked_result(error: RiskCheckFailed) -> Dict[str, Any]:
+    """Per-account fan-out result for a signal blocked by risk rules"""
+    return {
+        'status': 'blocked',
+        'error': str(error),
+        'risk': error.decision.to_dict()
+    }
+
+
+def summarize_fanout(accounts: List[str],
+                     results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate per-account fan-out results into one response"""
+    failed = [
+        name for name, result in results.items()
+        if result.get('status') in ('error', 'blocked')
+    ]
+    if not failed:
+        status = 'success'
+    elif len(failed) < len(accounts):
+        status = 'partial'
+    elif all(results[name]['status'] == 'blocked' for name in failed):
+        status = 'blocked'
+    else:
+        status = 'error'
+
+    return {
+        'status': status,
+        'accounts': accounts,
+        'succeeded': len(accounts) - len(failed),
+        'failed': len(failed),
+        'results': results
+    }
+
+
+class AccountConfig:
+    """Connection details and sizing rules for a single trading account"""
+
+    def __init__(self, name: str, settings: Dict[str, Any]):
+        self.name = name
+        self.oanda_account_id = settings.get('oanda_account_id')
+        self.oanda_api_key_env = settings.get('oanda_api_key_env',
+                                              'OANDA_API_KEY')
+        self.oanda_environment = settings.get('oanda_environment')
+        self.binance_api_key_env = settings.get('binance_api_key_env',
+                                                'BINANCE_API_KEY')
+        self.binance_api_secret_env = settings.get('binance_api_secret_env',
+                                                   'BINANCE_API_SECRET')
+        self.binance_testnet = settings.get('binance_testnet')
+        self.units_multiplier = float(settings.get('units_multiplier', 1.0))
+        self.fixed_units = settings.get('units')
+
+    def size_units(self, units: Any) -> Any:
+        """Apply this account's sizing rule to the signal's units"""
+        if self.fixed_units is not None:
+            return self.fixed_units
+        if self.units_multiplier == 1.0:
+            return units
+
+        sized = float(units) * self.units_multiplier
+        # Oanda only accepts whole units, so keep integer signals integral
+        return int(round(sized)) if isinstance(units, int) else sized
+
+    def create_handler(self) -> MultiExchangeHandler:
+        """Build an exchange handler bound to this account's credentials"""
+        return MultiExchangeHandler(
+            oanda_api_key=os.getenv(self.oanda_api_key_env),
+            oanda_account_id=self.oanda_account_id,
+            oanda_environment=self.oanda_environment,
+            binance_api_key=os.getenv(self.binance_api_key_env),
+            binance_api_secret=os.getenv(self.binance_api_secret_env),
+            binance_testnet=self.binance_testnet)
+
+
+class AccountRegistry:
+    """Holds configured accounts and groups and executes signals across them"""
+
+    def __init__(self,
+                 accounts: Dict[str, AccountConfig],
+                 groups: Dict[str, List[str]],
+                 max_workers: int = 8,
+                 risk_engine: Optional[RiskEngine] = None,
+                 analytics: Optional[PerformanceAnalytics] = None,
+                 wal: Optional[ExecutionWAL] = None):
+        if DEFAULT_ACCOUNT not in accounts:
+            accounts[DEFAULT_ACCOUNT] = AccountConfig(DEFAULT_ACCOUNT, {})
+
+        for group, members in groups.items():
+            unknown = [name for name in members if name not in accounts]
+            if unknown:
+                raise ValueError(
+                    f"Group '{group}' references unknown accounts: {unknown}")
+
+        self.accounts = accounts
+        self.groups = groups
+        self.max_workers = max_workers
+        self.risk_engine = risk_engine
+        self.analytics = analytics
+        self.wal = wal
+        self._handlers: Dict[str, MultiExchangeHandler] = {}
+        self._handlers_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='fanout')
+
+    @classmethod
+    def from_config(cls, config_path: Optional[Path] = None,
+                    max_workers: Optional[int] = None) -> 'AccountRegistry':
+        """Load accounts from a JSON file, falling back to env-only setup"""
+        config_path = config_path or Path(
+            os.getenv('ACCOUNTS_CONFIG', 'accounts.json'))
+        max_workers = max_workers or int(os.getenv('FANOUT_MAX_WORKERS', 8))
+
+        if not config_path.exists():
+            logger.info(
+                f"No accounts config at {config_path}, using environment account"
+            )
+            return cls({}, {}, max_workers=max_workers)
+
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+
+        accounts = {
+            name: AccountConfig(name, settings)
+            for name, settings in config.get('accounts', {}).items()
+        }
+        groups = {
+            name: list(members)
+            for name, members in config.get('groups', {}).items()
+        }
+        logger.info(f"Loaded {len(accounts)} accounts and {len(groups)} "
+                    f"groups from {config_path}")
+        return cls(accounts, groups, max_workers=max_workers)
+
+    def get_handler(self, account: str = DEFAULT_ACCOUNT) -> MultiExchangeHandler:
+        """Return the exchange handler for an account, creating it on first use"""
+        handler = self._handlers.get(account)
+        if handler is not None:
+            return handler
+
+        with self._handlers_lock:
+            handler = self._handlers.get(account)
+            if handler is None:
+                if account not in self.accounts:
+                    raise ValueError(f"Unknown account: {account}")
+                handler = self.accounts[account].create_handler()
+                handler.wal = self.wal
+                self._handlers[account] = handler
+            return handler
+
+    def sync_risk_state(self) -> None:
+        """
+        Replace the risk engine's cached positions with broker positions
+        for every account and exchange it has credentials for
+        """
+        if self.risk_engine is None:
+            return
+        state = self.risk_engine.state
+        for account in self.accounts:
+            handler = self.get_handler(account)
+            if handler.paper:
+                continue
+            try:
+                if handler.has_credentials('oanda'):
+                    state.sync_oanda_summary(
+                        account, handler.get_oanda_account_summary())
+                if handler.has_credentials('binance'):
+                    state.sync_positions(account, 'binance',
+                                         handler.get_binance_positions())
+            except Exception as e:
+                logger.error(
+                    f"Risk state sync failed for {account}: {str(e)}")
+
+    def resolve_targets(self, data: Dict[str, Any]) -> Optional[List[str]]:
+        """
+        Resolve the accounts a signal targets, in order and without
+        duplicates. Returns None for a plain single-account signal.
+        """
+        if 'account_group' in data:
+            group = data['account_group']
+            if group not in self.groups:
+                raise UnknownTargetError(f"Unknown account group: {group}")
+            return list(dict.fromkeys(self.groups[group]))
+
+        if 'accounts' in data:
+            targets = data['accounts']
+            if isinstance(targets, str):
+                targets = [targets]
+            unknown = [name for name in targets if name not in self.accounts]
+            if unknown:
+                raise UnknownTargetError(f"Unknown accounts: {unknown}")
+            return list(dict.fromkeys(targets))
+
+        return None
+
+    def check_targets(self, data: Dict[str, Any]) -> Optional[List[str]]:
+        """
+        Resolve a signal's targets and check that its symbol maps to an
+        exchange, so misrouted signals are refused before admission.
+        Raises UnknownTargetError naming the offending value.
+        """
+        targets = self.resolve_targets(data)
+        if not data.get('exchange'):
+            try:
+                self.get_handler().determine_exchange(data['symbol'])
+            except ValueError as e:
+                raise UnknownTargetError(str(e)) from None
+        return targets
+
+    def execute(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute a signal on the default account or on its targets"""
+        targets = self.resolve_targets(data)
+        if targets is None:
+            return self.execute_for_account(DEFAULT_ACCOUNT, data)
+        return self.execute_fanout(targets, data)
+
+    def prepare_order(self, account: str,
+                      data: Dict[str, Any]) -> Dict[str, Any]:
+        """The single-account order for a signal, sized for the account"""
+        order = {
+            key: value
+            for key, value in data.items()
+            if key not in ('account_group', 'accounts')
+        }
+        if 'units' in order:
+            order['units'] = self.accounts[account].size_units(order['units'])
+        return order
+
+    def execute_for_account(self, account: str,
+                            data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Size, risk-check and execute a signal on a single account.
+        Raises RiskCheckFailed if a blocking risk rule is hit.
+        """
+        order = self.prepare_order(account, data)
+        if self.risk_engine is not None:
+            self.risk_engine.check(account, order)
+
+        try:
+            if self.wal is None:
+                trade_response = self.get_handler(account).execute_trade(order)
+            else:
+                trade_response = self._execute_logged(account, order)
+        except Exception:
+            if self.risk_engine is not None:
+                self.risk_engine.release(account, order)
+            raise
+
+        if self.risk_engine is not None:
+            self.risk_engine.settle(account, order, trade_response)
+        if trade_response.get('status') == 'success':
+            self.record_fill(account, order, trade_response)
+        return trade_response
+
+    def _execute_logged(self, account: str,
+                        order: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute an order bracketed by write-ahead log records"""
+        intent_id = self.wal.begin(account, order)
+        handler = self.get_handler(account)
+        try:
+            trade_response = handler.execute_trade(
+                dict(order, client_order_id=intent_id))
+        except Exception as e:
+            if self.wal.steps(intent_id) or (handler.order_sent()
+                                             and not is_unsent(e)):
+                # The broker may have the order (e.g. a read timeout after
+                # it was sent); recovery looks it up by client order id
+                logger.error(
+                    f"Intent {intent_id} for {account} failed after the "
+                    f"order was sent, left for recovery: {str(e)}")
+            else:
+                self.wal.finish(intent_id, 'failed', error=str(e))
+            raise
+
+        self.wal.finish(intent_id, trade_response.get('status', 'success'))
+        return trade_response
+
+    def recover(self, mode: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Finish or unwind intents the execution log shows as incomplete.
+        Runs at startup, before any new signal is executed.
+        """
+        if self.wal is None:
+            return []
+        mode = mode or os.getenv('WAL_RECOVERY_MODE', 'finish').lower()
+
+        results = []
+        for intent in self.wal.compact():
+            data = intent['data']
+            try:
+                outcome = self.get_handler(intent['account']).recover_intent(
+                    intent, mode)
+            except Exception as e:
+                # Stays incomplete and is retried on the next start
+                logger.error(
+                    f"Recovery of intent {intent['id']} failed: {str(e)}")
+                outcome = {'status': 'recovery_failed', 'error': str(e)}
+            else:
+                self.wal.finish(intent['id'], outcome['status'],
+                                recovered=True)
+
+            logger.warning(
+                f"Recovered intent {intent['id']} ({intent['account']} "
+                f"{data.get('action')} {data.get('symbol')}): {outcome['status']}"
+            )
+            journal.record('intent_recovered',
+                           intent_id=intent['id'],
+                           account=intent['account'],
+                           symbol=data.get('symbol'),
+                           side=data.get('action'),
+                           mode=mode,
+                           **outcome)
+            results.append(dict(outcome, intent_id=intent['id']))
+        return results
+
+    def record_fill(self, account: str, data: Dict[str, Any],
+                    trade_response: Dict[str, Any]) -> None:
+        """Journal a fill and feed it to the running analytics"""
+        try:
+            fill = build_fill(account, data, trade_response)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Could not record fill for {account}: {str(e)}")
+            return
+        if fill is None:
+            return
+
+        journal.record('order_filled', **fill)
+        if self.analytics is not None:
+            self.analytics.on_fill(fill)
+
+    def execute_fanout(self, accounts: List[str],
+                       data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Execute one signal on every account concurrently.
+        Parallelism is bounded by the shared pool so a large group cannot
+        exhaust threads or broker rate limits.
+        """
+        futures = {
+            self._executor.submit(self.execute_for_account, account, data):
+            account
+            for account in accounts
+        }
+
+        results = {}
+        for future in as_completed(futures):
+            account = futures[future]
+            try:
+                results[account] = future.result()
+            except RiskCheckFailed as e:
+                results[account] = blocked_result(e)
+            except Exception as e:
+                logger.error(f"Fan-out trade failed for {account}: {str(e)}")
+                results[account] = {'status': 'error', 'error': str(e)}
+
+        return summarize_fanout(accounts, results)
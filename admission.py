@@ -0,0 +1,195 @@
+"""
+Admission Control
+Bounds how many webhook signals execute at once and sheds load under bursts.
+
+- A global cap on in-flight executions, plus per-source and per-strategy caps
+  so one noisy alert source cannot take every slot.
+- Two priority lanes: exits are always granted before entries, and when the
+  wait queue is full an arriving exit displaces the newest queued entry.
+- Requests that cannot be admitted (queue full or queue wait timed out) are
+  rejected with a Retry-After estimate so callers back off instead of
+  retrying immediately.
+"""
+
+import itertools
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, Optional
+
+from metrics import metrics
+
+EXIT = 'exit'
+ENTRY = 'entry'
+LANES = (EXIT, ENTRY)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of admitted"""
+
+    def __init__(self, reason: str, retry_after: int):
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"Server busy ({reason}); retry in {retry_after}s")
+
+
+class _Ticket:
+    __slots__ = ('lane', 'source', 'strategy', 'granted', 'shed', 'seq')
+
+    def __init__(self, lane: str, source: str, strategy: str, seq: int):
+        self.lane = lane
+        self.source = source
+        self.strategy = strategy
+        self.granted = False
+        self.shed = False
+        self.seq = seq
+
+
+class AdmissionController:
+    """Bounded, prioritized admission for signal execution"""
+
+    def __init__(self,
+                 max_in_flight: Optional[int] = None,
+                 max_queue: Optional[int] = None,
+                 per_source_limit: Optional[int] = None,
+                 per_strategy_limit: Optional[int] = None,
+                 queue_timeout: Optional[float] = None):
+        self.max_in_flight = max_in_flight or int(
+            os.getenv('ADMISSION_MAX_IN_FLIGHT', 8))
+        self.max_queue = max_queue if max_queue is not None else int(
+            os.getenv('ADMISSION_MAX_QUEUE', 32))
+        self.per_source_limit = per_source_limit or int(
+            os.getenv('ADMISSION_PER_SOURCE', 4))
+        self.per_strategy_limit = per_strategy_limit or int(
+            os.getenv('ADMISSION_PER_STRATEGY', 4))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(
+            os.getenv('ADMISSION_QUEUE_TIMEOUT', 2))
+
+        self._cond = threading.Condition()
+        self._lanes: Dict[str, Deque[_Ticket]] = {
+            lane: deque()
+            for lane in LANES
+        }
+        self._in_flight = 0
+        self._by_source: Dict[str, int] = {}
+        self._by_strategy: Dict[str, int] = {}
+        self._sequence = itertools.count()
+        # Smoothed execution time, used for Retry-After estimates
+        self._avg_service_time = 1.0
+
+    def _queued(self) -> int:
+        return sum(len(queue) for queue in self._lanes.values())
+
+    def _eligible(self, ticket: _Ticket) -> bool:
+        return (self._by_source.get(ticket.source, 0) < self.per_source_limit
+                and self._by_strategy.get(ticket.strategy, 0) <
+                self.per_strategy_limit)
+
+    def _dispatch(self) -> None:
+        """Grant free slots to waiters, exits first, FIFO within a lane"""
+        granted = False
+        for lane in LANES:
+            queue = self._lanes[lane]
+            for ticket in list(queue):
+                if self._in_flight >= self.max_in_flight:
+                    break
+                if self._eligible(ticket):
+                    queue.remove(ticket)
+                    self._grant(ticket)
+                    granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def _grant(self, ticket: _Ticket) -> None:
+        ticket.granted = True
+        self._in_flight += 1
+        self._by_source[ticket.source] = self._by_source.get(ticket.source,
+                                                             0) + 1
+        self._by_strategy[ticket.strategy] = self._by_strategy.get(
+            ticket.strategy, 0) + 1
+
+    def _release(self, ticket: _Ticket) -> None:
+        self._in_flight -= 1
+        for counts, key in ((self._by_source, ticket.source),
+                            (self._by_strategy, ticket.strategy)):
+            counts[key] -= 1
+            if not counts[key]:
+                del counts[key]
+
+    def _retry_after(self) -> int:
+        backlog = self._queued() + self._in_flight
+        return max(
+            1,
+            math.ceil(backlog * self._avg_service_time / self.max_in_flight))
+
+    def _publish(self) -> None:
+        metrics.set_gauge('admission_in_flight', self._in_flight)
+        for lane in LANES:
+            metrics.set_gauge('admission_queue_depth',
+                              len(self._lanes[lane]),
+                              lane=lane)
+
+    def _shed(self, reason: str, lane: str) -> AdmissionRejected:
+        metrics.inc('admission_shed_total', reason=reason, lane=lane)
+        return AdmissionRejected(reason, self._retry_after())
+
+    @contextmanager
+    def admit(self, source: str, strategy: str,
+              lane: str = ENTRY) -> Iterator[None]:
+        """Hold an execution slot for the duration of the with-block"""
+        ticket = _Ticket(lane, source, strategy or 'unknown',
+                         next(self._sequence))
+        start = time.monotonic()
+
+        with self._cond:
+            if self._queued() >= self.max_queue:
+                # Exits displace the newest queued entry rather than be shed
+                entries = self._lanes[ENTRY]
+                if lane == EXIT and entries:
+                    victim = entries.pop()
+                    victim.shed = True
+                    self._cond.notify_all()
+                else:
+                    raise self._shed('queue_full', lane)
+
+            self._lanes[lane].append(ticket)
+            self._dispatch()
+
+            deadline = start + self.queue_timeout
+            while not ticket.granted:
+                if ticket.shed:
+                    self._publish()
+                    raise self._shed('displaced', lane)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._lanes[lane].remove(ticket)
+                    self._publish()
+                    raise self._shed('queue_timeout', lane)
+                self._cond.wait(timeout=remaining)
+            self._publish()
+
+        metrics.inc('admission_admitted_total', lane=lane)
+        metrics.observe('admission_wait_seconds', time.monotonic() - start)
+        service_start = time.monotonic()
+        try:
+            yield
+        finally:
+            service_time = time.monotonic() - service_start
+            with self._cond:
+                self._avg_service_time = (0.8 * self._avg_service_time +
+                                          0.2 * service_time)
+                self._release(ticket)
+                self._dispatch()
+                self._publish()
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                'in_flight': self._in_flight,
+                'queued_exits': len(self._lanes[EXIT]),
+                'queued_entries': len(self._lanes[ENTRY]),
+                'max_in_flight': self.max_in_flight
+            }
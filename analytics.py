@@ -0,0 +1,297 @@
+"""
+Performance Analytics
+Running per-strategy and per-symbol performance aggregates (win rate,
+expectancy, drawdown, Sharpe, slippage vs. signal price).
+
+Each fill updates the affected aggregates in O(1) and refreshes their cached
+snapshot, so /analytics never rescans trade history. recompute() rebuilds
+everything from journaled fills for backfills, vectorized with numpy when it
+is installed and the history is large enough to pay for importing it.
+"""
+
+import logging
+import math
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOTAL_KEY = ('total', 'all')
+
+# Smaller histories are replayed; numpy costs more to import than it saves
+VECTORIZE_MIN_FILLS = int(os.getenv('ANALYTICS_VECTORIZE_MIN_FILLS', 1000))
+
+
+def build_fill(account: str, data: Dict[str, Any],
+               trade_response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Normalize an executed trade into a fill record.
+    Returns None when the response carries no fill (e.g. a resting order).
+    """
+    order = trade_response.get('order')
+    order = order if isinstance(order, dict) else {}
+    oanda_fill = order.get('orderFillTransaction') or {}
+
+    price = trade_response.get('filled_price')
+    if price is None and oanda_fill.get('price'):
+        price = float(oanda_fill['price'])
+    if price is None and order.get('fills'):
+        price = float(order['fills'][0]['price'])
+    if price is None:
+        return None
+
+    units = data.get('units')
+    if units is None:
+        units = oanda_fill.get('units') or order.get('executedQty')
+    units = abs(float(units))
+
+    return {
+        'account': account,
+        'strategy': data.get('strategy') or 'unknown',
+        'symbol': data['symbol'],
+        'side': data['action'].lower(),
+        'units': units,
+        'signal_price': data.get('price'),
+        'filled_price': price,
+        # Oanda reports realized P&L; elsewhere it is derived from cost basis
+        'broker_pl': float(oanda_fill['pl']) if 'pl' in oanda_fill else None
+    }
+
+
+class PositionBook:
+    """Average-cost positions used to derive realized P&L per fill"""
+
+    def __init__(self):
+        self._positions: Dict[Tuple[str, str], Tuple[float, float]] = {}
+
+    def apply(self, fill: Dict[str, Any]) -> Tuple[float, float]:
+        """Apply a fill; returns (closed_units, realized_pl)"""
+        key = (fill['account'], fill['symbol'])
+        quantity, avg_price = self._positions.get(key, (0.0, 0.0))
+        signed = fill['units'] if fill['side'] == 'buy' else -fill['units']
+        price = fill['filled_price']
+
+        closed = 0.0
+        realized = 0.0
+        if quantity and (quantity > 0) != (signed > 0):
+            closed = min(abs(quantity), abs(signed))
+            direction = 1 if quantity > 0 else -1
+            realized = (price - avg_price) * closed * direction
+
+        new_quantity = quantity + signed
+        if abs(new_quantity) < 1e-12:
+            self._positions.pop(key, None)
+        elif quantity == 0 or (quantity > 0) != (new_quantity > 0):
+            # Opened fresh or flipped through flat: the remainder is new cost
+            self._positions[key] = (new_quantity, price)
+        elif abs(new_quantity) > abs(quantity):
+            avg_price = (avg_price * abs(quantity) +
+                         price * abs(signed)) / abs(new_quantity)
+            self._positions[key] = (new_quantity, avg_price)
+        else:
+            self._positions[key] = (new_quantity, avg_price)
+
+        if fill.get('broker_pl') is not None and closed:
+            realized = fill['broker_pl']
+        return closed, realized
+
+
+class RunningStats:
+    """Incrementally maintained performance aggregates"""
+
+    __slots__ = ('trades', 'wins', 'losses', 'gross_profit', 'gross_loss',
+                 'mean', 'm2', 'equity', 'peak', 'max_drawdown', 'fills',
+                 'slippage_count', 'slippage_bps_sum')
+
+    def __init__(self):
+        self.trades = 0
+        self.wins = 0
+        self.losses = 0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.equity = 0.0
+        self.peak = 0.0
+        self.max_drawdown = 0.0
+        self.fills = 0
+        self.slippage_count = 0
+        self.slippage_bps_sum = 0.0
+
+    def add_trade(self, pl: float) -> None:
+        """Record a closed trade's realized P&L (Welford update)"""
+        self.trades += 1
+        if pl > 0:
+            self.wins += 1
+            self.gross_profit += pl
+        elif pl < 0:
+            self.losses += 1
+            self.gross_loss -= pl
+
+        delta = pl - self.mean
+        self.mean += delta / self.trades
+        self.m2 += delta * (pl - self.mean)
+
+        self.equity += pl
+        self.peak = max(self.peak, self.equity)
+        self.max_drawdown = max(self.max_drawdown, self.peak - self.equity)
+
+    def add_slippage(self, bps: float) -> None:
+        self.slippage_count += 1
+        self.slippage_bps_sum += bps
+
+    def to_dict(self) -> Dict[str, Any]:
+        std = math.sqrt(self.m2 / (self.trades - 1)) if self.trades > 1 else 0.0
+        return {
+            'fills': self.fills,
+            'trades': self.trades,
+            'win_rate': self.wins / self.trades if self.trades else None,
+            'avg_win': self.gross_profit / self.wins if self.wins else None,
+            'avg_loss': self.gross_loss / self.losses if self.losses else None,
+            'expectancy': self.mean if self.trades else None,
+            'profit_factor': (self.gross_profit / self.gross_loss
+                              if self.gross_loss else None),
+            'net_pl': self.equity,
+            'max_drawdown': self.max_drawdown,
+            'current_drawdown': self.peak - self.equity,
+            'sharpe_per_trade': self.mean / std if std else None,
+            'avg_slippage_bps': (self.slippage_bps_sum / self.slippage_count
+                                 if self.slippage_count else None)
+        }
+
+
+def slippage_bps(fill: Dict[str, Any]) -> Optional[float]:
+    """Adverse slippage of the fill vs. the signal price, in basis points"""
+    signal_price = fill.get('signal_price')
+    if not signal_price:
+        return None
+    direction = 1 if fill['side'] == 'buy' else -1
+    return (fill['filled_price'] -
+            signal_price) / signal_price * 1e4 * direction
+
+
+class PerformanceAnalytics:
+    """Per-strategy, per-symbol and overall running performance"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._book = PositionBook()
+        self._stats: Dict[Tuple[str, str], RunningStats] = {}
+        self._snapshot: Dict[str, Dict[str, Any]] = {
+            'total': {},
+            'strategy': {},
+            'symbol': {}
+        }
+
+    def _keys(self, fill: Dict[str, Any]) -> List[Tuple[str, str]]:
+        return [TOTAL_KEY, ('strategy', fill['strategy']),
+                ('symbol', fill['symbol'])]
+
+    def _publish(self, key: Tuple[str, str]) -> None:
+        snapshot = self._stats[key].to_dict()
+        if key == TOTAL_KEY:
+            self._snapshot['total'] = snapshot
+        else:
+            self._snapshot[key[0]][key[1]] = snapshot
+
+    def on_fill(self, fill: Dict[str, Any]) -> None:
+        """Update the affected aggregates with one fill"""
+        with self._lock:
+            closed, realized = self._book.apply(fill)
+            bps = slippage_bps(fill)
+            for key in self._keys(fill):
+                stats = self._stats.get(key)
+                if stats is None:
+                    stats = self._stats[key] = RunningStats()
+                stats.fills += 1
+                if closed:
+                    stats.add_trade(realized)
+                if bps is not None:
+                    stats.add_slippage(bps)
+                self._publish(key)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Cached aggregates; cost does not depend on trade history length"""
+        with self._lock:
+            return {
+                'total': self._snapshot['total'],
+                'strategy': dict(self._snapshot['strategy']),
+                'symbol': dict(self._snapshot['symbol'])
+            }
+
+    def recompute(self, fills: Iterable[Dict[str, Any]]) -> int:
+        """Rebuild all aggregates from a full fill history (backfills)"""
+        fills = list(fills)
+        np = None
+        if len(fills) >= VECTORIZE_MIN_FILLS:
+            try:
+                import numpy as np
+            except ImportError:  # numpy is optional; fall back to replay
+                np = None
+        if np is None:
+            with self._lock:
+                self._reset()
+            for fill in fills:
+                self.on_fill(fill)
+            return len(fills)
+
+        # P&L attribution depends on fill order, so positions are replayed
+        # once; the aggregates themselves are then computed per group
+        book = PositionBook()
+        groups: Dict[Tuple[str, str], Dict[str, list]] = {}
+        for fill in fills:
+            closed, realized = book.apply(fill)
+            bps = slippage_bps(fill)
+            for key in self._keys(fill):
+                group = groups.setdefault(key, {
+                    'fills': 0,
+                    'pl': [],
+                    'slippage': []
+                })
+                group['fills'] += 1
+                if closed:
+                    group['pl'].append(realized)
+                if bps is not None:
+                    group['slippage'].append(bps)
+
+        stats_by_key = {
+            key: self._vectorized_stats(np, group)
+            for key, group in groups.items()
+        }
+        with self._lock:
+            self._reset()
+            self._book = book
+            self._stats = stats_by_key
+            for key in stats_by_key:
+                self._publish(key)
+        return len(fills)
+
+    @staticmethod
+    def _vectorized_stats(np, group: Dict[str, list]) -> RunningStats:
+        stats = RunningStats()
+        stats.fills = group['fills']
+
+        pl = np.asarray(group['pl'], dtype=float)
+        if pl.size:
+            equity = np.cumsum(pl)
+            peak = np.maximum.accumulate(np.maximum(equity, 0.0))
+            stats.trades = int(pl.size)
+            stats.wins = int((pl > 0).sum())
+            stats.losses = int((pl < 0).sum())
+            stats.gross_profit = float(pl[pl > 0].sum())
+            stats.gross_loss = float(-pl[pl < 0].sum())
+            stats.mean = float(pl.mean())
+            stats.m2 = float(((pl - stats.mean)**2).sum())
+            stats.equity = float(equity[-1])
+            stats.peak = float(peak[-1])
+            stats.max_drawdown = float((peak - equity).max())
+
+        slippage = np.asarray(group['slippage'], dtype=float)
+        if slippage.size:
+            stats.slippage_count = int(slippage.size)
+            stats.slippage_bps_sum = float(slippage.sum())
+        return stats
@@ -0,0 +1,74 @@
+"""
+Micro-benchmark for the webhook parse + validate path.
+
+Compares the original request handling (json.loads, a pretty-printed
+json.dumps for logging and a required-key check) against decode_payload()
+plus Signal.from_dict().
+
+Usage:
+    python bench_signal_parse.py [iterations]
+"""
+
+import functools
+import json
+import sys
+import timeit
+
+from signal_schema import Signal, decode_payload, orjson
+
+PAYLOADS = {
+    'forex': {
+        "secret": "bench-secret",
+        "strategy": "MA_Cross",
+        "action": "buy",
+        "symbol": "EUR_USD",
+        "risk": 1,
+        "units": 100,
+        "tp_pips": 60,
+        "sl_pips": 30
+    },
+    'crypto': {
+        "secret": "bench-secret",
+        "action": "sell",
+        "symbol": "BTCUSDT",
+        "risk": "0.5",
+        "units": "0.001",
+        "price": 64250.5
+    }
+}
+
+
+def legacy_parse(raw: bytes) -> dict:
+    """Approximation of the previous webhook() parsing path"""
+    data = json.loads(raw)
+    json.dumps(data, indent=2)
+    for field in ('action', 'symbol', 'risk'):
+        if field not in data:
+            raise ValueError(field)
+    return data
+
+
+def schema_parse(raw: bytes) -> dict:
+    """Current path: fast decode, one-pass coercion and validation"""
+    return Signal.from_dict(decode_payload(raw)).to_dict()
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f"Decoder: {'orjson' if orjson else 'json'}, "
+          f"iterations: {iterations}")
+
+    for name, payload in PAYLOADS.items():
+        raw = json.dumps(payload).encode()
+        for label, func in (('legacy', legacy_parse),
+                            ('schema', schema_parse)):
+            seconds = min(
+                timeit.repeat(functools.partial(func, raw),
+                              number=iterations,
+                              repeat=3))
+            print(f"{name:>8} {label:>7}: "
+                  f"{seconds / iterations * 1e6:8.2f} us/op")
+
+
+if __name__ == '__main__':
+    main()
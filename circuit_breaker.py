@@ -0,0 +1,318 @@
+"""
+Circuit Breakers
+Per-endpoint circuit breakers for broker API calls, plus optional hedged
+requests for read-only calls.
+
+Each breaker keeps a rolling time window of call outcomes and latencies.
+When the error rate or the slow-call rate in the window crosses its
+threshold the breaker opens and calls fail fast with CircuitOpenError.
+After a cool-down it goes half-open and lets a probe call through; a
+successful probe closes it again, a failed one re-opens it.
+
+Hedged requests fire a second identical request when the first has not
+answered within the endpoint's observed p95 latency and return whichever
+finishes first. Only use them for idempotent, read-only calls.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because its circuit is open"""
+
+
+def http_status(error: Exception) -> Optional[int]:
+    """
+    HTTP status of a broker error, or None if the request got no response.
+    Binance errors carry an API error code in 'code' (e.g. -2010), so only
+    Oanda's V20Error has its HTTP status there.
+    """
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        # Only loaded once Oanda is in use, which keeps imports lazy
+        v20 = sys.modules.get('oandapyV20.exceptions')
+        if v20 is not None and isinstance(error, v20.V20Error):
+            status = error.code
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code',
+                         None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_unsent(error: Exception) -> bool:
+    """
+    Whether an error proves a request never took effect at the broker: the
+    circuit was open, the connection could not be made, or the broker
+    answered with a client error. Timeouts and server errors prove nothing.
+    """
+    if isinstance(error, CircuitOpenError):
+        return True
+    status = http_status(error)
+    if status is not None:
+        return 400 <= status < 500
+    if isinstance(error, ConnectionRefusedError):
+        return True
+    # requests wraps urllib3's connect errors (refused, connect timeout)
+    urllib3_exceptions = sys.modules.get('urllib3.exceptions')
+    reason = getattr(error.args[0] if error.args else None, 'reason', None)
+    return urllib3_exceptions is not None and isinstance(
+        reason, urllib3_exceptions.ConnectTimeoutError)
+
+
+def is_broker_failure(error: Exception) -> bool:
+    """
+    Decide whether an exception means the broker is unhealthy.
+    Only server errors (5xx), rate limiting (429) and transport errors
+    count; client errors such as insufficient margin or a bad quantity
+    prove the broker is answering.
+    """
+    status = http_status(error)
+    return status is None or status == 429 or status >= 500
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker driven by a rolling outcome window"""
+
+    def __init__(self,
+                 name: str,
+                 window_seconds: float = 60.0,
+                 min_calls: int = 10,
+                 error_rate_threshold: float = 0.5,
+                 slow_call_seconds: float = 5.0,
+                 slow_rate_threshold: float = 0.8,
+                 open_seconds: float = 30.0,
+                 half_open_max_calls: int = 1,
+                 max_samples: int = 1000):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate_threshold = slow_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        # (timestamp, failed, latency) per completed call
+        self._samples: deque = deque(maxlen=max_samples)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._lock = threading.Lock()
+        self._publish_state()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def _refresh_state(self) -> None:
+        if self._state == OPEN and time.monotonic(
+        ) - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state == self._state:
+            return
+        logger.warning(f"Circuit {self.name}: {self._state} -> {state}")
+        self._state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        if state == HALF_OPEN:
+            self._half_open_calls = 0
+        if state == CLOSED:
+            self._samples.clear()
+        metrics.inc('circuit_transitions_total', endpoint=self.name, to=state)
+        self._publish_state()
+
+    def _publish_state(self) -> None:
+        metrics.set_gauge('circuit_state', STATE_VALUES[self._state],
+                          endpoint=self.name)
+
+    def _trim(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+
+    def before_call(self) -> None:
+        """Reserve a call slot or raise CircuitOpenError"""
+        with self._lock:
+            self._refresh_state()
+            if self._state == CLOSED:
+                return
+            if (self._state == HALF_OPEN
+                    and self._half_open_calls < self.half_open_max_calls):
+                self._half_open_calls += 1
+                return
+            retry_in = max(
+                0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+        metrics.inc('circuit_rejections_total', endpoint=self.name)
+        raise CircuitOpenError(
+            f"Circuit {self.name} is open; retry in {retry_in:.0f}s")
+
+    def record(self, failed: bool, latency: float) -> None:
+        """Record a call outcome and update the breaker state"""
+        metrics.inc('circuit_calls_total',
+                    endpoint=self.name,
+                    outcome='failure' if failed else 'success')
+        metrics.observe('broker_call_seconds', latency, endpoint=self.name)
+
+        now = time.monotonic()
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._transition(OPEN if failed else CLOSED)
+                return
+            if self._state == OPEN:
+                return
+
+            self._samples.append((now, failed, latency))
+            self._trim(now)
+            total = len(self._samples)
+            if total < self.min_calls:
+                return
+
+            failures = sum(1 for _, f, _ in self._samples if f)
+            slow = sum(1 for _, _, lat in self._samples
+                       if lat >= self.slow_call_seconds)
+            if (failures / total >= self.error_rate_threshold
+                    or slow / total >= self.slow_rate_threshold):
+                self._transition(OPEN)
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn through the breaker"""
+        self.before_call()
+        start = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record(is_broker_failure(e), time.monotonic() - start)
+            raise
+        self.record(False, time.monotonic() - start)
+        return result
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """Latency percentile of recent calls, or None without enough data"""
+        with self._lock:
+            latencies = sorted(lat for _, failed, lat in self._samples
+                               if not failed)
+        if len(latencies) < self.min_calls:
+            return None
+        index = min(len(latencies) - 1, int(len(latencies) * percentile))
+        return latencies[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh_state()
+            self._trim(time.monotonic())
+            total = len(self._samples)
+            failures = sum(1 for _, f, _ in self._samples if f)
+            state = self._state
+        return {
+            'state': state,
+            'calls_in_window': total,
+            'error_rate': round(failures / total, 3) if total else 0.0,
+            'p95_latency': self.latency_percentile(0.95)
+        }
+
+
+class BreakerRegistry:
+    """Creates breakers on demand and runs calls through them"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self.hedging_enabled = os.getenv('HEDGE_READS',
+                                         'False').lower() == 'true'
+        self.default_hedge_delay = float(os.getenv('HEDGE_DEFAULT_DELAY', 0.5))
+        self._hedge_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('HEDGE_MAX_WORKERS', 8)),
+            thread_name_prefix='hedge')
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(name)
+                if breaker is None:
+                    breaker = CircuitBreaker(
+                        name,
+                        window_seconds=float(
+                            os.getenv('CIRCUIT_WINDOW_SECONDS', 60)),
+                        min_calls=int(os.getenv('CIRCUIT_MIN_CALLS', 10)),
+                        error_rate_threshold=float(
+                            os.getenv('CIRCUIT_ERROR_RATE', 0.5)),
+                        slow_call_seconds=float(
+                            os.getenv('CIRCUIT_SLOW_CALL_SECONDS', 5)),
+                        open_seconds=float(
+                            os.getenv('CIRCUIT_OPEN_SECONDS', 30)))
+                    self._breakers[name] = breaker
+        return breaker
+
+    def call(self,
+             name: str,
+             fn: Callable[..., Any],
+             *args,
+             hedge: bool = False,
+             **kwargs) -> Any:
+        """
+        Call fn through the named breaker. With hedge=True (and HEDGE_READS
+        enabled) a backup request is sent once the p95 delay has elapsed.
+        """
+        breaker = self.get(name)
+        if not (hedge and self.hedging_enabled):
+            return breaker.call(fn, *args, **kwargs)
+
+        delay = breaker.latency_percentile(0.95) or self.default_hedge_delay
+        primary = self._hedge_executor.submit(breaker.call, fn, *args,
+                                              **kwargs)
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeoutError:
+            pass
+
+        metrics.inc('hedged_requests_total', endpoint=name)
+        backup = self._hedge_executor.submit(breaker.call, fn, *args,
+                                             **kwargs)
+
+        pending = {primary, backup}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is backup:
+                        metrics.inc('hedged_wins_total', endpoint=name)
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+
+# Shared registry; broker health is the same for every account
+breakers = BreakerRegistry()
@@ -1,33 +1,149 @@
-from binance.client import Client
-from binance.exceptions import BinanceAPIException
-from oandapyV20 import API
-from oandapyV20.exceptions import V20Error
-from oandapyV20.endpoints.orders import OrderCreate
-from oandapyV20.endpoints.trades import TradeCRCDO
-from typing import Dict, Any, Tuple
-import os
+"""
+Exchange Handler
+Routes trades to Oanda or Binance. Broker SDKs are imported and their
+clients constructed lazily on first use (or by warm_up()), so importing this
+module and constructing a handler costs no network round trips; the Binance
+client pings the API when it is created.
+
+Orders carrying a 'client_order_id' are tagged with it at the broker (Oanda
+client extensions, Binance newClientOrderId) and their progress is recorded
+in the execution write-ahead log, so recover_intent() can find and repair
+them after a crash.
+
+With PAPER_TRADING=true no broker is contacted: orders are filled
+immediately at the signal price (or 1.0), after an optional simulated broker
+latency (PAPER_FILL_LATENCY_MS). Everything else on the execution path,
+including the write-ahead log, runs as it would live.
+"""
+
+import itertools
 import logging
-from oandapyV20.endpoints.accounts import AccountSummary, AccountDetails
-from oandapyV20.endpoints.positions import OpenPositions
+import os
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple
 
+from circuit_breaker import breakers
 
-class MultiExchangeHandler:
 
-    def __init__(self):
-        # Initialize Oanda
-        self.oanda_api = API(access_token=os.getenv('OANDA_API_KEY'),
-                             environment=os.getenv('OANDA_ENVIRONMENT',
-                                                   'practice'))
-        self.oanda_account_id = os.getenv('OANDA_ACCOUNT_ID')
+class MultiExchangeHandler:
 
-        # Initialize Binance
-        self.binance_client = Client(
-            api_key=os.getenv('BINANCE_API_KEY'),
-            api_secret=os.getenv('BINANCE_API_SECRET'),
-            testnet=os.getenv('BINANCE_TESTNET', 'True').lower() == 'true')
+    def __init__(self,
+                 oanda_api_key: Optional[str] = None,
+                 oanda_account_id: Optional[str] = None,
+                 oanda_environment: Optional[str] = None,
+                 binance_api_key: Optional[str] = None,
+                 binance_api_secret: Optional[str] = None,
+                 binance_testnet: Optional[bool] = None,
+                 paper: Optional[bool] = None):
+        # Credentials default to the environment so a bare
+        # MultiExchangeHandler() keeps working for single-account setups
+        if binance_testnet is None:
+            binance_testnet = os.getenv('BINANCE_TESTNET',
+                                        'True').lower() == 'true'
+
+        # Oanda settings; the API client is built on first use
+        self._oanda_api_key = oanda_api_key or os.getenv('OANDA_API_KEY')
+        self._oanda_environment = oanda_environment or os.getenv(
+            'OANDA_ENVIRONMENT', 'practice')
+        self.oanda_account_id = oanda_account_id or os.getenv(
+            'OANDA_ACCOUNT_ID')
+
+        # Binance settings; the client is built on first use
+        self._binance_api_key = binance_api_key or os.getenv('BINANCE_API_KEY')
+        self._binance_api_secret = binance_api_secret or os.getenv(
+            'BINANCE_API_SECRET')
+        self._binance_testnet = binance_testnet
+
+        # requests has no default timeout; bound every broker call
+        self.request_timeout = float(os.getenv('BROKER_TIMEOUT', 10))
+
+        self._oanda_api = None
+        self._binance_client = None
+        self._init_lock = threading.Lock()
+
+        # Execution write-ahead log, attached by the account registry
+        self.wal = None
+        # Per-thread flag: did the current execution send an order request
+        self._sent = threading.local()
+
+        # Simulated fills instead of broker orders
+        self.paper = paper if paper is not None else os.getenv(
+            'PAPER_TRADING', 'false').lower() == 'true'
+        self.paper_latency = float(os.getenv('PAPER_FILL_LATENCY_MS', 0)) / 1000
+        self._paper_ids = itertools.count(1)
 
         self.logger = logging.getLogger(__name__)
 
+    @property
+    def oanda_api(self):
+        """Oanda API client, created on first access"""
+        if self._oanda_api is None:
+            with self._init_lock:
+                if self._oanda_api is None:
+                    from oandapyV20 import API
+                    self._oanda_api = API(
+                        access_token=self._oanda_api_key,
+                        environment=self._oanda_environment,
+                        request_params={'timeout': self.request_timeout})
+        return self._oanda_api
+
+    @property
+    def binance_client(self):
+        """Binance client, created on first access (pings the API)"""
+        if self._binance_client is None:
+            with self._init_lock:
+                if self._binance_client is None:
+                    from binance.client import Client
+                    self._binance_client = Client(
+                        api_key=self._binance_api_key,
+                        api_secret=self._binance_api_secret,
+                        testnet=self._binance_testnet,
+                        requests_params={'timeout': self.request_timeout})
+        return self._binance_client
+
+    def _oanda_request(self, endpoint: str, request, hedge: bool = False):
+        """Send an Oanda request through the endpoint's circuit breaker"""
+        if endpoint == 'orders':
+            self._sent.order = True
+        return breakers.call(f'oanda.{endpoint}',
+                             self.oanda_api.request,
+                             request,
+                             hedge=hedge)
+
+    def _binance_call(self, endpoint: str, method: str, hedge: bool = False,
+                      **kwargs):
+        """Call a Binance client method through the endpoint's breaker"""
+        if endpoint == 'orders':
+            self._sent.order = True
+        return breakers.call(f'binance.{endpoint}',
+                             getattr(self.binance_client, method),
+                             hedge=hedge,
+                             **kwargs)
+
+    def _record_step(self, data: Dict[str, Any], step: str,
+                     **fields: Any) -> None:
+        """Record broker-side progress of a logged intent"""
+        if self.wal is not None and data.get('client_order_id'):
+            self.wal.step(data['client_order_id'], step, **fields)
+
+    def warm_up(self, exchange: Optional[str] = None) -> None:
+        """Construct broker clients ahead of the first trade"""
+        if self.paper:
+            return
+        # Accessing the properties builds the clients
+        if exchange in (None, 'oanda'):
+            _ = self.oanda_api
+        if exchange in (None, 'binance'):
+            _ = self.binance_client
+
+    def has_credentials(self, exchange: str) -> bool:
+        """Whether this handler is configured to trade on an exchange"""
+        if exchange == 'oanda':
+            return bool(self._oanda_api_key and self.oanda_account_id)
+        return bool(self._binance_api_key and self._binance_api_secret)
+
     def determine_exchange(self, symbol: str) -> str:
         """Determine which exchange to use based on the symbol"""
         if '_' in symbol:
@@ -37,10 +153,21 @@ class MultiExchangeHandler:
         else:
             raise ValueError(f"Cannot determine exchange for symbol: {symbol}")
 
+    def order_sent(self) -> bool:
+        """
+        Whether the last execute_trade() on this thread got as far as
+        sending an order request, i.e. the broker may have the order
+        """
+        return getattr(self._sent, 'order', True)
+
     def execute_trade(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Execute trade on appropriate exchange"""
+        self._sent.order = False
         try:
-            exchange = self.determine_exchange(data['symbol'])
+            exchange = data.get('exchange') or self.determine_exchange(
+                data['symbol'])
+            if self.paper:
+                return self.execute_paper_trade(data, exchange)
             if exchange == 'oanda':
                 return self.execute_oanda_trade(data)
             else:
@@ -49,9 +176,58 @@ class MultiExchangeHandler:
             self.logger.error(f"Trade execution error: {str(e)}")
             raise
 
+    def execute_paper_trade(self, data: Dict[str, Any],
+                            exchange: str) -> Dict[str, Any]:
+        """Simulate a fill without contacting the broker"""
+        if self.paper_latency:
+            time.sleep(self.paper_latency)
+
+        order_id = f"paper-{next(self._paper_ids)}"
+        if data.get('order_type') == 'limit':
+            self._record_step(data, 'order_resting', order_id=order_id)
+            return {
+                'status': 'pending',
+                'exchange': exchange,
+                'paper': True,
+                'order_id': order_id,
+                'filled_price': None,
+                'trade_id': None
+            }
+
+        filled_price = float(data.get('price') or 1.0)
+        self._record_step(data,
+                          'entry_filled',
+                          trade_id=order_id,
+                          filled_price=filled_price)
+
+        sl_price = tp_price = None
+        if 'sl_pips' in data and 'tp_pips' in data:
+            sl_price, tp_price = self.calculate_sl_tp(filled_price,
+                                                      data['action'],
+                                                      float(data['sl_pips']),
+                                                      float(data['tp_pips']))
+            self._record_step(data, 'sl_tp_placed')
+
+        return {
+            'status': 'success',
+            'exchange': exchange,
+            'paper': True,
+            'order': {},
+            'filled_price': filled_price,
+            'trade_id': order_id,
+            'sl_price': sl_price,
+            'tp_price': tp_price
+        }
+
     def execute_oanda_trade(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Execute trade on Oanda"""
+        from oandapyV20.endpoints.orders import OrderCreate
+        from oandapyV20.endpoints.trades import TradeCRCDO
+        from oandapyV20.exceptions import V20Error
+
         try:
+            is_limit = data.get('order_type') == 'limit'
+
             # Create market order
             order_data = {
                 "order": {
@@ -69,16 +245,68 @@ class MultiExchangeHandler:
                 }
             }
 
+            # Tag the order and its trade so recovery can look them up
+            client_order_id = data.get('client_order_id')
+            if client_order_id:
+                order_data['order'].update({
+                    "clientExtensions": {
+                        "id": client_order_id
+                    },
+                    "tradeClientExtensions": {
+                        "id": client_order_id
+                    }
+                })
+
+            # Limit orders rest on the book, so SL/TP are attached on fill
+            if is_limit:
+                order_data['order'].update({
+                    "type": "LIMIT",
+                    "price": str(data['price']),
+                    "timeInForce": "GTC"
+                })
+                if 'sl_pips' in data and 'tp_pips' in data:
+                    sl_price, tp_price = self.calculate_sl_tp(
+                        float(data['price']), data['action'],
+                        float(data['sl_pips']), float(data['tp_pips']))
+                    order_data['order'].update({
+                        "stopLossOnFill": {
+                            "price": str(sl_price)
+                        },
+                        "takeProfitOnFill": {
+                            "price": str(tp_price)
+                        }
+                    })
+
             order_request = OrderCreate(self.oanda_account_id, data=order_data)
-            response = self.oanda_api.request(order_request)
+            response = self._oanda_request('orders', order_request)
+
+            if is_limit and 'orderFillTransaction' not in response:
+                self._record_step(
+                    data,
+                    'order_resting',
+                    order_id=str(response['orderCreateTransaction']['id']))
+                return {
+                    'status': 'pending',
+                    'exchange': 'oanda',
+                    'order': response,
+                    'order_id': str(response['orderCreateTransaction']['id']),
+                    'filled_price': None,
+                    'trade_id': None,
+                    'sl_price': sl_price if 'sl_pips' in data else None,
+                    'tp_price': tp_price if 'tp_pips' in data else None
+                }
 
             # Get filled price and trade ID
             filled_price = float(response['orderFillTransaction']['price'])
             trade_id = str(
                 response['orderFillTransaction']['tradeOpened']['tradeID'])
+            self._record_step(data,
+                              'entry_filled',
+                              trade_id=trade_id,
+                              filled_price=filled_price)
 
             # Set SL/TP if provided
-            if 'sl_pips' in data and 'tp_pips' in data:
+            if 'sl_pips' in data and 'tp_pips' in data and not is_limit:
                 sl_price, tp_price = self.calculate_sl_tp(
                     filled_price, data['action'], float(data['sl_pips']),
                     float(data['tp_pips']))
@@ -98,7 +326,8 @@ class MultiExchangeHandler:
                 modify_request = TradeCRCDO(accountID=self.oanda_account_id,
                                             tradeID=trade_id,
                                             data=sl_tp_data)
-                modification = self.oanda_api.request(modify_request)
+                modification = self._oanda_request('trades', modify_request)
+                self._record_step(data, 'sl_tp_placed')
 
             return {
                 'status': 'success',
@@ -119,56 +348,95 @@ class MultiExchangeHandler:
 
     def execute_binance_trade(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Execute trade on Binance"""
+        from binance.exceptions import BinanceAPIException
+
         try:
             symbol = data['symbol']
             side = data['action'].upper()
             quantity = data['units']
+            client_ids = self._binance_client_ids(data)
 
             # Get symbol info for precision
-            symbol_info = self.binance_client.get_symbol_info(symbol)
-
-            # Create market order
-            order = self.binance_client.create_order(symbol=symbol,
-                                                     side=side,
-                                                     type='MARKET',
-                                                     quantity=quantity)
+            symbol_info = self._binance_call('exchange_info',
+                                             'get_symbol_info',
+                                             hedge=True,
+                                             symbol=symbol)
+
+            # Create market order, or a resting limit order when requested
+            if data.get('order_type') == 'limit':
+                order = self._binance_call(
+                    'orders',
+                    'create_order',
+                    symbol=symbol,
+                    side=side,
+                    type='LIMIT',
+                    quantity=quantity,
+                    price=str(data['price']),
+                    timeInForce='GTC',
+                    **client_ids['entry'])
+            else:
+                order = self._binance_call('orders',
+                                           'create_order',
+                                           symbol=symbol,
+                                           side=side,
+                                           type='MARKET',
+                                           quantity=quantity,
+                                           **client_ids['entry'])
+            is_filled = order.get('status', 'FILLED') == 'FILLED'
+            self._record_step(data,
+                              'entry_filled' if is_filled else 'order_resting',
+                              order_id=str(order['orderId']))
 
             result = {
                 'status':
-                'success',
+                'success' if is_filled else 'pending',
                 'exchange':
                 'binance',
                 'order':
                 order,
                 'filled_price':
                 float(order['fills'][0]['price']) if order['fills'] else None,
+                'order_id':
+                str(order['orderId']),
             }
 
             # Add SL/TP if provided
-            if 'sl_pips' in data and order['fills']:
+            if 'sl_pips' in data and order['fills'] and is_filled:
                 filled_price = float(order['fills'][0]['price'])
                 sl_price, tp_price = self.calculate_sl_tp(
                     filled_price, data['action'], float(data['sl_pips']),
                     float(data['tp_pips']))
 
                 # Place stop loss order
-                sl_order = self.binance_client.create_order(
+                sl_order = self._binance_call(
+                    'orders',
+                    'create_order',
                     symbol=symbol,
                     side='SELL' if side == 'BUY' else 'BUY',
                     type='STOP_LOSS_LIMIT',
                     quantity=quantity,
                     price=str(sl_price),
                     stopPrice=str(sl_price),
-                    timeInForce='GTC')
+                    timeInForce='GTC',
+                    **client_ids['sl'])
+                self._record_step(data,
+                                  'stop_loss_placed',
+                                  order_id=str(sl_order['orderId']))
 
                 # Place take profit order
-                tp_order = self.binance_client.create_order(
+                tp_order = self._binance_call(
+                    'orders',
+                    'create_order',
                     symbol=symbol,
                     side='SELL' if side == 'BUY' else 'BUY',
                     type='LIMIT',
                     quantity=quantity,
                     price=str(tp_price),
-                    timeInForce='GTC')
+                    timeInForce='GTC',
+                    **client_ids['tp'])
+                self._record_step(data,
+                                  'take_profit_placed',
+                                  order_id=str(tp_order['orderId']))
 
                 result.update({
                     'sl_order': sl_order,
@@ -186,6 +454,363 @@ class MultiExchangeHandler:
             self.logger.error(f"Error in Binance trade execution: {str(e)}")
             raise
 
+    @staticmethod
+    def _binance_client_ids(data: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
+        """newClientOrderId arguments for the entry and SL/TP orders"""
+        client_order_id = data.get('client_order_id')
+        return {
+            leg: {
+                'newClientOrderId':
+                client_order_id + suffix
+            } if client_order_id else {}
+            for leg, suffix in (('entry', ''), ('sl', '-sl'), ('tp', '-tp'))
+        }
+
+    def recover_intent(self, intent: Dict[str, Any],
+                       mode: str = 'finish') -> Dict[str, Any]:
+        """
+        Reconcile an intent left incomplete by a crash with broker state.
+        mode 'finish' adds missing SL/TP, 'unwind' cancels or closes
+        whatever the intent opened, 'report' only inspects.
+        """
+        if self.paper:
+            # Paper orders never reached a broker; there is nothing to repair
+            return {'status': 'paper'}
+
+        data = dict(intent['data'], client_order_id=intent['id'])
+        exchange = data.get('exchange') or self.determine_exchange(
+            data['symbol'])
+        if exchange == 'oanda':
+            return self._recover_oanda(intent['id'], data, mode)
+        return self._recover_binance(intent['id'], data, mode)
+
+    def _recover_oanda(self, client_order_id: str, data: Dict[str, Any],
+                       mode: str) -> Dict[str, Any]:
+        from oandapyV20.endpoints.orders import OrderCancel, OrderDetails
+        from oandapyV20.endpoints.trades import TradeClose, TradeCRCDO, TradeDetails
+        from oandapyV20.exceptions import V20Error
+
+        # Oanda resolves "@<client id>" to the order or trade carrying it
+        try:
+            order = self._oanda_request(
+                'orders',
+                OrderDetails(self.oanda_account_id,
+                             orderID=f"@{client_order_id}"))['order']
+        except V20Error as e:
+            if e.code == 404:
+                return {'status': 'not_sent'}
+            raise
+
+        if order['state'] == 'PENDING':
+            if mode == 'unwind':
+                self._oanda_request(
+                    'orders', OrderCancel(self.oanda_account_id,
+                                          orderID=order['id']))
+                return {'status': 'cancelled', 'order_id': order['id']}
+            return {'status': 'pending', 'order_id': order['id']}
+        if order['state'] != 'FILLED':
+            return {'status': order['state'].lower(), 'order_id': order['id']}
+
+        trade = self._oanda_request(
+            'trades',
+            TradeDetails(self.oanda_account_id,
+                         tradeID=f"@{client_order_id}"))['trade']
+        result = {'trade_id': trade['id'], 'filled_price': float(trade['price'])}
+        if trade['state'] != 'OPEN':
+            return dict(result, status='closed')
+
+        if mode == 'unwind':
+            self._oanda_request(
+                'trades', TradeClose(self.oanda_account_id,
+                                     tradeID=trade['id']))
+            return dict(result, status='unwound')
+
+        wants_sl_tp = 'sl_pips' in data and 'tp_pips' in data
+        protected = 'stopLossOrder' in trade and 'takeProfitOrder' in trade
+        if not wants_sl_tp or protected:
+            return dict(result, status='success')
+        if mode != 'finish':
+            return dict(result, status='unprotected')
+
+        sl_price, tp_price = self.calculate_sl_tp(float(trade['price']),
+                                                  data['action'],
+                                                  float(data['sl_pips']),
+                                                  float(data['tp_pips']))
+        self._oanda_request(
+            'trades',
+            TradeCRCDO(accountID=self.oanda_account_id,
+                       tradeID=trade['id'],
+                       data={
+                           "stopLoss": {
+                               "price": str(sl_price),
+                               "timeInForce": "GTC"
+                           },
+                           "takeProfit": {
+                               "price": str(tp_price),
+                               "timeInForce": "GTC"
+                           }
+                       }))
+        return dict(result, status='finished', sl_price=sl_price,
+                    tp_price=tp_price)
+
+    def _recover_binance(self, client_order_id: str, data: Dict[str, Any],
+                         mode: str) -> Dict[str, Any]:
+        from binance.exceptions import BinanceAPIException
+
+        symbol = data['symbol']
+
+        def lookup(client_id: str) -> Optional[Dict[str, Any]]:
+            try:
+                return self._binance_call('orders',
+                                          'get_order',
+                                          symbol=symbol,
+                                          origClientOrderId=client_id)
+            except BinanceAPIException as e:
+                if e.code == -2013:  # Order does not exist
+                    return None
+                raise
+
+        order = lookup(client_order_id)
+        if order is None:
+            return {'status': 'not_sent'}
+
+        result = {'order_id': str(order['orderId'])}
+        exit_side = 'SELL' if data['action'].lower() == 'buy' else 'BUY'
+
+        def close_remaining(remaining: Decimal) -> Dict[str, Any]:
+            if remaining <= 0:
+                return dict(result, status='closed')
+            close = self._binance_call('orders',
+                                       'create_order',
+                                       symbol=symbol,
+                                       side=exit_side,
+                                       type='MARKET',
+                                       quantity=format(remaining, 'f'))
+            return dict(result,
+                        status='unwound',
+                        close_order_id=str(close['orderId']),
+                        closed_units=float(remaining))
+
+        if order['status'] in ('NEW', 'PARTIALLY_FILLED'):
+            if mode == 'unwind':
+                # The cancel response reports what filled before it landed
+                cancelled = self._binance_call('orders',
+                                               'cancel_order',
+                                               symbol=symbol,
+                                               orderId=order['orderId'])
+                executed = Decimal(cancelled['executedQty'])
+                if not executed:
+                    return dict(result, status='cancelled')
+                return close_remaining(executed)
+            return dict(result, status='pending')
+        if order['status'] != 'FILLED':
+            return dict(result, status=order['status'].lower())
+
+        legs = {
+            leg: lookup(client_order_id + suffix)
+            for leg, suffix in (('sl', '-sl'), ('tp', '-tp'))
+        }
+
+        if mode == 'unwind':
+            # SL/TP fills have already closed part of the position, so only
+            # what is left is closed
+            remaining = Decimal(order['executedQty'])
+            for leg in legs.values():
+                if leg is None:
+                    continue
+                if leg['status'] in ('NEW', 'PARTIALLY_FILLED'):
+                    leg = self._binance_call('orders',
+                                             'cancel_order',
+                                             symbol=symbol,
+                                             orderId=leg['orderId'])
+                remaining -= Decimal(leg['executedQty'])
+            return close_remaining(remaining)
+
+        missing = [leg for leg, found in legs.items() if found is None]
+        if 'sl_pips' not in data or not missing:
+            return dict(result, status='success')
+        if mode != 'finish':
+            return dict(result, status='unprotected', missing=missing)
+
+        filled_price = float(order['cummulativeQuoteQty']) / float(
+            order['executedQty'])
+        sl_price, tp_price = self.calculate_sl_tp(filled_price,
+                                                  data['action'],
+                                                  float(data['sl_pips']),
+                                                  float(data['tp_pips']))
+        client_ids = self._binance_client_ids(data)
+        if 'sl' in missing:
+            self._binance_call('orders',
+                               'create_order',
+                               symbol=symbol,
+                               side=exit_side,
+                               type='STOP_LOSS_LIMIT',
+                               quantity=data['units'],
+                               price=str(sl_price),
+                               stopPrice=str(sl_price),
+                               timeInForce='GTC',
+                               **client_ids['sl'])
+        if 'tp' in missing:
+            self._binance_call('orders',
+                               'create_order',
+                               symbol=symbol,
+                               side=exit_side,
+                               type='LIMIT',
+                               quantity=data['units'],
+                               price=str(tp_price),
+                               timeInForce='GTC',
+                               **client_ids['tp'])
+        return dict(result, status='finished', placed=missing)
+
+    def cancel_order(self,
+                     symbol: str,
+                     order_id: str,
+                     exchange: Optional[str] = None) -> Dict[str, Any]:
+        """Cancel a resting order if it has not been filled yet"""
+        if self.paper:
+            return {'status': 'cancelled', 'order_id': order_id, 'paper': True}
+
+        try:
+            exchange = exchange or self.determine_exchange(symbol)
+            if exchange == 'oanda':
+                from oandapyV20.endpoints.orders import OrderCancel, OrderDetails
+                details = self._oanda_request(
+                    'orders',
+                    OrderDetails(self.oanda_account_id, orderID=order_id))
+                state = details['order']['state']
+                if state == 'FILLED':
+                    return {
+                        'status': 'filled',
+                        'order_id': order_id,
+                        'executed_units': abs(float(details['order']['units'])),
+                        'filled_price': float(details['order']['price'])
+                    }
+                if state != 'PENDING':
+                    return {'status': state.lower(), 'order_id': order_id}
+                response = self._oanda_request(
+                    'orders',
+                    OrderCancel(self.oanda_account_id, orderID=order_id))
+            else:
+                order = self._binance_call('orders',
+                                           'get_order',
+                                           symbol=symbol,
+                                           orderId=order_id)
+                if order['status'] not in ('NEW', 'PARTIALLY_FILLED'):
+                    return dict(self._binance_execution(order),
+                                status=order['status'].lower(),
+                                order_id=order_id)
+                response = self._binance_call('orders',
+                                              'cancel_order',
+                                              symbol=symbol,
+                                              orderId=order_id)
+                # A partially filled order keeps its filled part
+                return dict(self._binance_execution(response),
+                            status='cancelled',
+                            order_id=order_id,
+                            response=response)
+
+            return {
+                'status': 'cancelled',
+                'order_id': order_id,
+                'response': response
+            }
+        except Exception as e:
+            self.logger.error(f"Error cancelling order {order_id}: {str(e)}")
+            raise
+
+    @staticmethod
+    def _binance_execution(order: Dict[str, Any]) -> Dict[str, Any]:
+        """Executed quantity and average price of a Binance order"""
+        executed = float(order.get('executedQty', 0) or 0)
+        if not executed:
+            return {'executed_units': 0.0, 'filled_price': None}
+        quote = float(order.get('cummulativeQuoteQty', 0) or 0)
+        return {
+            'executed_units': executed,
+            'filled_price': quote / executed if quote else None
+        }
+
+    def close_trade(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Close a position opened by a previous signal.
+        Oanda closes the trade by ID; Binance sends an opposite market order
+        (tagged with data['client_order_id'] when given) and cancels any
+        SL/TP orders left behind.
+        """
+        try:
+            symbol = data['symbol']
+            exchange = data.get('exchange') or self.determine_exchange(symbol)
+            if self.paper:
+                return {
+                    'status': 'closed',
+                    'exchange': exchange,
+                    'paper': True,
+                    'trade_id': data.get('trade_id'),
+                    'filled_price': float(data.get('price') or 1.0)
+                }
+            if exchange == 'oanda':
+                from oandapyV20.endpoints.trades import TradeClose
+                response = self._oanda_request(
+                    'trades',
+                    TradeClose(self.oanda_account_id,
+                               tradeID=data['trade_id']))
+                return {
+                    'status': 'closed',
+                    'exchange': 'oanda',
+                    'trade_id': data['trade_id'],
+                    'order': response
+                }
+
+            from binance.exceptions import BinanceAPIException
+            for order_id in data.get('cancel_order_ids', []):
+                try:
+                    self._binance_call('orders',
+                                       'cancel_order',
+                                       symbol=symbol,
+                                       orderId=order_id)
+                except BinanceAPIException as e:
+                    # Already filled or cancelled
+                    self.logger.info(
+                        f"Could not cancel Binance order {order_id}: {str(e)}")
+
+            client_id = ({
+                'newClientOrderId': data['client_order_id']
+            } if data.get('client_order_id') else {})
+            order = self._binance_call(
+                'orders',
+                'create_order',
+                symbol=symbol,
+                side='SELL' if data['action'].lower() == 'buy' else 'BUY',
+                type='MARKET',
+                quantity=data['units'],
+                **client_id)
+            return {'status': 'closed', 'exchange': 'binance', 'order': order}
+
+        except Exception as e:
+            self.logger.error(f"Error closing trade for {data.get('symbol')}: "
+                              f"{str(e)}")
+            raise
+
+    def find_close_order(self,
+                         data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Look up the Binance market order sent by close_trade() through its
+        client order id. Returns None if the broker never received it.
+        """
+        from binance.exceptions import BinanceAPIException
+        try:
+            return self._binance_call(
+                'orders',
+                'get_order',
+                symbol=data['symbol'],
+                origClientOrderId=data['client_order_id'])
+        except BinanceAPIException as e:
+            if e.code == -2013:  # Order does not exist
+                return None
+            self.logger.error(f"Error looking up close order for "
+                              f"{data['symbol']}: {str(e)}")
+            raise
+
     def calculate_sl_tp(self, price: float, action: str, sl_pips: float,
                         tp_pips: float) -> Tuple[float, float]:
         """Calculate stop loss and take profit prices"""
@@ -204,13 +829,20 @@ class MultiExchangeHandler:
 
     def get_oanda_account_summary(self) -> Dict:
         """Get Oanda account summary using proper endpoint"""
+        from oandapyV20.endpoints.accounts import AccountSummary
+        from oandapyV20.endpoints.positions import OpenPositions
+
         try:
             # Use proper endpoint objects
             account_summary = AccountSummary(self.oanda_account_id)
-            summary_response = self.oanda_api.request(account_summary)
+            summary_response = self._oanda_request('accounts',
+                                                  account_summary,
+                                                  hedge=True)
 
             positions = OpenPositions(accountID=self.oanda_account_id)
-            positions_response = self.oanda_api.request(positions)
+            positions_response = self._oanda_request('positions',
+                                                    positions,
+                                                    hedge=True)
 
             return {
                 'balance':
@@ -228,11 +860,27 @@ class MultiExchangeHandler:
             self.logger.error(f"Error getting Oanda account summary: {str(e)}")
             raise
 
+    def get_binance_positions(self) -> Dict[str, float]:
+        """
+        Spot holdings as positions in their USDT pair (e.g. BTC as
+        BTCUSDT), the symbol form signals use
+        """
+        account = self._binance_call('account', 'get_account', hedge=True)
+        positions = {}
+        for balance in account['balances']:
+            total = float(balance['free']) + float(balance['locked'])
+            if total and balance['asset'] != 'USDT':
+                positions[f"{balance['asset']}USDT"] = total
+        return positions
+
     def get_binance_account_summary(self) -> Dict:
         """Get Binance account summary with proper error handling"""
+        from binance.exceptions import BinanceAPIException
+
         try:
             # Get account info
-            account = self.binance_client.get_account()
+            account = self._binance_call('account', 'get_account',
+                                         hedge=True)
 
             # Calculate total USDT value
             total_value_usdt = 0
@@ -249,7 +897,10 @@ class MultiExchangeHandler:
                         value_usdt = total
                     else:
                         try:
-                            ticker = self.binance_client.get_symbol_ticker(
+                            ticker = self._binance_call(
+                                'ticker',
+                                'get_symbol_ticker',
+                                hedge=True,
                                 symbol=f"{asset}USDT")
                             price_usdt = float(ticker['price'])
                             value_usdt = total * price_usdt
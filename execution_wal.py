@@ -0,0 +1,203 @@
+"""
+Execution Write-Ahead Log
+Crash-safe record of execution intents so a process that dies between
+placing an order and protecting it (SL/TP) can be repaired on restart.
+
+Every signal executed on an account writes three kinds of records:
+
+- intent: the order about to be sent, written and fsynced before the
+  broker sees it. Its id doubles as the broker client order id.
+- step: broker-side progress (entry filled, order resting, SL/TP placed),
+  appended without waiting; recovery reconciles against the broker by
+  client order id, so a lost step only costs a broker lookup.
+- outcome: the final status, after which the intent is complete.
+
+Appends are group-committed: a single writer thread drains every record
+queued since its last write and covers them all with one fsync, so
+concurrent signals share the cost of a disk flush. On startup the log is
+compacted to its incomplete intents, which the recovery pass then finishes
+or unwinds against broker state.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+INTENT = 'intent'
+STEP = 'step'
+OUTCOME = 'outcome'
+
+
+class _Commit:
+    __slots__ = ('done', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error: Optional[Exception] = None
+
+
+class ExecutionWAL:
+    """Group-committed JSON Lines log of execution intents"""
+
+    def __init__(self,
+                 path: Optional[Path] = None,
+                 fsync: Optional[bool] = None):
+        self.path = Path(path or os.getenv('EXECUTION_WAL',
+                                           'execution_wal.jsonl'))
+        self.fsync = fsync if fsync is not None else os.getenv(
+            'WAL_FSYNC', 'true').lower() == 'true'
+        # Longest a caller waits for its record to be committed
+        self.commit_timeout = float(os.getenv('WAL_COMMIT_TIMEOUT', 5))
+
+        self._cond = threading.Condition()
+        self._queue: List = []
+        self._file = None
+        self._thread: Optional[threading.Thread] = None
+        # Steps of intents started by this process, for failure handling
+        self._open: Dict[str, List[Dict[str, Any]]] = {}
+
+    def _start_writer(self) -> None:
+        # Held open for the life of the process by the writer thread
+        self._file = open(self.path, 'a', encoding='utf-8')  # noqa: SIM115
+        self._thread = threading.Thread(target=self._run,
+                                        name='execution-wal',
+                                        daemon=True)
+        self._thread.start()
+
+    def _append(self, record: Dict[str, Any], wait: bool) -> None:
+        record['ts'] = time.time()
+        line = json.dumps(record, default=str) + '\n'
+        commit = _Commit() if wait else None
+        with self._cond:
+            if self._thread is None:
+                self._start_writer()
+            self._queue.append((line, commit))
+            self._cond.notify()
+
+        if commit is not None:
+            if not commit.done.wait(self.commit_timeout):
+                raise TimeoutError(
+                    f"Execution WAL commit timed out after {self.commit_timeout}s")
+            if commit.error is not None:
+                raise commit.error
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                batch, self._queue = self._queue, []
+
+            start = time.perf_counter()
+            error = None
+            try:
+                self._file.write(''.join(line for line, _ in batch))
+                self._file.flush()
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+            except Exception as e:
+                # Fail this batch's waiters but keep the writer alive
+                error = e
+                logger.error(f"Execution WAL write failed: {str(e)}")
+
+            metrics.observe('wal_commit_seconds', time.perf_counter() - start)
+            metrics.observe('wal_batch_records', len(batch))
+            for _, commit in batch:
+                if commit is not None:
+                    commit.error = error
+                    commit.done.set()
+
+    def begin(self, account: str, data: Dict[str, Any]) -> str:
+        """Durably record an intent before any order is sent"""
+        intent_id = uuid.uuid4().hex
+        self._open[intent_id] = []
+        self._append(
+            {
+                'type': INTENT,
+                'id': intent_id,
+                'account': account,
+                'data': data
+            },
+            wait=True)
+        return intent_id
+
+    def step(self, intent_id: str, step: str, **fields: Any) -> None:
+        """
+        Record broker-side progress of an intent. Not waited on: only the
+        intent record must be durable before the order is sent.
+        """
+        record = {'type': STEP, 'id': intent_id, 'step': step}
+        record.update(fields)
+        if intent_id in self._open:
+            self._open[intent_id].append(record)
+        self._append(record, wait=False)
+
+    def steps(self, intent_id: str) -> List[Dict[str, Any]]:
+        return list(self._open.get(intent_id, ()))
+
+    def finish(self, intent_id: str, status: str, **fields: Any) -> None:
+        """
+        Record an intent's outcome. Not waited on: if it is lost in a crash
+        the recovery pass re-checks the intent, which is idempotent.
+        """
+        self._open.pop(intent_id, None)
+        record = {'type': OUTCOME, 'id': intent_id, 'status': status}
+        record.update(fields)
+        self._append(record, wait=False)
+
+    def incomplete(self) -> List[Dict[str, Any]]:
+        """Intents in the log without an outcome, oldest first"""
+        if not self.path.exists():
+            return []
+
+        intents: Dict[str, Dict[str, Any]] = {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write
+                    logger.warning("Skipping corrupt execution WAL record")
+                    continue
+
+                if record['type'] == INTENT:
+                    record['steps'] = []
+                    intents[record['id']] = record
+                elif record['id'] in intents:
+                    if record['type'] == STEP:
+                        intents[record['id']]['steps'].append(record)
+                    else:
+                        del intents[record['id']]
+        return list(intents.values())
+
+    def compact(self) -> List[Dict[str, Any]]:
+        """
+        Rewrite the log keeping only incomplete intents and return them.
+        Must run before the first append (i.e. at startup).
+        """
+        if self._thread is not None:
+            raise RuntimeError("Execution WAL can only be compacted at startup")
+
+        intents = self.incomplete()
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for intent in intents:
+                records = [{
+                    key: value
+                    for key, value in intent.items() if key != 'steps'
+                }] + intent['steps']
+                for record in records:
+                    f.write(json.dumps(record, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        return intents
@@ -0,0 +1,60 @@
+"""
+Trade Journal
+Append-only JSON Lines record of trading events (fills, risk decisions,
+errors) so every order and every blocked signal can be audited later.
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TradeJournal:
+    """Thread-safe JSON Lines journal"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path or Path(os.getenv('TRADE_JOURNAL',
+                                           'trade_journal.jsonl'))
+        self._lock = threading.Lock()
+
+    def record(self, event: str, **fields: Any) -> Dict[str, Any]:
+        """Append an event to the journal and return the written entry"""
+        entry = {'timestamp': datetime.now().isoformat(), 'event': event}
+        entry.update(fields)
+        line = json.dumps(entry, default=str)
+
+        try:
+            with self._lock, open(self.path, 'a') as f:
+                f.write(line + '\n')
+        except Exception as e:
+            # Journaling must never take down trade execution
+            logger.error(f"Error writing trade journal: {str(e)}")
+        return entry
+
+    def read(self, event: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over journal entries, optionally filtered by event type"""
+        if not self.path.exists():
+            return
+
+        with open(self.path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping corrupt journal line: {line}")
+                    continue
+                if event is None or entry.get('event') == event:
+                    yield entry
+
+
+# Shared journal used across the application
+journal = TradeJournal()
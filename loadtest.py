@@ -0,0 +1,819 @@
+"""
+Load Test
+Replays synthetic or recorded signal mixes against a running server and
+reports latency percentiles and histogram, an error breakdown and the
+server's CPU and memory use over the run.
+
+Two ways to drive load:
+
+- Open loop (--rate): every connection sends on a fixed schedule, and
+  latency is measured from the time each request was due to be sent, not
+  from when it was actually sent. A stalled server therefore shows up in
+  the results instead of silently slowing the client down (coordinated
+  omission).
+- Closed loop (--concurrency only): each connection sends its next signal
+  as soon as the previous one returns. The raw service times are corrected
+  afterwards by back-filling the requests a stalled connection could not
+  send, one per expected interval (--expected-interval-ms, default the
+  median service time).
+
+The server must be running with PAPER_TRADING=true; the tool checks this
+before sending anything unless --allow-live is given. --start-server starts
+a paper-mode server with its journal, execution log, scheduler database
+and debug log in a temporary directory, and stops it afterwards.
+
+Usage:
+    python loadtest.py --start-server --rate 100 --duration 30
+    python loadtest.py --concurrency 16 --requests 5000 --mix forex_sltp=3,crypto=1
+    python loadtest.py --replay trade_journal.jsonl --rate 50 --json results.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import secrets
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from webhook_auth import sign_request
+
+# Synthetic signals, as sent by TradingView alerts
+SIGNAL_MIXES = {
+    'forex': {
+        "strategy": "MA_Cross",
+        "action": "buy",
+        "symbol": "EUR_USD",
+        "risk": 1,
+        "units": 100
+    },
+    'forex_sltp': {
+        "strategy": "MA_Cross",
+        "action": "buy",
+        "symbol": "EUR_USD",
+        "risk": 1,
+        "units": 100,
+        "tp_pips": 60,
+        "sl_pips": 30
+    },
+    'crypto': {
+        "strategy": "Crypto_Breakout",
+        "action": "buy",
+        "symbol": "BTCUSDT",
+        "risk": 1,
+        "units": 0.001
+    },
+    'crypto_sltp': {
+        "strategy": "Crypto_Breakout",
+        "action": "buy",
+        "symbol": "BTCUSDT",
+        "risk": 1,
+        "units": 0.001,
+        "tp_pips": 50,
+        "sl_pips": 30
+    }
+}
+
+DEFAULT_MIX = 'forex=1,forex_sltp=1,crypto=1,crypto_sltp=1'
+
+# Distinct request bodies generated up front and cycled through
+BODY_POOL_SIZE = 1000
+
+PERCENTILES = (50, 75, 90, 99, 99.9, 99.99, 100)
+
+# Fields that only make sense for the original request of a recording
+REPLAY_DROPPED_FIELDS = ('secret', 'execute_at', 'delay_minutes')
+
+
+# ===============================
+# Latency Histogram
+# ===============================
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of microsecond latencies in the style of
+    HdrHistogram: 128 linear sub-buckets per power of two keep every
+    recorded value within 1% of its true value at any magnitude.
+    """
+
+    SUB_BUCKET_BITS = 7
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.max = 0
+        self.sum = 0
+
+    def _lowest_equivalent(self, value: int) -> int:
+        shift = max(value.bit_length() - self.SUB_BUCKET_BITS, 0)
+        return (value >> shift) << shift
+
+    def _highest_equivalent(self, value: int) -> int:
+        shift = max(value.bit_length() - self.SUB_BUCKET_BITS, 0)
+        return value + (1 << shift) - 1
+
+    def record(self, value_us: int, count: int = 1) -> None:
+        value_us = max(int(value_us), 0)
+        key = self._lowest_equivalent(value_us)
+        self.counts[key] = self.counts.get(key, 0) + count
+        self.total += count
+        self.sum += value_us * count
+        self.max = max(self.max, value_us)
+
+    def record_corrected(self, value_us: int, expected_interval_us: int,
+                         count: int = 1) -> None:
+        """
+        Record a value and back-fill the samples a stalled closed-loop client
+        would have recorded had it kept sending every expected interval.
+        """
+        self.record(value_us, count)
+        if expected_interval_us <= 0:
+            return
+        missing = value_us - expected_interval_us
+        while missing >= expected_interval_us:
+            self.record(missing, count)
+            missing -= expected_interval_us
+
+    def corrected(self, expected_interval_us: int) -> 'LatencyHistogram':
+        """Copy of this histogram corrected for coordinated omission"""
+        result = LatencyHistogram()
+        for value, count in self.counts.items():
+            result.record_corrected(value, expected_interval_us, count)
+        return result
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        for value, count in other.counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percentile: float) -> int:
+        if not self.total:
+            return 0
+        target = max(1, -(-self.total * percentile // 100))
+        seen = 0
+        for value in sorted(self.counts):
+            seen += self.counts[value]
+            if seen >= target:
+                return min(self._highest_equivalent(value), self.max)
+        return self.max
+
+    def mean(self) -> float:
+        return self.sum / self.total if self.total else 0.0
+
+    def distribution(self) -> List[Tuple[int, int]]:
+        """Counts per power-of-two bucket, as (upper bound us, count)"""
+        buckets: Counter = Counter()
+        for value, count in self.counts.items():
+            buckets[1 << max(value.bit_length(), 1)] += count
+        return sorted(buckets.items())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.total,
+            'mean_ms': round(self.mean() / 1000, 3),
+            'percentiles_ms': {
+                str(p): round(self.percentile(p) / 1000, 3)
+                for p in PERCENTILES
+            },
+            'distribution': [{
+                'le_ms': upper / 1000,
+                'count': count
+            } for upper, count in self.distribution()]
+        }
+
+
+# ===============================
+# Signals
+# ===============================
+
+
+def parse_mix(spec: str) -> List[Tuple[str, float]]:
+    """Parse 'forex=3,crypto_sltp=1' into weighted signal kinds"""
+    mix = []
+    for part in spec.split(','):
+        name, _, weight = part.strip().partition('=')
+        if name not in SIGNAL_MIXES:
+            raise ValueError(f"Unknown signal kind '{name}', expected one of "
+                             f"{', '.join(SIGNAL_MIXES)}")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+def load_replay(path: str) -> List[Dict[str, Any]]:
+    """
+    Read recorded signals: a trade journal (its signal_executed events),
+    a JSON Lines file of payloads or a JSON array of payloads.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    if text.lstrip().startswith('['):
+        records = json.loads(text)
+    else:
+        records = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    payloads = []
+    for record in records:
+        if 'event' in record:
+            if record['event'] != 'signal_executed':
+                continue
+            record = record['data']
+        payloads.append({
+            key: value
+            for key, value in record.items()
+            if key not in REPLAY_DROPPED_FIELDS
+        })
+    if not payloads:
+        raise ValueError(f"No signals found in {path}")
+    return payloads
+
+
+def build_bodies(payloads: List[Dict[str, Any]],
+                 weights: Optional[List[float]], count: int,
+                 rng: random.Random) -> List[bytes]:
+    """Pre-encode request bodies so the client spends no time on JSON"""
+    if weights is None:
+        # Recordings are replayed in order
+        return [
+            json.dumps(payloads[i % len(payloads)]).encode()
+            for i in range(max(count, len(payloads)))
+        ]
+
+    bodies = []
+    for payload in rng.choices(payloads, weights=weights, k=count):
+        payload = dict(payload)
+        # Alternate sides so paper positions do not only grow
+        payload['action'] = rng.choice(('buy', 'sell'))
+        bodies.append(json.dumps(payload).encode())
+    return bodies
+
+
+# ===============================
+# Load Generation
+# ===============================
+
+
+class WorkerResult:
+    """Measurements from one connection, merged once the run is over"""
+
+    def __init__(self):
+        self.service = LatencyHistogram()
+        self.response = LatencyHistogram()
+        self.statuses: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.sent = 0
+
+
+class LoadRunner:
+    """Sends pre-built webhook bodies over persistent connections"""
+
+    def __init__(self, url: str, bodies: List[bytes], secret: Optional[str],
+                 sign: bool, timeout: float):
+        parts = urlsplit(url)
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.https = parts.scheme == 'https'
+        self.path = (parts.path.rstrip('/') or '') + '/webhook'
+        self.bodies = bodies
+        self.secret = secret
+        self.sign = sign
+        self.timeout = timeout
+        self._next_body = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> http.client.HTTPConnection:
+        cls = (http.client.HTTPSConnection
+               if self.https else http.client.HTTPConnection)
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def _take_body(self) -> bytes:
+        with self._lock:
+            body = self.bodies[self._next_body % len(self.bodies)]
+            self._next_body += 1
+        return body
+
+    def _headers(self, body: bytes) -> Dict[str, str]:
+        headers = {'Content-Type': 'application/json'}
+        if self.secret and self.sign:
+            headers.update(
+                sign_request(self.secret, body, nonce=secrets.token_hex(8)))
+        elif self.secret:
+            headers['X-Webhook-Secret'] = self.secret
+        return headers
+
+    def _send(self, conn: http.client.HTTPConnection,
+              result: WorkerResult) -> http.client.HTTPConnection:
+        """Send one signal; returns the connection to use next"""
+        body = self._take_body()
+        result.sent += 1
+        try:
+            conn.request('POST', self.path, body, self._headers(body))
+            response = conn.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            result.errors[f"{type(e).__name__}: {str(e)[:60]}"] += 1
+            conn.close()
+            return self._connect()
+
+        result.statuses[response.status] += 1
+        if response.status >= 400:
+            try:
+                message = json.loads(payload).get('error', '')
+            except (ValueError, AttributeError):
+                message = payload[:60].decode(errors='replace')
+            result.errors[f"HTTP {response.status}: {str(message)[:60]}"] += 1
+        return conn
+
+    def run_open_loop(self, rate: float, connections: int,
+                      deadline: Optional[float],
+                      total: Optional[int]) -> List[WorkerResult]:
+        """
+        Each connection owns every Nth slot of a fixed-rate schedule and
+        measures latency from the slot's intended send time.
+        """
+        start = time.perf_counter() + 0.05
+
+        def worker(index: int, result: WorkerResult) -> None:
+            conn = self._connect()
+            slot = index
+            while total is None or slot < total:
+                intended = start + slot / rate
+                # Stop at the deadline even if behind; the slots left unsent
+                # are reported as missed
+                if deadline is not None and max(
+                        intended, time.perf_counter()) >= start + deadline:
+                    break
+                delay = intended - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                sent_at = time.perf_counter()
+                conn = self._send(conn, result)
+                done = time.perf_counter()
+                result.service.record((done - sent_at) * 1e6)
+                result.response.record((done - intended) * 1e6)
+                slot += connections
+            conn.close()
+
+        return self._run_workers(worker, connections)
+
+    def run_closed_loop(self, concurrency: int, deadline: Optional[float],
+                        total: Optional[int]) -> List[WorkerResult]:
+        """Each connection sends its next signal when the last one returns"""
+        start = time.perf_counter()
+        counter = iter(range(total)) if total is not None else None
+        counter_lock = threading.Lock()
+
+        def claim() -> bool:
+            if deadline is not None and time.perf_counter() - start >= deadline:
+                return False
+            if counter is None:
+                return True
+            with counter_lock:
+                return next(counter, None) is not None
+
+        def worker(_: int, result: WorkerResult) -> None:
+            conn = self._connect()
+            while claim():
+                sent_at = time.perf_counter()
+                conn = self._send(conn, result)
+                result.service.record((time.perf_counter() - sent_at) * 1e6)
+            conn.close()
+
+        return self._run_workers(worker, concurrency)
+
+    def _run_workers(self, worker, count: int) -> List[WorkerResult]:
+        results = [WorkerResult() for _ in range(count)]
+        threads = [
+            threading.Thread(target=worker,
+                             args=(index, results[index]),
+                             name=f'loadtest-{index}',
+                             daemon=True) for index in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+
+# ===============================
+# Server
+# ===============================
+
+
+def http_get(url: str, path: str, timeout: float = 5) -> Tuple[int, bytes]:
+    parts = urlsplit(url)
+    cls = (http.client.HTTPSConnection
+           if parts.scheme == 'https' else http.client.HTTPConnection)
+    conn = cls(parts.hostname, parts.port, timeout=timeout)
+    try:
+        conn.request('GET', (parts.path.rstrip('/') or '') + path)
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+def parse_metrics(text: str) -> Dict[str, float]:
+    """Unlabelled series from Prometheus text, e.g. process_* gauges"""
+    values = {}
+    for line in text.splitlines():
+        if line.startswith('#') or '{' in line:
+            continue
+        name, _, value = line.partition(' ')
+        try:
+            values[name] = float(value)
+        except ValueError:
+            continue
+    return values
+
+
+class ResourceSampler:
+    """Polls the server's /metrics for process CPU, memory and threads"""
+
+    def __init__(self, url: str, interval: float):
+        self.url = url
+        self.interval = interval
+        self.samples: List[Tuple[float, Dict[str, float]]] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run,
+                                        name='loadtest-sampler',
+                                        daemon=True)
+
+    def sample(self) -> None:
+        try:
+            status, body = http_get(self.url, '/metrics')
+        except OSError:
+            return
+        if status == 200:
+            self.samples.append(
+                (time.perf_counter(), parse_metrics(body.decode())))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self) -> None:
+        self.sample()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+    def summary(self) -> Dict[str, Any]:
+        if len(self.samples) < 2:
+            return {}
+        (start, first), (end, last) = self.samples[0], self.samples[-1]
+
+        def peak(name: str) -> Optional[float]:
+            values = [s[name] for _, s in self.samples if name in s]
+            return max(values) if values else None
+
+        summary: Dict[str, Any] = {'samples': len(self.samples)}
+        if 'process_cpu_seconds' in first:
+            cpu = last['process_cpu_seconds'] - first['process_cpu_seconds']
+            summary['cpu_seconds'] = round(cpu, 3)
+            summary['cpu_percent'] = round(100 * cpu / (end - start), 1)
+        for name in ('process_resident_memory_bytes',
+                     'process_max_resident_memory_bytes'):
+            if name in last:
+                summary[name.replace('process_', '')] = {
+                    'start': first.get(name),
+                    'end': last[name],
+                    'peak': peak(name)
+                }
+        for name in ('process_threads', 'process_open_fds'):
+            if name in last:
+                summary[f"peak_{name.replace('process_', '')}"] = peak(name)
+        for name in ('process_voluntary_context_switches',
+                     'process_involuntary_context_switches'):
+            if name in last and name in first:
+                summary[name.replace('process_', '')] = last[name] - first[name]
+        return summary
+
+
+def start_server(url: str, secret: str) -> Tuple[subprocess.Popen, str]:
+    """Start a paper-mode server with throwaway state and wait for it"""
+    state_dir = tempfile.mkdtemp(prefix='loadtest-')
+    env = dict(os.environ,
+               PAPER_TRADING='true',
+               WEBHOOK_SECRET=secret,
+               PORT=str(urlsplit(url).port or 80),
+               TRADE_JOURNAL=os.path.join(state_dir, 'trade_journal.jsonl'),
+               EXECUTION_WAL=os.path.join(state_dir, 'execution_wal.jsonl'),
+               SCHEDULER_DB=os.path.join(state_dir, 'scheduler.db'),
+               DEBUG_LOG=os.path.join(state_dir, 'debug_log.txt'))
+    server = subprocess.Popen(
+        [sys.executable,
+         os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True)
+
+    for _ in range(150):
+        try:
+            if http_get(url, '/', timeout=1)[0] == 200:
+                return server, state_dir
+        except OSError:
+            pass
+        if server.poll() is not None:
+            break
+        time.sleep(0.2)
+    stop_server(server)
+    raise RuntimeError(f"Server did not come up at {url}")
+
+
+def stop_server(server: subprocess.Popen) -> None:
+    # The Flask reloader runs the app in a child process; stop both
+    try:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait(timeout=10)
+    except ProcessLookupError:
+        pass
+    except subprocess.TimeoutExpired:
+        os.killpg(server.pid, signal.SIGKILL)
+
+
+# ===============================
+# Report
+# ===============================
+
+
+def format_histogram(name: str, histogram: LatencyHistogram) -> List[str]:
+    lines = [f"{name} latency ({histogram.total} samples, "
+             f"mean {histogram.mean() / 1000:.2f} ms)"]
+    for p in PERCENTILES:
+        label = 'max' if p == 100 else f"p{p:g}"
+        lines.append(f"  {label:>8} {histogram.percentile(p) / 1000:10.2f} ms")
+    return lines
+
+
+def format_distribution(histogram: LatencyHistogram) -> List[str]:
+    buckets = histogram.distribution()
+    if not buckets:
+        return []
+    widest = max(count for _, count in buckets)
+    lines = ['Latency distribution']
+    for upper, count in buckets:
+        bar = '#' * max(1, round(40 * count / widest))
+        lines.append(f"  <= {upper / 1000:9.2f} ms {count:8d} {bar}")
+    return lines
+
+
+def build_report(args: argparse.Namespace, results: List[WorkerResult],
+                 elapsed: float, expected_interval_us: Optional[int],
+                 resources: Dict[str, Any]) -> Dict[str, Any]:
+    service = LatencyHistogram()
+    response = LatencyHistogram()
+    statuses: Counter = Counter()
+    errors: Counter = Counter()
+    for result in results:
+        service.merge(result.service)
+        response.merge(result.response)
+        statuses.update(result.statuses)
+        errors.update(result.errors)
+
+    if args.rate:
+        # Measured from intended send times; already corrected
+        corrected = response
+    else:
+        if expected_interval_us is None:
+            expected_interval_us = service.percentile(50)
+        corrected = service.corrected(expected_interval_us)
+
+    sent = sum(result.sent for result in results)
+    scheduled = None
+    if args.rate:
+        scheduled = int(args.rate * args.duration) if args.duration else 0
+        if args.requests is not None:
+            scheduled = min(scheduled, args.requests) if scheduled else args.requests
+    return {
+        'mode': 'open' if args.rate else 'closed',
+        'target_rate': args.rate,
+        'connections': len(results),
+        'duration_seconds': round(elapsed, 3),
+        'requests': sent,
+        'missed': max(scheduled - sent, 0) if scheduled else 0,
+        'throughput': round(sent / elapsed, 1) if elapsed else 0,
+        'expected_interval_ms':
+        round(expected_interval_us / 1000, 3) if expected_interval_us else None,
+        'statuses': {str(k): v for k, v in sorted(statuses.items())},
+        'errors': dict(errors.most_common()),
+        'service': service,
+        'corrected': corrected,
+        'server': resources
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    mode = (f"open loop at {report['target_rate']:g}/s"
+            if report['mode'] == 'open' else 'closed loop')
+    lines = [
+        f"{report['requests']} requests in {report['duration_seconds']:.2f}s "
+        f"({report['throughput']:.1f}/s, {mode}, "
+        f"{report['connections']} connections)", ''
+    ]
+    if report['missed']:
+        lines[-1:] = [
+            f"{report['missed']} scheduled requests were never sent: the "
+            "server did not keep up with the target rate", ''
+        ]
+    lines += format_histogram('Service', report['service'])
+    lines.append('')
+    corrected_label = ('Response (from intended send time)'
+                       if report['mode'] == 'open' else
+                       f"Corrected (expected interval "
+                       f"{report['expected_interval_ms']:.2f} ms)")
+    lines += format_histogram(corrected_label, report['corrected'])
+    lines.append('')
+    lines += format_distribution(report['corrected'])
+    lines.append('')
+
+    lines.append('Status codes')
+    for status, count in report['statuses'].items():
+        lines.append(f"  {status:>6} {count:8d}")
+    if report['errors']:
+        lines.append('Errors')
+        for error, count in report['errors'].items():
+            lines.append(f"  {count:8d}  {error}")
+    lines.append('')
+
+    server = report['server']
+    if server:
+        lines.append('Server resources')
+        if 'cpu_seconds' in server:
+            lines.append(f"  CPU {server['cpu_seconds']:.2f}s "
+                         f"({server['cpu_percent']:.1f}% of one core)")
+        rss = server.get('resident_memory_bytes')
+        if rss:
+            lines.append(f"  RSS {rss['start'] / 2**20:.1f} MiB -> "
+                         f"{rss['end'] / 2**20:.1f} MiB "
+                         f"(peak {rss['peak'] / 2**20:.1f} MiB)")
+        if 'peak_threads' in server:
+            lines.append(f"  Peak threads {server['peak_threads']:.0f}")
+        if 'peak_open_fds' in server:
+            lines.append(f"  Peak open fds {server['peak_open_fds']:.0f}")
+        if 'involuntary_context_switches' in server:
+            lines.append(
+                f"  Context switches {server['voluntary_context_switches']:.0f} "
+                f"voluntary, {server['involuntary_context_switches']:.0f} "
+                "involuntary")
+    else:
+        lines.append('Server resources unavailable (no /metrics)')
+    print('\n'.join(lines))
+
+
+# ===============================
+# Entry Point
+# ===============================
+
+
+def parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[1],
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url',
+                        default=os.getenv('LOADTEST_URL',
+                                          'http://127.0.0.1:8080'))
+    parser.add_argument('--secret',
+                        default=os.getenv('WEBHOOK_SECRET'),
+                        help='webhook secret (default $WEBHOOK_SECRET)')
+    parser.add_argument('--sign',
+                        action='store_true',
+                        help='HMAC-sign requests instead of sending the secret')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--mix',
+                        default=DEFAULT_MIX,
+                        help=f"weighted synthetic signals, kinds: "
+                        f"{', '.join(SIGNAL_MIXES)} (default {DEFAULT_MIX})")
+    source.add_argument('--replay',
+                        help='trade journal, JSON Lines or JSON array of '
+                        'recorded signals to replay in order')
+    parser.add_argument('--rate',
+                        type=float,
+                        help='target requests/s (open loop)')
+    parser.add_argument('--concurrency',
+                        type=int,
+                        default=8,
+                        help='connections (default 8)')
+    parser.add_argument('--duration', type=float, help='seconds to run')
+    parser.add_argument('--requests', type=int, help='requests to send')
+    parser.add_argument('--expected-interval-ms',
+                        type=float,
+                        help='closed-loop correction interval '
+                        '(default: median service time)')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--sample-interval',
+                        type=float,
+                        default=1.0,
+                        help='seconds between /metrics samples')
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--start-server',
+                        action='store_true',
+                        help='start a paper-mode server for the run')
+    parser.add_argument('--allow-live',
+                        action='store_true',
+                        help='send signals even if the server is not in '
+                        'paper mode')
+    args = parser.parse_args(argv)
+
+    if args.duration is None and args.requests is None:
+        args.duration = 10.0
+    if args.rate is not None and args.rate <= 0:
+        parser.error('--rate must be positive')
+    if args.concurrency < 1:
+        parser.error('--concurrency must be at least 1')
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    rng = random.Random(args.seed)
+
+    if args.replay:
+        bodies = build_bodies(load_replay(args.replay), None, BODY_POOL_SIZE,
+                              rng)
+    else:
+        mix = parse_mix(args.mix)
+        bodies = build_bodies([SIGNAL_MIXES[name] for name, _ in mix],
+                              [weight for _, weight in mix], BODY_POOL_SIZE,
+                              rng)
+
+    server = None
+    if args.start_server:
+        args.secret = args.secret or secrets.token_hex(16)
+        server, state_dir = start_server(args.url, args.secret)
+        print(f"Started paper-mode server (pid {server.pid}, state in "
+              f"{state_dir})")
+
+    try:
+        try:
+            status, body = http_get(args.url, '/')
+        except OSError as e:
+            print(f"Server not reachable at {args.url}: {str(e)}",
+                  file=sys.stderr)
+            return 2
+        try:
+            paper = status == 200 and json.loads(body).get('paper_trading')
+        except (ValueError, AttributeError):
+            paper = False
+        if not paper and not args.allow_live:
+            print(
+                "Refusing to load-test a server that is not in paper mode; "
+                "start it with PAPER_TRADING=true or pass --allow-live",
+                file=sys.stderr)
+            return 2
+
+        runner = LoadRunner(args.url, bodies, args.secret, args.sign,
+                            args.timeout)
+        sampler = ResourceSampler(args.url, args.sample_interval)
+        sampler.start()
+
+        start = time.perf_counter()
+        expected_interval_us = None
+        if args.rate:
+            results = runner.run_open_loop(args.rate, args.concurrency,
+                                              args.duration, args.requests)
+        else:
+            results = runner.run_closed_loop(args.concurrency, args.duration,
+                                             args.requests)
+            if args.expected_interval_ms:
+                expected_interval_us = int(args.expected_interval_ms * 1000)
+        elapsed = time.perf_counter() - start
+        sampler.stop()
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    report = build_report(args, results, elapsed, expected_interval_us,
+                          sampler.summary())
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(dict(report,
+                           service=report['service'].to_dict(),
+                           corrected=report['corrected'].to_dict()),
+                      f,
+                      indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
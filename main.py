@@ -5,87 +5,180 @@ Supports both Forex (Oanda) and Crypto (Binance) trading.
 """
 
 # Standard library imports
-import json
 import os
-from datetime import datetime
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, time as dt_time
 from typing import Dict, Any, Tuple
 from collections import deque
+from functools import wraps
 from pathlib import Path
 
-from datetime import datetime, timedelta
 import pytz
 
 # Third-party imports
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 import logging
 
 # Local imports
-from exchange_handler import MultiExchangeHandler
+from accounts import DEFAULT_ACCOUNT, AccountRegistry
+from admission import ENTRY, EXIT, AdmissionController, AdmissionRejected
+from analytics import PerformanceAnalytics
+from circuit_breaker import breakers
+from execution_wal import ExecutionWAL
+from journal import journal
+from metrics import metrics, process_stats
+from recent_logs import RecentLogHandler
+from response_cache import CachedEndpoint
+from risk_engine import RiskCheckFailed, RiskEngine
+from scheduler import ActionScheduler
+from sharded_executor import ShardedExecutor
+from signal_schema import Signal, SignalValidationError, decode_payload
+from strategy_config import StrategyTable
+from webhook_auth import AUTHENTICATED, DEFERRED, REJECTED, WebhookAuthenticator
 
 # ===============================
 # Configuration and Setup
 # ===============================
 
-# Configure logging
+# Configure logging; the last lines are also kept in memory for /logs
+DEBUG_LOG = Path(os.getenv('DEBUG_LOG', 'debug_log.txt'))
+recent_log_handler = RecentLogHandler(DEBUG_LOG)
 logging.basicConfig(
     level=logging.DEBUG,
     format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[logging.FileHandler("debug_log.txt"),
-              logging.StreamHandler()])
+    handlers=[logging.FileHandler(DEBUG_LOG),
+              logging.StreamHandler(), recent_log_handler])
 logger = logging.getLogger(__name__)
 
-# Initialize Flask app
+# Initialize Flask app; signals are tiny, so refuse oversized bodies outright
 app = Flask(__name__)
+app.config['MAX_CONTENT_LENGTH'] = int(
+    os.getenv('WEBHOOK_MAX_BODY_BYTES', 64 * 1024))
 
-# Initialize exchange handler
-exchange_handler = MultiExchangeHandler()
+# Webhook authentication with the secret cached at startup
+webhook_authenticator = WebhookAuthenticator()
+
+# Headers that must never be written to the logs
+SENSITIVE_HEADERS = {'x-webhook-secret', 'x-signature', 'authorization'}
+
+# Initialize trading accounts; the default account backs /monitor and
+# any signal that does not target an account group. Broker clients are
+# created lazily, so this makes no network calls.
+account_registry = AccountRegistry.from_config()
+
+# Pre-trade risk checks run against cached state for every account
+risk_engine = RiskEngine.from_config()
+account_registry.risk_engine = risk_engine
+
+# Crash-safe log of execution intents; incomplete ones are recovered when
+# the background workers start
+execution_wal = ExecutionWAL()
+account_registry.wal = execution_wal
+
+# Running performance analytics, backfilled once from the trade journal and
+# then updated incrementally on every fill
+performance_analytics = PerformanceAnalytics()
+journaled_fills = list(journal.read('order_filled'))
+performance_analytics.recompute(journaled_fills)
+account_registry.analytics = performance_analytics
+
+# Restore positions and today's P&L so risk limits hold across restarts
+risk_engine.state.seed_from_fills(journaled_fills)
+exchange_handler = account_registry.get_handler()
+
+# Bounded, prioritized admission for webhook executions
+admission_controller = AdmissionController()
+
+# Per-strategy defaults and routing, reloaded when strategies.json changes
+strategy_table = StrategyTable()
 
 # Initialize storage for recent activity
 MAX_HISTORY_SIZE = 50
 recent_webhooks = deque(maxlen=MAX_HISTORY_SIZE)
 recent_trades = deque(maxlen=MAX_HISTORY_SIZE)
 
+# Restore recent activity so a restart does not blank the dashboard
+for entry in journal.read('signal_executed'):
+    recent_webhooks.append({
+        'timestamp': entry['timestamp'],
+        'data': entry['data']
+    })
+    recent_trades.append({
+        'timestamp': entry['timestamp'],
+        'details': entry['details']
+    })
+
 # ===============================
 # Helper Functions
 # ===============================
 
 
-def initialize_log_file(log_path: Path) -> list:
-    """Initialize or read from log file"""
-    try:
-        if not log_path.exists():
-            with open(log_path, 'w') as f:
-                init_message = f"{datetime.now().isoformat()} - Log file initialized\n"
-                f.write(init_message)
-            return ["Log file initialized"]
-
-        with open(log_path, 'r') as f:
-            all_logs = [line.strip() for line in f.readlines() if line.strip()]
-            return all_logs[-20:] if all_logs else ["No logs available"]
-    except Exception as e:
-        logger.error(f"Error handling log file: {str(e)}")
-        return [f"Error reading logs: {str(e)}"]
-
-
 def validate_webhook_data(data: Dict) -> Tuple[bool, str]:
-    """Validate incoming webhook data"""
-    # Verify secret
-    if data.get('secret') != os.getenv('WEBHOOK_SECRET'):
+    """
+    Authenticate webhook data that carries its secret in the JSON body.
+    Field types and required fields are enforced by the Signal schema.
+    """
+    if not webhook_authenticator.check_body_secret(data.get('secret')):
         return False, "Unauthorized"
 
-    # Check required fields
-    required_fields = ['action', 'symbol', 'risk']
-    for field in required_fields:
-        if field not in data:
-            return False, f"Missing required field: {field}"
-
     return True, ""
 
 
+def require_auth(view):
+    """
+    Guard a management route with the webhook authenticator. Accepts a
+    signature or X-Webhook-Secret header, or a JSON body secret.
+    """
+
+    @wraps(view)
+    def authenticated_view(*args, **kwargs):
+        auth_status, auth_error = webhook_authenticator.check_headers(
+            request.headers, request.get_data())
+        if auth_status == DEFERRED:
+            payload = request.get_json(silent=True)
+            if not isinstance(payload, dict) or not validate_webhook_data(
+                    payload)[0]:
+                auth_status, auth_error = REJECTED, 'bad_secret'
+        if auth_status == REJECTED:
+            logger.warning(
+                f"{request.path} authentication failed: {auth_error}")
+            return jsonify({'error': 'Unauthorized'}), 401
+        return view(*args, **kwargs)
+
+    return authenticated_view
+
+
+def signal_lane(signal: Signal) -> str:
+    """
+    Classify a signal as an exit or an entry for admission priority.
+    An explicit 'intent' wins; otherwise a signal that reduces the cached
+    position of the default account is treated as an exit.
+    """
+    if signal.intent is not None:
+        return EXIT if signal.intent == 'exit' else ENTRY
+
+    position = risk_engine.state.position(DEFAULT_ACCOUNT, signal.symbol)
+    is_buy = signal.action == 'buy'
+    return EXIT if position and (position > 0) != is_buy else ENTRY
+
+
+def redact_headers(headers) -> Dict[str, str]:
+    """Return request headers with credentials masked for logging"""
+    return {
+        key: '***' if key.lower() in SENSITIVE_HEADERS else value
+        for key, value in headers.items()
+    }
+
 
-def is_forex_market_open() -> tuple[bool, datetime | None]:
+
+def is_forex_market_open(
+        at: datetime | None = None) -> tuple[bool, datetime | None]:
     """
     Check if forex market is open and calculate next open time if closed.
+    Checks the current time unless an aware datetime is given.
     Returns tuple of (is_open: bool, next_open: datetime | None)
 
     Forex Market Hours (EST):
@@ -95,7 +188,7 @@ def is_forex_market_open() -> tuple[bool, datetime | None]:
     """
     # Get current time in EST
     est = pytz.timezone('US/Eastern')
-    now = datetime.now(est)
+    now = at.astimezone(est) if at else datetime.now(est)
 
     # Get current weekday (0 = Monday, 6 = Sunday)
     weekday = now.weekday()
@@ -193,6 +286,442 @@ def get_trading_session(time: datetime) -> str:
     return ' & '.join(sessions) if sessions else 'No active session'
 
 
+# Session open hours (EST), matching get_trading_session()
+SESSION_OPEN_HOURS = {'sydney': 17, 'tokyo': 19, 'london': 3, 'new_york': 8}
+
+
+def get_next_session_open(session: str,
+                          after: datetime | None = None) -> datetime:
+    """
+    Get the next time a trading session opens while the forex market is open,
+    e.g. the next London open skips Saturday and Sunday mornings.
+    """
+    est = pytz.timezone('US/Eastern')
+    after = after.astimezone(est) if after else datetime.now(est)
+    open_hour = SESSION_OPEN_HOURS[session]
+
+    for days in range(8):
+        day = after.date() + timedelta(days=days)
+        candidate = est.localize(datetime.combine(day, dt_time(open_hour)))
+        if candidate > after and is_forex_market_open(candidate)[0]:
+            return candidate
+
+    raise ValueError(f"No upcoming open found for session: {session}")
+
+
+def resolve_execute_at(spec: str) -> datetime:
+    """
+    Resolve a signal's execute_at value to an aware datetime.
+    Accepts 'next_open', '<session>_open' (e.g. 'london_open') or an ISO
+    timestamp; naive timestamps are treated as UTC.
+    """
+    key = spec.lower().replace(' ', '_')
+    if key == 'next_open':
+        is_open, next_open = is_forex_market_open()
+        return datetime.now(pytz.utc) if is_open else next_open
+
+    if key.endswith('_open') and key[:-5] in SESSION_OPEN_HOURS:
+        return get_next_session_open(key[:-5])
+
+    try:
+        when = datetime.fromisoformat(spec)
+    except ValueError:
+        raise ValueError(f"Invalid execute_at: {spec}") from None
+    return pytz.utc.localize(when) if when.tzinfo is None else when
+
+
+def schedule_signal(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Persist a deferred signal for execution by the scheduler"""
+    data = dict(data)
+    if 'execute_at' in data:
+        execute_at = resolve_execute_at(data.pop('execute_at'))
+    else:
+        execute_at = datetime.now(pytz.utc) + timedelta(
+            minutes=data.pop('delay_minutes'))
+
+    if execute_at.timestamp() < time.time() - 1:
+        raise ValueError(f"execute_at is in the past: {execute_at.isoformat()}")
+
+    action_id = action_scheduler.schedule('execute_signal',
+                                          execute_at.timestamp(), data)
+    return {
+        'status': 'scheduled',
+        'action_id': action_id,
+        'execute_at': execute_at.isoformat()
+    }
+
+
+def schedule_follow_ups(account: str, data: Dict[str, Any],
+                        result: Dict[str, Any]) -> None:
+    """Schedule cancel-if-unfilled and time-based exit actions for a fill"""
+    now = time.time()
+
+    if result.get('status') == 'pending' and 'cancel_after_minutes' in data:
+        action_scheduler.schedule(
+            'cancel_order', now + data['cancel_after_minutes'] * 60, {
+                'account': account,
+                'symbol': data['symbol'],
+                'action': data['action'],
+                'strategy': data.get('strategy'),
+                'order_id': result['order_id'],
+                'exchange': result.get('exchange')
+            })
+
+    if result.get('status') == 'success' and 'exit_after_minutes' in data:
+        close = {
+            'account': account,
+            'symbol': data['symbol'],
+            'action': data['action'],
+            'strategy': data.get('strategy'),
+            'trade_id': result.get('trade_id'),
+            'exchange': result.get('exchange'),
+            # Units as sized for this account, so the exit can be booked
+            'units': account_registry.accounts[account].size_units(
+                data['units'])
+        }
+        if result.get('exchange') == 'binance':
+            close['units'] = result['order'].get('executedQty', close['units'])
+            # Lets an interrupted close be looked up instead of resent
+            close['client_order_id'] = uuid.uuid4().hex
+            close['cancel_order_ids'] = [
+                result[key]['orderId'] for key in ('sl_order', 'tp_order')
+                if key in result
+            ]
+        action_scheduler.schedule('close_trade',
+                                  now + data['exit_after_minutes'] * 60,
+                                  close)
+
+
+def mirror_shard_fill(fill: Dict[str, Any]) -> None:
+    """Apply a fill executed in a shard process to this process's state"""
+    units = fill['units'] if fill['side'] == 'buy' else -fill['units']
+    risk_engine.state.record_fill(fill['account'], fill['symbol'], units,
+                                  fill['filled_price'], fill['broker_pl']
+                                  or 0.0)
+    performance_analytics.on_fill(fill)
+
+
+def execute_signal(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Execute a validated signal on its target account(s), schedule any
+    follow-up actions and record it in the recent activity history.
+    """
+    targets = account_registry.resolve_targets(data)
+    if sharded_executor is not None and sharded_executor.running:
+        trade_response = sharded_executor.execute(data)
+    else:
+        trade_response = account_registry.execute(data)
+
+    if targets is None:
+        schedule_follow_ups(DEFAULT_ACCOUNT, data, trade_response)
+    else:
+        for account, result in trade_response['results'].items():
+            schedule_follow_ups(account, data, result)
+
+    if trade_response.get('status') not in ('error', 'blocked'):
+        # Store trade history
+        timestamp = datetime.now().isoformat()
+        recent_webhooks.append({'timestamp': timestamp, 'data': data})
+        recent_trades.append({
+            'timestamp': timestamp,
+            'details': trade_response
+        })
+        journal.record('signal_executed', data=data, details=trade_response)
+        monitor_cache.invalidate()
+
+    return trade_response
+
+
+def run_scheduled_signal(data: Dict[str, Any]) -> str:
+    """Scheduler callback for deferred signals"""
+    return execute_signal(data).get('status', 'success')
+
+
+def book_scheduled_fill(account: str, data: Dict[str, Any],
+                        result: Dict[str, Any]) -> None:
+    """Book a fill made by a scheduled action in risk state and the journal"""
+    risk_engine.record_fill(account, data, result, reserved=False)
+    account_registry.record_fill(account, data, result)
+    monitor_cache.invalidate()
+
+
+def run_scheduled_cancel(payload: Dict[str, Any]) -> str:
+    """
+    Scheduler callback that cancels a resting order if still unfilled.
+    Whatever part of the order filled while it rested is booked here.
+    """
+    handler = account_registry.get_handler(payload['account'])
+    result = handler.cancel_order(payload['symbol'], payload['order_id'],
+                                  payload.get('exchange'))
+    if result.get('executed_units') and 'action' in payload:
+        book_scheduled_fill(
+            payload['account'], {
+                'symbol': payload['symbol'],
+                'action': payload['action'],
+                'strategy': payload.get('strategy'),
+                'units': result['executed_units']
+            }, result)
+    return result['status']
+
+
+def run_scheduled_close(payload: Dict[str, Any]) -> str:
+    """Scheduler callback for time-based exits"""
+    handler = account_registry.get_handler(payload['account'])
+    result = handler.close_trade(payload)
+
+    # The exit is the opposite side of the original signal
+    exit_fill = {
+        'symbol': payload['symbol'],
+        'action': 'sell' if payload['action'] == 'buy' else 'buy',
+        'strategy': payload.get('strategy'),
+        'units': payload.get('units')
+    }
+    if exit_fill['units'] is None:
+        # Actions persisted before closes carried units
+        order = result.get('order') or {}
+        exit_fill['units'] = abs(
+            float(order.get('orderFillTransaction', {}).get('units', 0)))
+    book_scheduled_fill(payload['account'], exit_fill, result)
+    return result['status']
+
+
+def reconcile_scheduled_signal(data: Dict[str, Any]) -> str:
+    """
+    Scheduler callback for a deferred signal interrupted mid-run. If its
+    order was sent, the execution WAL recovery pass (run before the
+    scheduler starts) has already finished or unwound it.
+    """
+    logger.warning(f"Deferred {data.get('symbol')} signal was interrupted; "
+                   f"left to execution recovery")
+    return 'recovered'
+
+
+def reconcile_scheduled_close(payload: Dict[str, Any]) -> str:
+    """
+    Scheduler callback for a time-based exit interrupted mid-run. Closing
+    an Oanda trade by ID is safe to repeat; a Binance close is looked up by
+    its client order id and only resent if the broker never received it.
+    """
+    handler = account_registry.get_handler(payload['account'])
+    if handler.paper or payload.get('exchange') != 'binance':
+        return run_scheduled_close(payload)
+
+    if not payload.get('client_order_id'):
+        # Actions persisted before closes carried client order ids
+        logger.error(f"Interrupted {payload['symbol']} close cannot be "
+                     f"reconciled; check the position manually")
+        return 'unknown'
+
+    order = handler.find_close_order(payload)
+    if order is None:
+        return run_scheduled_close(payload)
+
+    exit_fill = {
+        'symbol': payload['symbol'],
+        'action': 'sell' if payload['action'] == 'buy' else 'buy',
+        'strategy': payload.get('strategy'),
+        'units': payload.get('units')
+    }
+    book_scheduled_fill(payload['account'], exit_fill, {
+        'status': 'closed',
+        'exchange': 'binance',
+        'order': order
+    })
+    return 'closed'
+
+
+def should_start_background_workers() -> bool:
+    """
+    Background workers must only run in the serving process, not in the
+    parent process of the Flask debug reloader. BACKGROUND_WORKERS=false
+    disables them entirely (used by --profile-startup).
+    """
+    if os.getenv('BACKGROUND_WORKERS', 'true').lower() != 'true':
+        return False
+    return not (__name__ == '__main__'
+                and os.environ.get('WERKZEUG_RUN_MAIN') != 'true')
+
+
+def warm_up_exchanges() -> None:
+    """Build broker clients in the background so the first trade is fast"""
+    for exchange in ('oanda', 'binance'):
+        start = time.perf_counter()
+        try:
+            exchange_handler.warm_up(exchange)
+            logger.info(
+                f"{exchange.title()} client ready in {time.perf_counter() - start:.3f}s"
+            )
+        except Exception as e:
+            # The client is retried lazily on the next request
+            logger.error(f"{exchange.title()} warm-up failed: {str(e)}")
+
+
+def sync_risk_state_forever(interval: float) -> None:
+    """Periodically replace cached risk positions with broker positions"""
+    while True:
+        account_registry.sync_risk_state()
+        time.sleep(interval)
+
+
+# Timed actions (deferred signals, order expiry, time-based exits)
+action_scheduler = ActionScheduler()
+action_scheduler.register('execute_signal',
+                          run_scheduled_signal,
+                          reconcile=reconcile_scheduled_signal)
+action_scheduler.register('cancel_order',
+                          run_scheduled_cancel,
+                          protective=True)
+action_scheduler.register('close_trade',
+                          run_scheduled_close,
+                          protective=True,
+                          reconcile=reconcile_scheduled_close)
+# Optional multi-process execution with per-symbol ordering
+sharded_executor = ShardedExecutor(
+    on_fill=mirror_shard_fill, registry=account_registry) if os.getenv(
+        'EXECUTION_MODE', 'inline').lower() == 'sharded' else None
+
+if should_start_background_workers():
+    # Repair half-done executions before anything new is executed
+    account_registry.recover()
+    action_scheduler.start()
+    strategy_table.start()
+    if sharded_executor is not None:
+        sharded_executor.start()
+    if os.getenv('EXCHANGE_WARMUP', 'true').lower() == 'true':
+        threading.Thread(target=warm_up_exchanges,
+                         name='exchange-warmup',
+                         daemon=True).start()
+    risk_sync_seconds = float(os.getenv('RISK_SYNC_SECONDS', 60))
+    if risk_sync_seconds > 0:
+        threading.Thread(target=sync_risk_state_forever,
+                         args=(risk_sync_seconds, ),
+                         name='risk-sync',
+                         daemon=True).start()
+
+
+def build_market_status() -> Dict[str, Any]:
+    """Snapshot of forex market status, hours and sessions"""
+    status = get_market_hours_status()
+
+    return {
+        'market_open':
+        status['is_open'],
+        'current_time':
+        status['current_time'].isoformat(),
+        'next_open':
+        status['next_open'].isoformat() if status['next_open'] else None,
+        'next_close':
+        status['next_close'].isoformat() if status['next_close'] else None,
+        'trading_hours':
+        "Sunday 5:00 PM EST to Friday 5:00 PM EST",
+        'current_session':
+        status['current_session'],
+        'timezone':
+        status['timezone'],
+        'sessions': {
+            'Sydney': '5:00 PM - 2:00 AM EST',
+            'Tokyo': '7:00 PM - 4:00 AM EST',
+            'London': '3:00 AM - 12:00 PM EST',
+            'New York': '8:00 AM - 5:00 PM EST'
+        },
+        'message':
+        "Market is open" if status['is_open'] else "Market is closed"
+    }
+
+
+def build_monitor_snapshot() -> Dict[str, Any]:
+    """Snapshot of trading status across all exchanges"""
+    # Initialize response structure
+    response_data = {
+        'status': 'online',
+        'timestamp': datetime.now().isoformat(),
+        'exchanges': {
+            'oanda': {
+                'error': None,
+                'balance': 0,
+                'open_trades_count': 0,
+                'floating_pl': 0,
+                'realized_pl': 0,
+                'positions': []
+            },
+            'binance': {
+                'error': None,
+                'total_value_usdt': 0,
+                'trading_enabled': False,
+                'balances': {}
+            }
+        },
+        'recent_trades': list(recent_trades)
+    }
+
+    # Get exchange data; paper trading has no broker accounts to query
+    response_data['paper_trading'] = exchange_handler.paper
+    for exchange, method in [] if exchange_handler.paper else [
+        ('oanda', exchange_handler.get_oanda_account_summary),
+        ('binance', exchange_handler.get_binance_account_summary)
+    ]:
+        try:
+            exchange_data = method()
+            response_data['exchanges'][exchange].update(exchange_data)
+            if exchange == 'oanda':
+                # Keep the risk engine's cached positions fresh
+                risk_engine.state.sync_oanda_summary(DEFAULT_ACCOUNT,
+                                                     exchange_data)
+        except Exception as e:
+            response_data['exchanges'][exchange]['error'] = str(e)
+            logger.error(f"{exchange.title()} error: {str(e)}")
+
+    # Broker endpoint health and webhook load
+    response_data['circuit_breakers'] = breakers.snapshot()
+    response_data['admission'] = admission_controller.snapshot()
+    response_data['strategies'] = strategy_table.snapshot()
+    if sharded_executor is not None:
+        response_data['shards'] = sharded_executor.snapshot()
+    return response_data
+
+
+def build_logs_snapshot() -> Dict[str, Any]:
+    """
+    Recent server log lines, served apart from /monitor so log churn does
+    not change the monitor snapshot's ETag. The sequence number of the
+    newest line keeps this ETag stable until something new is logged.
+    """
+    sequence, lines = recent_log_handler.snapshot()
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'sequence': sequence,
+        'recent_logs': lines or ["No logs available"]
+    }
+
+
+def cached_response(cache: CachedEndpoint) -> Response:
+    """Serve a cached endpoint, honouring ?fields= and If-None-Match"""
+    cached = cache.respond(request.args.get('fields'),
+                           request.headers.get('Accept-Encoding', ''),
+                           request.headers.get('If-None-Match'))
+    return Response(cached.body,
+                    status=cached.status,
+                    headers=cached.headers,
+                    mimetype='application/json')
+
+
+# Polled read-only endpoints share one snapshot per TTL across all viewers
+monitor_cache = CachedEndpoint('monitor',
+                               build_monitor_snapshot,
+                               ttl=float(os.getenv('MONITOR_CACHE_SECONDS',
+                                                   2)),
+                               volatile=('timestamp', ))
+market_status_cache = CachedEndpoint(
+    'market_status',
+    build_market_status,
+    ttl=float(os.getenv('MARKET_STATUS_CACHE_SECONDS', 5)),
+    volatile=('current_time', ))
+logs_cache = CachedEndpoint('logs',
+                            build_logs_snapshot,
+                            ttl=float(os.getenv('MONITOR_CACHE_SECONDS', 2)),
+                            volatile=('timestamp', ))
+
+
 # ===============================
 # Route Handlers
 # ===============================
@@ -204,11 +733,16 @@ def home():
     return jsonify({
         'status': 'online',
         'timestamp': datetime.now().isoformat(),
+        'paper_trading': exchange_handler.paper,
         'endpoints': {
             'dashboard': '/dashboard',
             'webhook': '/webhook (POST)',
             'monitor': '/monitor (GET)',
-            'market_status': '/market-status (GET)'
+            'logs': '/logs (GET)',
+            'market_status': '/market-status (GET)',
+            'analytics': '/analytics (GET)',
+            'scheduled': '/scheduled (GET, DELETE /scheduled/<id>)',
+            'metrics': '/metrics (GET)'
         }
     })
 
@@ -234,39 +768,12 @@ def market_status():
     """
     Get current forex market status, hours, and session information.
     Returns market open/closed status, next market events, and current trading session.
+    Supports ?fields=, ETag revalidation and compressed responses.
     """
     try:
-        status = get_market_hours_status()
-
-        response = {
-            'market_open':
-            status['is_open'],
-            'current_time':
-            status['current_time'].isoformat(),
-            'next_open':
-            status['next_open'].isoformat() if status['next_open'] else None,
-            'next_close':
-            status['next_close'].isoformat() if status['next_close'] else None,
-            'trading_hours':
-            "Sunday 5:00 PM EST to Friday 5:00 PM EST",
-            'current_session':
-            status['current_session'],
-            'timezone':
-            status['timezone'],
-            'sessions': {
-                'Sydney': '5:00 PM - 2:00 AM EST',
-                'Tokyo': '7:00 PM - 4:00 AM EST',
-                'London': '3:00 AM - 12:00 PM EST',
-                'New York': '8:00 AM - 5:00 PM EST'
-            },
-            'message':
-            "Market is open" if status['is_open'] else "Market is closed"
-        }
-
-        logger.info(
-            f"Market status checked: {'Open' if status['is_open'] else 'Closed'}"
-        )
-        return jsonify(response)
+        response = cached_response(market_status_cache)
+        logger.info("Market status checked", extra={'poll': True})
+        return response
 
     except Exception as e:
         logger.error(f"Error in market status: {str(e)}")
@@ -279,52 +786,32 @@ def market_status():
 
 @app.route('/monitor')
 def monitor():
-    """Provide current trading status across all exchanges"""
+    """
+    Provide current trading status across all exchanges.
+    Light clients can pass e.g. ?fields=status,exchanges.oanda.balance to
+    skip positions and trades.
+    """
     try:
-        # Initialize response structure
-        response_data = {
-            'status': 'online',
-            'timestamp': datetime.now().isoformat(),
-            'exchanges': {
-                'oanda': {
-                    'error': None,
-                    'balance': 0,
-                    'open_trades_count': 0,
-                    'floating_pl': 0,
-                    'realized_pl': 0,
-                    'positions': []
-                },
-                'binance': {
-                    'error': None,
-                    'total_value_usdt': 0,
-                    'trading_enabled': False,
-                    'balances': {}
-                }
-            },
-            'recent_trades': list(recent_trades)
-        }
+        response = cached_response(monitor_cache)
+        logger.info("Monitor endpoint accessed", extra={'poll': True})
+        return response
 
-        # Get exchange data
-        for exchange, method in [
-            ('oanda', exchange_handler.get_oanda_account_summary),
-            ('binance', exchange_handler.get_binance_account_summary)
-        ]:
-            try:
-                exchange_data = method()
-                response_data['exchanges'][exchange].update(exchange_data)
-            except Exception as e:
-                response_data['exchanges'][exchange]['error'] = str(e)
-                logger.error(f"{exchange.title()} error: {str(e)}")
-
-        # Add logs
-        response_data['recent_logs'] = initialize_log_file(
-            Path('debug_log.txt'))
-        logger.info("Monitor endpoint accessed")
+    except Exception as e:
+        logger.error(f"Error in monitor endpoint: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'error': str(e),
+            'timestamp': datetime.now().isoformat()
+        }), 500
 
-        return jsonify(response_data)
 
+@app.route('/logs')
+def logs():
+    """Recent server log lines for the dashboard"""
+    try:
+        return cached_response(logs_cache)
     except Exception as e:
-        logger.error(f"Error in monitor endpoint: {str(e)}")
+        logger.error(f"Error in logs endpoint: {str(e)}")
         return jsonify({
             'status': 'error',
             'error': str(e),
@@ -336,42 +823,143 @@ def monitor():
 def webhook():
     """Handle incoming trading signals from TradingView"""
     logger.info("Webhook endpoint hit")
-    logger.info(f"Headers: {dict(request.headers)}")
-
-    try:
-        # Parse and validate webhook data
-        webhook_data = request.json
-        logger.info(
-            f"Parsed webhook data: {json.dumps(webhook_data, indent=2)}")
-
-        is_valid, error_message = validate_webhook_data(webhook_data)
-        if not is_valid:
-            return jsonify({'error': error_message}), 401
+    logger.debug(f"Headers: {redact_headers(request.headers)}")
 
-        # Remove secret and execute trade
-        webhook_data.pop('secret', None)
-        trade_response = exchange_handler.execute_trade(webhook_data)
+    # Reading the body enforces MAX_CONTENT_LENGTH (413 from Flask)
+    raw_body = request.get_data()
 
-        # Store trade history
-        timestamp = datetime.now().isoformat()
-        recent_webhooks.append({'timestamp': timestamp, 'data': webhook_data})
-        recent_trades.append({
-            'timestamp': timestamp,
-            'details': trade_response
-        })
+    try:
+        # Authenticate from headers, or from a scan of the raw body for the
+        # JSON secret, before parsing, so unauthenticated floods never reach
+        # the JSON decoder. A body secret is re-checked after parsing.
+        auth_status, auth_error = webhook_authenticator.check_headers(
+            request.headers, raw_body)
+        if auth_status == REJECTED:
+            logger.warning(f"Webhook authentication failed: {auth_error}")
+            return jsonify({'error': 'Unauthorized'}), 401
+
+        # Decode and validate the signal before doing any work
+        try:
+            payload = decode_payload(raw_body)
+        except SignalValidationError as e:
+            return jsonify({'error': str(e)}), 400
+
+        if auth_status != AUTHENTICATED:
+            is_valid, error_message = validate_webhook_data(payload)
+            if not is_valid:
+                return jsonify({'error': error_message}), 401
+
+        try:
+            # Strategy profile defaults are validated like any other field
+            signal = Signal.from_dict(strategy_table.apply(payload))
+            # The secret never leaves the payload
+            webhook_data = signal.to_dict()
+            # Unknown accounts, groups and symbols are the sender's error
+            account_registry.check_targets(webhook_data)
+        except SignalValidationError as e:
+            logger.warning(f"Rejected webhook payload: {str(e)}")
+            return jsonify({'error': str(e)}), 400
+        logger.info(f"Parsed webhook data: {signal}")
+
+        # Execute the validated signal on the targeted account(s), or defer
+        # it to the scheduler
+        if signal.execute_at is not None or signal.delay_minutes is not None:
+            try:
+                return jsonify(schedule_signal(webhook_data)), 202
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+
+        try:
+            with admission_controller.admit(request.remote_addr or 'unknown',
+                                            signal.strategy,
+                                            signal_lane(signal)):
+                trade_response = execute_signal(webhook_data)
+        except AdmissionRejected as e:
+            logger.warning(f"Webhook shed: {str(e)}")
+            return jsonify({'error': str(e)}), 429, {
+                'Retry-After': str(e.retry_after)
+            }
+
+        if trade_response.get('status') == 'blocked':
+            logger.warning("Signal blocked by risk checks on all accounts")
+            return jsonify({
+                'error': 'Trade blocked by risk checks on all accounts',
+                'data': trade_response
+            }), 403
+
+        if trade_response.get('status') == 'error':
+            return jsonify({
+                'error': 'Trade failed on all accounts',
+                'data': trade_response
+            }), 500
 
         return jsonify({
-            'status': 'success',
+            'status': trade_response.get('status', 'success'),
             'message': 'Trade executed successfully',
             'data': trade_response
         }), 200
 
+    except RiskCheckFailed as e:
+        logger.warning(str(e))
+        return jsonify({
+            'error': str(e),
+            'risk': e.decision.to_dict()
+        }), 403
+
     except Exception as e:
         error_msg = f"Error processing webhook: {str(e)}"
         logger.error(error_msg)
         return jsonify({'error': error_msg}), 500
 
 
+@app.route('/analytics')
+def analytics_endpoint():
+    """Running per-strategy and per-symbol performance"""
+    return jsonify({
+        'timestamp': datetime.now().isoformat(),
+        'analytics': performance_analytics.snapshot()
+    })
+
+
+@app.route('/analytics/recompute', methods=['POST'])
+@require_auth
+def recompute_analytics():
+    """Rebuild analytics from the full trade journal (backfills)"""
+    start = time.perf_counter()
+    fills = performance_analytics.recompute(journal.read('order_filled'))
+    return jsonify({
+        'status': 'success',
+        'fills': fills,
+        'seconds': round(time.perf_counter() - start, 3)
+    })
+
+
+@app.route('/scheduled')
+@require_auth
+def scheduled_actions():
+    """List pending scheduled actions"""
+    return jsonify({'actions': action_scheduler.pending()})
+
+
+@app.route('/scheduled/<action_id>', methods=['DELETE'])
+@require_auth
+def cancel_scheduled_action(action_id: str):
+    """Cancel a pending scheduled action"""
+    if not action_scheduler.cancel(action_id):
+        return jsonify({'error': f"Unknown action: {action_id}"}), 404
+    return jsonify({'status': 'cancelled', 'action_id': action_id})
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Expose application metrics in Prometheus text format"""
+    # Refresh time-based circuit transitions (open -> half-open) first
+    breakers.snapshot()
+    for name, value in process_stats().items():
+        metrics.set_gauge(name, value)
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/test-log')
 def test_log():
     """Generate test log entries"""
@@ -386,6 +974,11 @@ def test_log():
 # ===============================
 
 if __name__ == '__main__':
+    if '--profile-startup' in sys.argv:
+        from startup_profile import main as profile_startup
+        sys.exit(profile_startup(sys.argv[sys.argv.index('--profile-startup') +
+                                            1:]))
+
     port = int(os.getenv('PORT', 8080))
     logger.info(f"Starting server on port {port}")
     app.run(host='0.0.0.0', port=port, debug=True)
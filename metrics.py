@@ -0,0 +1,118 @@
+"""
+Metrics Registry
+Thread-safe in-process counters, gauges and summaries rendered in the
+Prometheus text exposition format for the /metrics endpoint.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelSet:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: LabelSet) -> str:
+    if not labels:
+        return ''
+    pairs = ','.join(f'{key}="{value}"' for key, value in labels)
+    return '{' + pairs + '}'
+
+
+class MetricsRegistry:
+    """Collects counters, gauges and summaries keyed by name and labels"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        self._gauges: Dict[str, Dict[LabelSet, float]] = {}
+        self._summaries: Dict[str, Dict[LabelSet, list]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Increment a counter"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        """Set a gauge to an absolute value"""
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record an observation in a count/sum summary"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._summaries.setdefault(name, {})
+            summary = series.setdefault(key, [0, 0.0])
+            summary[0] += 1
+            summary[1] += value
+
+    def get_counter(self, name: str, **labels) -> float:
+        """Read the current value of a counter"""
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0)
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text format"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f'# TYPE {name} counter')
+                for labels, value in series.items():
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+
+            for name, series in sorted(self._gauges.items()):
+                lines.append(f'# TYPE {name} gauge')
+                for labels, value in series.items():
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+
+            for name, series in sorted(self._summaries.items()):
+                lines.append(f'# TYPE {name} summary')
+                for labels, (count, total) in series.items():
+                    label_str = _format_labels(labels)
+                    lines.append(f'{name}_count{label_str} {count}')
+                    lines.append(f'{name}_sum{label_str} {total}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def process_stats() -> Dict[str, float]:
+    """CPU time, memory, thread and file descriptor use of this process"""
+    cpu = time.process_time()
+    stats = {
+        'process_cpu_seconds': cpu,
+        'process_threads': threading.active_count()
+    }
+
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        # ru_maxrss is in KiB on Linux
+        stats['process_max_resident_memory_bytes'] = usage.ru_maxrss * 1024
+        stats['process_voluntary_context_switches'] = usage.ru_nvcsw
+        stats['process_involuntary_context_switches'] = usage.ru_nivcsw
+
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        stats['process_resident_memory_bytes'] = resident_pages * os.sysconf(
+            'SC_PAGE_SIZE')
+        stats['process_open_fds'] = len(os.listdir('/proc/self/fd'))
+    except (OSError, ValueError, IndexError):
+        pass
+    return stats
+
+
+# Shared registry used across the application
+metrics = MetricsRegistry()
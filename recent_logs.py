@@ -0,0 +1,41 @@
+"""
+Recent Logs
+In-memory tail of the debug log for the dashboard's /logs endpoint.
+
+Every kept line is numbered, so the endpoint's ETag changes only when
+something new is logged. Records from polled endpoints (marked with
+extra={'poll': True}) and werkzeug's request lines are skipped; otherwise
+each dashboard poll would log a line and change what the next poll sees.
+"""
+
+import logging
+from collections import deque
+from pathlib import Path
+from typing import List, Tuple
+
+
+class RecentLogHandler(logging.Handler):
+    """Keeps the last log lines, seeded from the tail of the log file"""
+
+    def __init__(self, log_path: Path, max_lines: int = 20):
+        super().__init__()
+        self.lines: deque = deque(maxlen=max_lines)
+        self.sequence = 0
+        if log_path.exists():
+            with open(log_path, 'r') as f:
+                self.lines.extend(line.strip() for line in f if line.strip())
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # Called with the handler lock held
+        if record.name == 'werkzeug' or getattr(record, 'poll', False):
+            return
+        try:
+            self.lines.append(self.format(record))
+            self.sequence += 1
+        except Exception:
+            self.handleError(record)
+
+    def snapshot(self) -> Tuple[int, List[str]]:
+        """Sequence number of the newest line and the kept lines"""
+        with self.lock:
+            return self.sequence, list(self.lines)
@@ -0,0 +1,237 @@
+"""
+Response Cache
+Shared, precomputed JSON responses for polled read-only endpoints
+(/monitor, /market-status).
+
+A snapshot is rebuilt at most once per TTL however many viewers poll, and
+each representation of it (field selection x content encoding) is
+serialized and compressed once, then reused for every viewer. Responses
+carry a weak ETag over the selected fields so unchanged data answers
+If-None-Match with 304 Not Modified. Volatile fields such as timestamps are
+left out of the ETag, so a snapshot that only differs in its timestamp still
+counts as unchanged.
+
+Brotli is used when the optional ``brotli`` package is installed and the
+client accepts it, gzip otherwise.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+from metrics import metrics
+
+IDENTITY = 'identity'
+GZIP = 'gzip'
+BROTLI = 'br'
+
+# Distinct ?fields= selections cached per snapshot; beyond this they are
+# serialized per request instead of growing the cache
+MAX_REPRESENTATIONS = 32
+
+
+def select_fields(data: Dict[str, Any],
+                  fields: Iterable[str]) -> Dict[str, Any]:
+    """
+    Project a snapshot onto the requested fields. Dotted paths select
+    nested keys, e.g. "exchanges.oanda.balance". Unknown fields are skipped.
+    """
+    selected: Dict[str, Any] = {}
+    for path in fields:
+        source, target = data, selected
+        keys = path.split('.')
+        for depth, key in enumerate(keys):
+            if not isinstance(source, dict) or key not in source:
+                break
+            if depth == len(keys) - 1:
+                target[key] = source[key]
+            else:
+                source = source[key]
+                target = target.setdefault(key, {})
+    return selected
+
+
+def parse_fields(param: Optional[str]) -> Tuple[str, ...]:
+    """Normalize a ?fields= parameter; an empty tuple means everything"""
+    if not param:
+        return ()
+    return tuple(sorted({f.strip() for f in param.split(',') if f.strip()}))
+
+
+def negotiate_encoding(accept_encoding: str) -> str:
+    """Pick the best content encoding the client accepts"""
+    accepted = set()
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00'):
+            continue
+        accepted.add(coding.strip().lower())
+
+    if brotli is not None and BROTLI in accepted:
+        return BROTLI
+    if GZIP in accepted or '*' in accepted:
+        return GZIP
+    return IDENTITY
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(',')}
+    # Weak comparison: W/"x" and "x" name the same representation
+    return '*' in candidates or etag in candidates or etag[2:] in candidates
+
+
+def _serialize(data: Dict[str, Any]) -> bytes:
+    return json.dumps(data,
+                      sort_keys=True,
+                      separators=(',', ':'),
+                      default=str).encode()
+
+
+class CachedResponse:
+    """Status, headers and body ready to hand to the web framework"""
+
+    __slots__ = ('status', 'headers', 'body')
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class Snapshot:
+    """One built snapshot and its memoized serialized representations"""
+
+    def __init__(self, data: Dict[str, Any], version: int,
+                 volatile: Tuple[str, ...]):
+        self.data = data
+        self.version = version
+        self.built_at = time.monotonic()
+        self._volatile = volatile
+        self._representations: Dict[Tuple[str, ...], Tuple[str, bytes]] = {}
+        self._encoded: Dict[Tuple[Tuple[str, ...], str], bytes] = {}
+        self._lock = threading.Lock()
+
+    def representation(self, fields: Tuple[str, ...]) -> Tuple[str, bytes]:
+        """ETag and uncompressed body for a field selection"""
+        cached = self._representations.get(fields)
+        if cached is not None:
+            return cached
+
+        data = select_fields(self.data, fields) if fields else self.data
+        stable = {k: v for k, v in data.items() if k not in self._volatile}
+        digest = hashlib.blake2b(_serialize(stable), digest_size=8).hexdigest()
+        result = (f'W/"{digest}"', _serialize(data))
+
+        with self._lock:
+            if len(self._representations) < MAX_REPRESENTATIONS:
+                self._representations[fields] = result
+        return result
+
+    def encoded(self, fields: Tuple[str, ...], body: bytes,
+                encoding: str) -> bytes:
+        """Body compressed with the given encoding, compressed only once"""
+        key = (fields, encoding)
+        cached = self._encoded.get(key)
+        if cached is not None:
+            return cached
+
+        if encoding == BROTLI:
+            compressed = brotli.compress(body, quality=5)
+        else:
+            compressed = gzip.compress(body, compresslevel=6)
+
+        with self._lock:
+            if len(self._encoded) < MAX_REPRESENTATIONS:
+                self._encoded[key] = compressed
+        return compressed
+
+
+class CachedEndpoint:
+    """Rebuilds a snapshot at most once per TTL and serves it to all viewers"""
+
+    def __init__(self,
+                 name: str,
+                 builder: Callable[[], Dict[str, Any]],
+                 ttl: float,
+                 volatile: Tuple[str, ...] = (),
+                 compress_min_bytes: Optional[int] = None):
+        self.name = name
+        self.builder = builder
+        self.ttl = ttl
+        self.volatile = volatile
+        if compress_min_bytes is None:
+            compress_min_bytes = int(os.getenv('COMPRESS_MIN_BYTES', 1024))
+        self.compress_min_bytes = compress_min_bytes
+
+        self._snapshot: Optional[Snapshot] = None
+        self._version = 0
+        self._build_lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Force the next request to rebuild (e.g. after a trade)"""
+        self._snapshot = None
+
+    def snapshot(self) -> Snapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic(
+        ) - snapshot.built_at < self.ttl:
+            metrics.inc('response_cache_total', endpoint=self.name, result='hit')
+            return snapshot
+
+        # Single flight: concurrent viewers wait for one rebuild
+        with self._build_lock:
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic(
+            ) - snapshot.built_at < self.ttl:
+                metrics.inc('response_cache_total',
+                            endpoint=self.name,
+                            result='hit')
+                return snapshot
+
+            start = time.perf_counter()
+            data = self.builder()
+            self._version += 1
+            snapshot = Snapshot(data, self._version, self.volatile)
+            self._snapshot = snapshot
+            metrics.inc('response_cache_total', endpoint=self.name,
+                        result='miss')
+            metrics.observe('response_cache_build_seconds',
+                            time.perf_counter() - start,
+                            endpoint=self.name)
+            return snapshot
+
+    def respond(self,
+                fields_param: Optional[str] = None,
+                accept_encoding: str = '',
+                if_none_match: Optional[str] = None) -> CachedResponse:
+        """Build the response for one request from the shared snapshot"""
+        snapshot = self.snapshot()
+        fields = parse_fields(fields_param)
+        etag, body = snapshot.representation(fields)
+
+        headers = {
+            'ETag': etag,
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding',
+            'X-Snapshot-Version': str(snapshot.version)
+        }
+        if etag_matches(if_none_match, etag):
+            metrics.inc('response_not_modified_total', endpoint=self.name)
+            return CachedResponse(304, headers, b'')
+
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding != IDENTITY and len(body) >= self.compress_min_bytes:
+            body = snapshot.encoded(fields, body, encoding)
+            headers['Content-Encoding'] = encoding
+        return CachedResponse(200, headers, body)
@@ -0,0 +1,465 @@
+"""
+Pre-Trade Risk Engine
+Evaluates declarative risk rules against cached account, position and price
+state before a signal reaches the broker. Evaluation never touches the
+network; the cache is seeded from the trade journal at startup, fed by
+fills, and periodically replaced by broker positions for every account.
+
+Example risk_rules.json:
+
+    {
+        "rules": [
+            {"type": "max_position", "limit": 100000, "symbols": ["EUR_USD"]},
+            {"type": "max_daily_loss", "limit": 500},
+            {"type": "max_orders_per_minute", "limit": 30},
+            {"type": "max_symbol_exposure", "limit": 50000, "action": "warn"}
+        ]
+    }
+
+Every rule accepts optional "name", "symbols", "accounts" and "action"
+("block" or "warn") keys.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from journal import TradeJournal
+from journal import journal as default_journal
+from metrics import MetricsRegistry
+from metrics import metrics as default_metrics
+
+logger = logging.getLogger(__name__)
+
+
+def signed_units(data: Dict[str, Any]) -> float:
+    """Return the signal's units with sign taken from the action"""
+    units = abs(float(data.get('units', 0) or 0))
+    return units if str(data.get('action', '')).lower() == 'buy' else -units
+
+
+class RiskState:
+    """Cached positions, prices, P&L and order rate per account"""
+
+    # Seconds of order history kept for max_orders_per_minute
+    ORDER_WINDOW = 60.0
+
+    def __init__(self):
+        # Re-entrant so a risk check can hold it across rule evaluation
+        self._lock = threading.RLock()
+        self.positions: Dict[Tuple[str, str], float] = {}
+        # Units of allowed orders that have not filled or failed yet
+        self.reserved: Dict[Tuple[str, str], float] = {}
+        self.prices: Dict[str, float] = {}
+        self.unrealized_pl: Dict[str, float] = {}
+        self._realized_pl: Dict[str, Tuple[str, float]] = {}
+        self._order_times: Dict[str, deque] = {}
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).date().isoformat()
+
+    def position(self, account: str, symbol: str) -> float:
+        """Filled position plus units reserved by in-flight orders"""
+        key = (account, symbol)
+        return self.positions.get(key, 0.0) + self.reserved.get(key, 0.0)
+
+    def reserve(self, account: str, symbol: str, units: float) -> None:
+        """Hold units for an order that passed risk checks"""
+        with self._lock:
+            key = (account, symbol)
+            self.reserved[key] = self.reserved.get(key, 0.0) + units
+
+    def release(self, account: str, symbol: str, units: float) -> None:
+        """Drop a reservation for an order that did not fill"""
+        with self._lock:
+            key = (account, symbol)
+            remaining = self.reserved.get(key, 0.0) - units
+            if abs(remaining) < 1e-12:
+                self.reserved.pop(key, None)
+            else:
+                self.reserved[key] = remaining
+
+    def daily_realized_pl(self, account: str) -> float:
+        day, pl = self._realized_pl.get(account, (None, 0.0))
+        return pl if day == self._today() else 0.0
+
+    def daily_pl(self, account: str) -> float:
+        """Realized P&L for today plus current floating P&L"""
+        return self.daily_realized_pl(account) + self.unrealized_pl.get(
+            account, 0.0)
+
+    def orders_in_window(self, account: str) -> int:
+        """Orders that passed risk checks in the last ORDER_WINDOW seconds"""
+        times = self._order_times.get(account)
+        if not times:
+            return 0
+        cutoff = time.monotonic() - self.ORDER_WINDOW
+        with self._lock:
+            while times and times[0] < cutoff:
+                times.popleft()
+            return len(times)
+
+    def note_order(self, account: str) -> None:
+        """
+        Count an order that passed risk checks toward the rate limit.
+        Expired timestamps are trimmed here too, so the window stays
+        bounded even when no rate rule ever reads it.
+        """
+        now = time.monotonic()
+        cutoff = now - self.ORDER_WINDOW
+        with self._lock:
+            times = self._order_times.setdefault(account, deque())
+            while times and times[0] < cutoff:
+                times.popleft()
+            times.append(now)
+
+    def update_price(self, symbol: str, price: float) -> None:
+        self.prices[symbol] = price
+
+    def record_fill(self,
+                    account: str,
+                    symbol: str,
+                    units: float,
+                    price: Optional[float],
+                    realized_pl: float = 0.0,
+                    reserved: float = 0.0) -> None:
+        """
+        Apply a fill to the cached position, price and daily P&L. A fill
+        for a reserved order also drops the reservation, atomically.
+        """
+        with self._lock:
+            key = (account, symbol)
+            if reserved:
+                self.release(account, symbol, reserved)
+            self.positions[key] = self.positions.get(key, 0.0) + units
+            if price:
+                self.prices[symbol] = price
+            if realized_pl:
+                today = self._today()
+                day, pl = self._realized_pl.get(account, (today, 0.0))
+                if day != today:
+                    pl = 0.0
+                self._realized_pl[account] = (today, pl + realized_pl)
+
+    def seed_from_fills(self, fills: Iterable[Dict[str, Any]]) -> None:
+        """
+        Rebuild positions, prices and today's realized P&L from journaled
+        fills, so limits hold right after a restart. Broker syncs replace
+        the positions once they run.
+        """
+        today = self._today()
+        count = 0
+        for fill in fills:
+            try:
+                units = float(fill['units'])
+                units = units if fill['side'] == 'buy' else -units
+                # Journal timestamps are local time; daily P&L is UTC
+                day = datetime.fromisoformat(fill['timestamp']).astimezone(
+                    timezone.utc).date().isoformat()
+                realized_pl = (fill.get('broker_pl') or 0.0
+                               if day == today else 0.0)
+                self.record_fill(fill['account'], fill['symbol'], units,
+                                 fill.get('filled_price'), realized_pl)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.error(f"Skipping unreadable journaled fill: {str(e)}")
+                continue
+            count += 1
+        if count:
+            logger.info(f"Seeded risk state from {count} journaled fills")
+
+    def sync_positions(self, account: str, exchange: str,
+                       positions: Dict[str, float]) -> None:
+        """Replace an account's cached positions on one exchange"""
+        # Oanda instruments are the only symbols with an underscore
+        is_oanda = exchange == 'oanda'
+        with self._lock:
+            for key in [
+                    k for k in self.positions
+                    if k[0] == account and ('_' in k[1]) == is_oanda
+            ]:
+                del self.positions[key]
+            for symbol, units in positions.items():
+                if units:
+                    self.positions[(account, symbol)] = units
+
+    def sync_oanda_summary(self, account: str, summary: Dict[str, Any]) -> None:
+        """Replace cached Oanda positions and floating P&L from a summary"""
+        positions = {}
+        for position in summary.get('positions', []):
+            positions[position['instrument']] = (
+                float(position.get('long', {}).get('units', 0)) +
+                float(position.get('short', {}).get('units', 0)))
+        with self._lock:
+            self.unrealized_pl[account] = float(
+                summary.get('floating_pl', 0) or 0)
+            self.sync_positions(account, 'oanda', positions)
+
+
+class RiskRule:
+    """Base class for declarative rules"""
+
+    rule_type = ''
+
+    def __init__(self, config: Dict[str, Any]):
+        self.limit = float(config['limit'])
+        self.name = config.get('name', self.rule_type)
+        self.action = config.get('action', 'block')
+        if self.action not in ('block', 'warn'):
+            raise ValueError(f"Invalid action for rule {self.name}: "
+                             f"{self.action}")
+        self.symbols = frozenset(config['symbols']) if config.get(
+            'symbols') else None
+        self.accounts = frozenset(config['accounts']) if config.get(
+            'accounts') else None
+
+    def applies(self, account: str, symbol: str) -> bool:
+        return ((self.symbols is None or symbol in self.symbols)
+                and (self.accounts is None or account in self.accounts))
+
+    def check(self, account: str, symbol: str, units: float,
+              data: Dict[str, Any], state: RiskState) -> Optional[str]:
+        """
+        Return a violation reason, or None if the signal passes. Every rule
+        takes the same arguments, even those it does not use.
+        """
+        raise NotImplementedError
+
+
+class MaxPositionRule(RiskRule):
+    """Caps the absolute position size per symbol"""
+
+    rule_type = 'max_position'
+
+    def check(self, account, symbol, units, data, state):  # noqa: ARG002
+        current = state.position(account, symbol)
+        resulting = current + units
+        # Orders that shrink the position are always allowed
+        if abs(resulting) > self.limit and abs(resulting) > abs(current):
+            return (f"Position in {symbol} would be {resulting:g}, "
+                    f"limit {self.limit:g}")
+        return None
+
+
+class MaxDailyLossRule(RiskRule):
+    """Stops new exposure once today's loss reaches the limit"""
+
+    rule_type = 'max_daily_loss'
+
+    def check(self, account, symbol, units, data, state):  # noqa: ARG002
+        daily_pl = state.daily_pl(account)
+        current = state.position(account, symbol)
+        if -daily_pl >= self.limit and abs(current + units) > abs(current):
+            return (f"Daily loss {-daily_pl:.2f} reached limit "
+                    f"{self.limit:g}")
+        return None
+
+
+class MaxOrdersPerMinuteRule(RiskRule):
+    """Limits how many orders an account may send per rolling minute"""
+
+    rule_type = 'max_orders_per_minute'
+
+    def check(self, account, symbol, units, data, state):  # noqa: ARG002
+        count = state.orders_in_window(account)
+        if count >= self.limit:
+            return f"{count} orders in the last minute, limit {self.limit:g}"
+        return None
+
+
+class MaxSymbolExposureRule(RiskRule):
+    """Caps notional exposure per symbol using the cached or signal price"""
+
+    rule_type = 'max_symbol_exposure'
+
+    def check(self, account, symbol, units, data, state):
+        price = state.prices.get(symbol) or data.get('price')
+        if not price:
+            # Without a cached price the rule cannot be evaluated offline
+            return None
+        current = state.position(account, symbol)
+        resulting = current + units
+        exposure = abs(resulting) * float(price)
+        if exposure > self.limit and abs(resulting) > abs(current):
+            return (f"Exposure in {symbol} would be {exposure:.2f}, "
+                    f"limit {self.limit:g}")
+        return None
+
+
+RULE_TYPES = {
+    rule.rule_type: rule
+    for rule in (MaxPositionRule, MaxDailyLossRule, MaxOrdersPerMinuteRule,
+                 MaxSymbolExposureRule)
+}
+
+
+class RiskDecision:
+    """Outcome of a risk evaluation"""
+
+    __slots__ = ('allowed', 'violations')
+
+    def __init__(self, allowed: bool, violations: List[Dict[str, str]]):
+        self.allowed = allowed
+        self.violations = violations
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'allowed': self.allowed, 'violations': self.violations}
+
+
+class RiskCheckFailed(Exception):
+    """Raised when a signal is blocked by a risk rule"""
+
+    def __init__(self, account: str, decision: RiskDecision):
+        self.account = account
+        self.decision = decision
+        reasons = '; '.join(v['reason'] for v in decision.violations)
+        super().__init__(f"Blocked by risk rules for {account}: {reasons}")
+
+
+class RiskEngine:
+    """Evaluates compiled risk rules against cached state"""
+
+    def __init__(self,
+                 rules: List[RiskRule],
+                 state: Optional[RiskState] = None,
+                 trade_journal: Optional[TradeJournal] = None,
+                 metrics_registry: Optional[MetricsRegistry] = None):
+        self.rules = rules
+        self.state = state or RiskState()
+        self.journal = trade_journal or default_journal
+        self.metrics = metrics_registry or default_metrics
+
+    @classmethod
+    def from_config(cls, config_path: Optional[Path] = None) -> 'RiskEngine':
+        """Load rules from a JSON file; no file means no rules"""
+        config_path = config_path or Path(
+            os.getenv('RISK_CONFIG', 'risk_rules.json'))
+        if not config_path.exists():
+            logger.info(f"No risk config at {config_path}, risk checks disabled")
+            return cls([])
+
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+
+        rules = []
+        for rule_config in config.get('rules', []):
+            rule_type = rule_config.get('type')
+            if rule_type not in RULE_TYPES:
+                raise ValueError(f"Unknown risk rule type: {rule_type}")
+            rules.append(RULE_TYPES[rule_type](rule_config))
+
+        logger.info(f"Loaded {len(rules)} risk rules from {config_path}")
+        return cls(rules)
+
+    def evaluate(self,
+                 account: str,
+                 data: Dict[str, Any],
+                 reserve: bool = False) -> RiskDecision:
+        """
+        Run every applicable rule against a signal for one account. With
+        reserve=True an allowed signal's units are reserved in the same
+        critical section, so concurrent signals see each other.
+        """
+        start = time.perf_counter()
+        symbol = data.get('symbol', '')
+        units = signed_units(data)
+
+        violations = []
+        blocked = False
+        with self.state._lock:
+            for rule in self.rules:
+                if not rule.applies(account, symbol):
+                    continue
+                reason = rule.check(account, symbol, units, data, self.state)
+                if reason is not None:
+                    violations.append({
+                        'rule': rule.name,
+                        'type': rule.rule_type,
+                        'action': rule.action,
+                        'reason': reason
+                    })
+                    blocked = blocked or rule.action == 'block'
+
+            if not blocked:
+                self.state.note_order(account)
+                if reserve:
+                    self.state.reserve(account, symbol, units)
+
+        elapsed = time.perf_counter() - start
+        self.metrics.observe('risk_check_seconds', elapsed)
+        self.metrics.inc('risk_checks_total',
+                         result='blocked' if blocked else 'allowed')
+
+        for violation in violations:
+            self.metrics.inc('risk_rule_hits_total',
+                             rule=violation['rule'],
+                             action=violation['action'])
+            self.journal.record('risk_rule_hit',
+                                account=account,
+                                symbol=symbol,
+                                side=data.get('action'),
+                                units=data.get('units'),
+                                strategy=data.get('strategy'),
+                                blocked=blocked,
+                                **violation)
+            logger.warning(
+                f"Risk rule {violation['rule']} hit for {account} {symbol}: "
+                f"{violation['reason']}")
+
+        return RiskDecision(not blocked, violations)
+
+    def check(self, account: str, data: Dict[str, Any]) -> RiskDecision:
+        """
+        Evaluate a signal and reserve its units, or raise RiskCheckFailed if
+        it is blocked. An allowed signal must be settled with settle() or
+        release() once the broker call returns.
+        """
+        decision = self.evaluate(account, data, reserve=True)
+        if not decision.allowed:
+            raise RiskCheckFailed(account, decision)
+        return decision
+
+    def release(self, account: str, data: Dict[str, Any]) -> None:
+        """Release the reservation of a checked signal that did not fill"""
+        self.state.release(account, data.get('symbol', ''), signed_units(data))
+
+    def settle(self, account: str, data: Dict[str, Any],
+               trade_response: Dict[str, Any]) -> None:
+        """
+        Book a checked signal that filled, or release its reservation when
+        it did not. Resting orders are booked once they actually fill.
+        """
+        if (trade_response.get('status') == 'success'
+                and trade_response.get('filled_price') is not None):
+            self.record_fill(account, data, trade_response)
+        else:
+            self.release(account, data)
+
+    def record_fill(self,
+                    account: str,
+                    data: Dict[str, Any],
+                    trade_response: Dict[str, Any],
+                    reserved: bool = True) -> None:
+        """
+        Book an executed trade and release its reservation. Fills of
+        scheduled actions were never reserved and pass reserved=False.
+        """
+        realized_pl = 0.0
+        order = trade_response.get('order')
+        if isinstance(order, dict):
+            fill = order.get('orderFillTransaction', {})
+            realized_pl = float(fill.get('pl', 0) or 0)
+
+        units = signed_units(data)
+        self.state.record_fill(account,
+                               data.get('symbol', ''),
+                               units,
+                               trade_response.get('filled_price'),
+                               realized_pl,
+                               reserved=units if reserved else 0.0)
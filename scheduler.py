@@ -0,0 +1,306 @@
+"""
+Action Scheduler
+In-process scheduler for delayed and timed trading actions (deferred signal
+execution, cancelling unfilled orders, time-based exits).
+
+Pending actions live in a min-heap ordered by due time, so scheduling and
+dispatching are O(log n) and thousands of timers cost one sleeping thread.
+Every action is also persisted to SQLite and reloaded on startup, so pending
+actions survive restarts. Actions that come due after a long outage are
+expired rather than executed if they are later than their allowed lateness,
+except protective actions (cancels and exits), which always run.
+
+Kinds that are not safe to repeat (opening or closing a position) are
+marked started before they run. A started action found on startup was
+interrupted by a crash, so it is reconciled against the broker instead of
+being run a second time.
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from journal import journal
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduledAction:
+    """A single timed action"""
+
+    __slots__ = ('action_id', 'kind', 'due', 'payload', 'max_lateness',
+                 'created', 'started')
+
+    def __init__(self,
+                 action_id: str,
+                 kind: str,
+                 due: float,
+                 payload: Dict[str, Any],
+                 max_lateness: float,
+                 created: float,
+                 started: Optional[float] = None):
+        self.action_id = action_id
+        self.kind = kind
+        self.due = due
+        self.payload = payload
+        self.max_lateness = max_lateness
+        self.created = created
+        self.started = started
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.action_id,
+            'kind': self.kind,
+            'due': self.due,
+            'payload': self.payload,
+            'max_lateness': self.max_lateness,
+            'created': self.created,
+            'started': self.started
+        }
+
+
+class ActionScheduler:
+    """Heap-based timer queue with SQLite persistence"""
+
+    def __init__(self,
+                 db_path: Optional[Path] = None,
+                 max_lateness: Optional[float] = None,
+                 workers: int = 4):
+        self.db_path = db_path or Path(
+            os.getenv('SCHEDULER_DB', 'scheduler.db'))
+        self.default_max_lateness = max_lateness if max_lateness is not None else float(
+            os.getenv('SCHEDULER_MAX_LATENESS', 300))
+
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self._protective: Set[str] = set()
+        self._reconcilers: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self._heap: List = []
+        self._actions: Dict[str, ScheduledAction] = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix='scheduler')
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        self._db = sqlite3.connect(str(self.db_path),
+                                   check_same_thread=False)
+        self._db_lock = threading.Lock()
+        with self._db_lock:
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS scheduled_actions (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    due REAL NOT NULL,
+                    payload TEXT NOT NULL,
+                    max_lateness REAL NOT NULL,
+                    created REAL NOT NULL
+                )''')
+            columns = {
+                row[1]
+                for row in self._db.execute(
+                    'PRAGMA table_info(scheduled_actions)')
+            }
+            if 'started' not in columns:
+                # Databases created before actions were marked started
+                self._db.execute(
+                    'ALTER TABLE scheduled_actions ADD COLUMN started REAL')
+            self._db.commit()
+
+    def register(
+            self,
+            kind: str,
+            handler: Callable[[Dict[str, Any]], Any],
+            protective: bool = False,
+            reconcile: Optional[Callable[[Dict[str, Any]], Any]] = None
+    ) -> None:
+        """
+        Register the callable that runs actions of a given kind.
+        Protective actions reduce exposure and are run however late they
+        are, never expired. Kinds that must not run twice pass a reconcile
+        callable, which is called instead of the handler for an action
+        interrupted mid-run.
+        """
+        self._handlers[kind] = handler
+        if protective:
+            self._protective.add(kind)
+        if reconcile is not None:
+            self._reconcilers[kind] = reconcile
+
+    def _push(self, action: ScheduledAction) -> None:
+        self._actions[action.action_id] = action
+        heapq.heappush(self._heap,
+                       (action.due, next(self._sequence), action.action_id))
+        metrics.set_gauge('scheduler_pending_actions', len(self._actions))
+
+    def schedule(self,
+                 kind: str,
+                 due: float,
+                 payload: Dict[str, Any],
+                 max_lateness: Optional[float] = None) -> str:
+        """Persist and enqueue an action due at a unix timestamp"""
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for action: {kind}")
+
+        action = ScheduledAction(
+            uuid.uuid4().hex, kind, due, payload,
+            self.default_max_lateness
+            if max_lateness is None else max_lateness, time.time())
+
+        with self._db_lock:
+            self._db.execute(
+                'INSERT INTO scheduled_actions '
+                '(id, kind, due, payload, max_lateness, created) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (action.action_id, kind, due, json.dumps(payload, default=str),
+                 action.max_lateness, action.created))
+            self._db.commit()
+
+        with self._condition:
+            self._push(action)
+            self._condition.notify()
+
+        logger.info(
+            f"Scheduled {kind} action {action.action_id} in {due - time.time():.1f}s"
+        )
+        return action.action_id
+
+    def cancel(self, action_id: str) -> bool:
+        """Cancel a pending action; its heap entry is skipped lazily"""
+        with self._condition:
+            action = self._actions.pop(action_id, None)
+            metrics.set_gauge('scheduler_pending_actions', len(self._actions))
+        if action is None:
+            return False
+        self._delete(action_id)
+        journal.record('scheduled_action', id=action_id, kind=action.kind,
+                       status='cancelled')
+        return True
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """List pending actions ordered by due time"""
+        with self._condition:
+            actions = list(self._actions.values())
+        return [a.to_dict() for a in sorted(actions, key=lambda a: a.due)]
+
+    def _delete(self, action_id: str) -> None:
+        with self._db_lock:
+            self._db.execute('DELETE FROM scheduled_actions WHERE id = ?',
+                             (action_id, ))
+            self._db.commit()
+
+    def _mark_started(self, action: ScheduledAction) -> None:
+        action.started = time.time()
+        with self._db_lock:
+            self._db.execute(
+                'UPDATE scheduled_actions SET started = ? WHERE id = ?',
+                (action.started, action.action_id))
+            self._db.commit()
+
+    def _load(self) -> None:
+        with self._db_lock:
+            rows = self._db.execute(
+                'SELECT id, kind, due, payload, max_lateness, created, '
+                'started FROM scheduled_actions').fetchall()
+        with self._condition:
+            for row in rows:
+                action_id, kind, due, payload, max_lateness, created, started = row
+                self._push(
+                    ScheduledAction(action_id, kind, due, json.loads(payload),
+                                    max_lateness, created, started))
+        if rows:
+            logger.info(f"Restored {len(rows)} scheduled actions")
+
+    def start(self) -> None:
+        """Reload persisted actions and start the timer thread"""
+        if self._running:
+            return
+        self._load()
+        self._running = True
+        self._thread = threading.Thread(target=self._run,
+                                        name='action-scheduler',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._executor.shutdown(wait=False)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+
+                due, _, action_id = self._heap[0]
+                delay = due - time.time()
+                if delay > 0:
+                    self._condition.wait(timeout=delay)
+                    continue
+
+                heapq.heappop(self._heap)
+                action = self._actions.pop(action_id, None)
+                metrics.set_gauge('scheduler_pending_actions',
+                                  len(self._actions))
+
+            # Cancelled actions leave a stale heap entry behind
+            if action is not None:
+                self._executor.submit(self._dispatch, action)
+
+    def _dispatch(self, action: ScheduledAction) -> None:
+        lateness = time.time() - action.due
+        reconcile = self._reconcilers.get(action.kind)
+        try:
+            is_late = lateness > action.max_lateness
+            if action.started is not None and reconcile is not None:
+                # Interrupted mid-run: the broker may already have the order
+                logger.warning(f"Reconciling interrupted {action.kind} action "
+                               f"{action.action_id}")
+                status, detail = 'reconciled', reconcile(action.payload)
+            elif is_late and action.kind not in self._protective:
+                status, detail = 'expired', f"{lateness:.0f}s late"
+                logger.warning(f"Scheduled {action.kind} action "
+                               f"{action.action_id} expired ({detail})")
+            else:
+                if is_late:
+                    logger.warning(
+                        f"Running protective {action.kind} action "
+                        f"{action.action_id} {lateness:.0f}s late")
+                if reconcile is not None:
+                    self._mark_started(action)
+                result = self._handlers[action.kind](action.payload)
+                status, detail = 'done', result
+        except Exception as e:
+            status, detail = 'failed', str(e)
+            logger.error(
+                f"Scheduled {action.kind} action {action.action_id} failed: {str(e)}"
+            )
+        finally:
+            self._delete(action.action_id)
+
+        metrics.inc('scheduler_actions_total', kind=action.kind, status=status)
+        journal.record('scheduled_action',
+                       id=action.action_id,
+                       kind=action.kind,
+                       status=status,
+                       lateness=round(lateness, 3),
+                       detail=detail)
@@ -0,0 +1,400 @@
+"""
+Sharded Executor
+Runs signal execution in a fixed set of worker processes, one queue per
+shard. Signals are hashed to a shard by symbol (or account target plus
+symbol), so signals for one instrument always execute in arrival order on
+the same process while different instruments execute in parallel.
+
+Shards are plain child processes talking JSON lines over stdin/stdout. Risk
+rules are checked and reserved in the server process before a signal is
+queued, so account limits hold across all shards; shards execute without
+risk checks and report their fills back to the server. A supervisor thread
+per shard restarts crashed shards and resends every signal the shard had
+not started yet. A signal that was already executing when its shard died is failed
+rather than retried, since the order may have reached the broker; the
+restarted shard finishes or unwinds it from its execution write-ahead log.
+
+Usage (normally started by main.py with EXECUTION_MODE=sharded):
+    python sharded_executor.py --shard N
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from accounts import DEFAULT_ACCOUNT, AccountRegistry, blocked_result, summarize_fanout
+from metrics import metrics
+from risk_engine import RiskCheckFailed
+
+logger = logging.getLogger(__name__)
+
+SHARD_BY_SYMBOL = 'symbol'
+SHARD_BY_ACCOUNT_SYMBOL = 'account_symbol'
+
+
+def shard_key(data: Dict[str, Any], mode: str = SHARD_BY_SYMBOL) -> str:
+    """Ordering key for a signal; equal keys always map to the same shard"""
+    symbol = str(data.get('symbol', '')).upper()
+    if mode != SHARD_BY_ACCOUNT_SYMBOL:
+        return symbol
+
+    target = data.get('account_group') or data.get('accounts') or 'default'
+    if isinstance(target, list):
+        target = ','.join(target)
+    return f"{target}:{symbol}"
+
+
+class _Task:
+    __slots__ = ('task_id', 'data', 'future', 'started')
+
+    def __init__(self, task_id: int, data: Dict[str, Any]):
+        self.task_id = task_id
+        self.data = data
+        self.future: Future = Future()
+        self.started = False
+
+
+class Shard:
+    """One worker process plus the signals it has been sent"""
+
+    def __init__(self, shard_id: int, on_fill: Optional[Callable] = None):
+        self.shard_id = shard_id
+        self.on_fill = on_fill
+        self.restarts = 0
+        self._pending: 'OrderedDict[int, _Task]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._process: Optional[subprocess.Popen] = None
+        self._running = False
+
+    def _spawn(self) -> None:
+        self._process = subprocess.Popen(
+            [sys.executable,
+             os.path.abspath(__file__), '--shard',
+             str(self.shard_id)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1)
+        threading.Thread(target=self._read,
+                         args=(self._process, ),
+                         name=f'shard-{self.shard_id}-reader',
+                         daemon=True).start()
+        logger.info(
+            f"Shard {self.shard_id} started (pid {self._process.pid})")
+
+    def start(self) -> None:
+        with self._lock:
+            self._running = True
+            self._spawn()
+
+    def stop(self) -> None:
+        with self._lock:
+            self._running = False
+            process = self._process
+        if process is not None:
+            # EOF on stdin lets the shard finish its current signal and exit
+            process.stdin.close()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def _send(self, task: _Task) -> None:
+        self._process.stdin.write(
+            json.dumps({
+                'id': task.task_id,
+                'data': task.data
+            }, default=str) + '\n')
+        self._process.stdin.flush()
+
+    def submit(self, task: _Task) -> None:
+        with self._lock:
+            self._pending[task.task_id] = task
+            metrics.set_gauge('shard_pending_signals',
+                              len(self._pending),
+                              shard=self.shard_id)
+            try:
+                self._send(task)
+            except (BrokenPipeError, ValueError):
+                # The shard is dying; the supervisor resends on restart
+                logger.warning(
+                    f"Shard {self.shard_id} unavailable, signal queued for restart"
+                )
+
+    def _read(self, process: subprocess.Popen) -> None:
+        """Handle shard replies; EOF means the shard exited"""
+        for line in process.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                logger.error(f"Shard {self.shard_id} sent bad output: {line}")
+                continue
+            self._handle(message)
+
+        process.wait()
+        self._supervise(process)
+
+    def _handle(self, message: Dict[str, Any]) -> None:
+        with self._lock:
+            task = self._pending.get(message['id'])
+            if task is None:
+                return
+            if message['event'] == 'started':
+                task.started = True
+                return
+            del self._pending[task.task_id]
+            metrics.set_gauge('shard_pending_signals',
+                              len(self._pending),
+                              shard=self.shard_id)
+
+        metrics.inc('shard_signals_total',
+                    shard=self.shard_id,
+                    outcome=message['event'])
+        if message['event'] == 'done':
+            if self.on_fill is not None:
+                for fill in message.get('fills', []):
+                    self.on_fill(fill)
+            task.future.set_result(message['result'])
+        else:
+            task.future.set_exception(remote_error(message))
+
+    def _supervise(self, process: subprocess.Popen) -> None:
+        """Restart a shard that exited and resend its unstarted signals"""
+        with self._lock:
+            if not self._running or process is not self._process:
+                return
+
+            logger.error(
+                f"Shard {self.shard_id} exited with code "
+                f"{process.returncode}, restarting"
+            )
+            self.restarts += 1
+            metrics.inc('shard_restarts_total', shard=self.shard_id)
+
+            lost = [task for task in self._pending.values() if task.started]
+            for task in lost:
+                del self._pending[task.task_id]
+                task.future.set_exception(
+                    RuntimeError(
+                        f"Shard {self.shard_id} crashed while executing the signal; "
+                        "it is recovered from the execution log on restart"))
+            backoff = min(2**min(self.restarts - 1, 5), 30)
+
+        # Back off so a shard that crashes on startup cannot spin; signals
+        # submitted meanwhile stay pending and are resent below
+        time.sleep(backoff)
+        with self._lock:
+            if not self._running:
+                return
+            self._spawn()
+            for task in self._pending.values():
+                self._send(task)
+            metrics.set_gauge('shard_pending_signals',
+                              len(self._pending),
+                              shard=self.shard_id)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'pid': self._process.pid if self._process else None,
+                'pending': len(self._pending),
+                'restarts': self.restarts
+            }
+
+
+def remote_error(message: Dict[str, Any]) -> Exception:
+    """Rebuild the exception a shard reported"""
+    if message.get('error_type') == 'ValueError':
+        return ValueError(message['error'])
+    return RuntimeError(message['error'])
+
+
+class ShardedExecutor:
+    """Hashes signals to per-symbol worker processes"""
+
+    def __init__(self,
+                 shards: Optional[int] = None,
+                 key_mode: Optional[str] = None,
+                 on_fill: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 registry: Optional[AccountRegistry] = None):
+        count = shards or int(os.getenv('EXECUTION_SHARDS', 0)) or (
+            os.cpu_count() or 1)
+        self.key_mode = key_mode or os.getenv('EXECUTION_SHARD_KEY',
+                                              SHARD_BY_SYMBOL)
+        self.shards: List[Shard] = [
+            Shard(shard_id, on_fill) for shard_id in range(count)
+        ]
+        # The server's registry, whose risk engine gates every signal
+        self.registry = registry
+        self.running = False
+        self._next_id = 0
+        self._id_lock = threading.Lock()
+
+    def start(self) -> None:
+        for shard in self.shards:
+            shard.start()
+        self.running = True
+        logger.info(
+            f"Sharded execution started with {len(self.shards)} shards "
+            f"by {self.key_mode}"
+        )
+
+    def stop(self) -> None:
+        self.running = False
+        for shard in self.shards:
+            shard.stop()
+
+    def shard_for(self, data: Dict[str, Any]) -> Shard:
+        key = shard_key(data, self.key_mode).encode()
+        return self.shards[zlib.crc32(key) % len(self.shards)]
+
+    def submit(self,
+               data: Dict[str, Any],
+               route: Optional[Dict[str, Any]] = None) -> Future:
+        """
+        Queue a signal on its shard; the future resolves to the result.
+        The shard is picked from 'route' (default: the signal itself).
+        """
+        with self._id_lock:
+            self._next_id += 1
+            task = _Task(self._next_id, data)
+        self.shard_for(route or data).submit(task)
+        return task.future
+
+    def execute(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Execute a signal on its shard and wait for the result.
+        Each target account is risk-checked here first and only allowed
+        accounts are sent to the shard. Raises RiskCheckFailed for a
+        blocked single-account signal, like inline execution.
+        """
+        if self.registry is None or self.registry.risk_engine is None:
+            return self.submit(data).result()
+
+        risk_engine = self.registry.risk_engine
+        targets = self.registry.resolve_targets(data)
+        allowed: Dict[str, Dict[str, Any]] = {}
+        blocked: Dict[str, Dict[str, Any]] = {}
+        for account in targets or [DEFAULT_ACCOUNT]:
+            order = self.registry.prepare_order(account, data)
+            try:
+                risk_engine.check(account, order)
+            except RiskCheckFailed as e:
+                if targets is None:
+                    raise
+                blocked[account] = blocked_result(e)
+                continue
+            allowed[account] = order
+
+        if not allowed:
+            return summarize_fanout(targets, blocked)
+
+        shard_data = data
+        if targets is not None:
+            shard_data = {
+                key: value
+                for key, value in data.items() if key != 'account_group'
+            }
+            shard_data['accounts'] = list(allowed)
+        try:
+            result = self.submit(shard_data, route=data).result()
+        finally:
+            # Fills reach the risk state through on_fill before the result
+            # does, so the reservations can simply be dropped
+            for account, order in allowed.items():
+                risk_engine.release(account, order)
+
+        if targets is None:
+            return result
+        return summarize_fanout(targets, dict(result['results'], **blocked))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            str(shard.shard_id): shard.snapshot()
+            for shard in self.shards
+        }
+
+
+# ===============================
+# Shard Process
+# ===============================
+
+
+class _FillCollector:
+    """Stands in for analytics inside a shard; fills go back to the server"""
+
+    def __init__(self):
+        self.fills: List[Dict[str, Any]] = []
+
+    def on_fill(self, fill: Dict[str, Any]) -> None:
+        self.fills.append(fill)
+
+
+def run_shard(shard_id: int) -> int:
+    from execution_wal import ExecutionWAL
+
+    # stdout carries the protocol; anything else printed goes to stderr
+    out = os.fdopen(os.dup(sys.stdout.fileno()), 'w', buffering=1)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f'%(asctime)s - shard {shard_id} - %(levelname)s - %(message)s')
+
+    # Risk rules were already checked by the server
+    registry = AccountRegistry.from_config()
+    collector = _FillCollector()
+    registry.analytics = collector
+
+    # Each shard owns its execution log and repairs it when (re)started,
+    # which covers a signal that was mid-execution when the shard crashed
+    wal_path = os.getenv('EXECUTION_WAL', 'execution_wal.jsonl')
+    registry.wal = ExecutionWAL(f"{wal_path}.shard{shard_id}")
+    registry.recover()
+
+    def reply(message: Dict[str, Any]) -> None:
+        out.write(json.dumps(message, default=str) + '\n')
+
+    def handle(task: Dict[str, Any]) -> None:
+        # Acknowledge before executing so a crash is never retried blindly
+        reply({'id': task['id'], 'event': 'started'})
+        collector.fills = []
+        try:
+            result = registry.execute(task['data'])
+            reply({
+                'id': task['id'],
+                'event': 'done',
+                'result': result,
+                'fills': collector.fills
+            })
+        except Exception as e:
+            logger.error(f"Shard {shard_id} signal failed: {str(e)}")
+            reply({
+                'id': task['id'],
+                'event': 'error',
+                'error_type': type(e).__name__,
+                'error': str(e)
+            })
+
+    try:
+        for line in sys.stdin:
+            handle(json.loads(line))
+    except BrokenPipeError:
+        # The server went away; nothing is left to report to
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--shard', type=int, required=True)
+    sys.exit(run_shard(parser.parse_args().shard))
@@ -0,0 +1,189 @@
+"""
+Signal Schema
+Decodes webhook payloads and validates them against a precompiled, typed
+schema in a single pass, producing slotted Signal objects. Malformed payloads
+are rejected here, before any risk checks or broker calls.
+"""
+
+import json
+import math
+from typing import Any, Callable, Dict, List, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib decoder is the fallback
+    orjson = None
+
+
+class SignalValidationError(ValueError):
+    """Raised when a webhook payload does not match the signal schema"""
+
+
+def decode_payload(raw: bytes) -> Dict[str, Any]:
+    """Decode a raw JSON body into a dict using the fastest available decoder"""
+    if not raw:
+        raise SignalValidationError("Empty request body")
+    try:
+        payload = orjson.loads(raw) if orjson else json.loads(raw)
+    except ValueError as e:
+        raise SignalValidationError(f"Invalid JSON: {str(e)}") from None
+    if not isinstance(payload, dict):
+        raise SignalValidationError("Payload must be a JSON object")
+    return payload
+
+
+# ===============================
+# Field coercers
+# ===============================
+
+
+def _string(name: str, value: Any) -> str:
+    if not isinstance(value, str) or not value.strip():
+        raise SignalValidationError(f"{name} must be a non-empty string")
+    return value.strip()
+
+
+def _symbol(name: str, value: Any) -> str:
+    return _string(name, value).upper()
+
+
+def _side(name: str, value: Any) -> str:
+    side = _string(name, value).lower()
+    if side not in ('buy', 'sell'):
+        raise SignalValidationError(f"{name} must be 'buy' or 'sell'")
+    return side
+
+
+def _number(name: str, value: Any) -> float:
+    # bool is an int subclass but never a valid quantity
+    if isinstance(value, bool):
+        raise SignalValidationError(f"{name} must be a number")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        number = value
+    elif isinstance(value, str):
+        try:
+            number = float(value)
+        except ValueError:
+            raise SignalValidationError(f"{name} must be a number") from None
+    else:
+        raise SignalValidationError(f"{name} must be a number")
+
+    if not math.isfinite(number):
+        raise SignalValidationError(f"{name} must be a finite number")
+    if isinstance(value, str) and number.is_integer():
+        return int(number)
+    return number
+
+
+def _non_negative(name: str, value: Any) -> float:
+    number = _number(name, value)
+    if number < 0:
+        raise SignalValidationError(f"{name} must not be negative")
+    return number
+
+
+def _positive(name: str, value: Any) -> float:
+    number = _number(name, value)
+    if number <= 0:
+        raise SignalValidationError(f"{name} must be greater than zero")
+    return number
+
+
+def _order_type(name: str, value: Any) -> str:
+    order_type = _string(name, value).lower()
+    if order_type not in ('market', 'limit'):
+        raise SignalValidationError(f"{name} must be 'market' or 'limit'")
+    return order_type
+
+
+def _intent(name: str, value: Any) -> str:
+    intent = _string(name, value).lower()
+    if intent not in ('entry', 'exit'):
+        raise SignalValidationError(f"{name} must be 'entry' or 'exit'")
+    return intent
+
+
+def _exchange(name: str, value: Any) -> str:
+    exchange = _string(name, value).lower()
+    if exchange not in ('oanda', 'binance'):
+        raise SignalValidationError(f"{name} must be 'oanda' or 'binance'")
+    return exchange
+
+
+def _string_list(name: str, value: Any) -> List[str]:
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not value:
+        raise SignalValidationError(f"{name} must be a non-empty list")
+    return [_string(name, item) for item in value]
+
+
+# (field, coercer, required) compiled once at import time
+FIELD_SPECS: Tuple[Tuple[str, Callable[[str, Any], Any], bool], ...] = (
+    ('action', _side, True),
+    ('symbol', _symbol, True),
+    ('risk', _non_negative, True),
+    ('units', _positive, True),
+    ('sl_pips', _positive, False),
+    ('tp_pips', _positive, False),
+    ('price', _positive, False),
+    ('stop_loss', _positive, False),
+    ('take_profit', _positive, False),
+    ('strategy', _string, False),
+    ('account_group', _string, False),
+    ('accounts', _string_list, False),
+    ('timestamp', _string, False),
+    ('order_type', _order_type, False),
+    ('intent', _intent, False),
+    ('exchange', _exchange, False),
+    ('execute_at', _string, False),
+    ('delay_minutes', _non_negative, False),
+    ('cancel_after_minutes', _positive, False),
+    ('exit_after_minutes', _positive, False),
+)
+
+
+class Signal:
+    """A validated trading signal"""
+
+    __slots__ = tuple(name for name, _, _ in FIELD_SPECS)
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> 'Signal':
+        """Coerce and validate a decoded payload in one pass"""
+        signal = cls.__new__(cls)
+        for name, coerce, required in FIELD_SPECS:
+            value = payload.get(name)
+            if value is None:
+                if required:
+                    raise SignalValidationError(
+                        f"Missing required field: {name}")
+                setattr(signal, name, None)
+            else:
+                setattr(signal, name, coerce(name, value))
+
+        # SL/TP are applied together by both exchanges
+        if (signal.sl_pips is None) != (signal.tp_pips is None):
+            raise SignalValidationError(
+                "sl_pips and tp_pips must be provided together")
+        if signal.order_type == 'limit' and signal.price is None:
+            raise SignalValidationError("Limit orders require a price")
+        if signal.execute_at is not None and signal.delay_minutes is not None:
+            raise SignalValidationError(
+                "execute_at and delay_minutes are mutually exclusive")
+        return signal
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the populated fields as an order dict for the handlers"""
+        data = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value
+        return data
+
+    def __repr__(self) -> str:
+        return f"Signal({self.to_dict()})"
+
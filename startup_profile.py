@@ -0,0 +1,115 @@
+"""
+Startup Profiler
+Reports where cold-start time goes: module import times (from
+``python -X importtime``) for a fresh ``import main`` and the time to
+construct each broker client.
+
+Usage:
+    python main.py --profile-startup [--budget-ms N] [--top N] [--no-clients]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+# Runs in a fresh interpreter so imports are measured cold
+CHILD_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+import main
+phases = {'import main': time.perf_counter() - start}
+errors = {}
+if sys.argv[1] == 'clients':
+    for exchange in ('oanda', 'binance'):
+        start = time.perf_counter()
+        try:
+            main.exchange_handler.warm_up(exchange)
+        except Exception as e:
+            errors[exchange] = str(e)
+        phases[f'init {exchange} client'] = time.perf_counter() - start
+print(json.dumps({'phases': phases, 'errors': errors}))
+'''
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """Parse -X importtime output into (module, self_us, cumulative_us)"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            _, timings = line.split(':', 1)
+            self_us, cumulative_us, name = timings.split('|')
+            modules.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return modules
+
+
+def run_child(include_clients: bool) -> Tuple[Dict, List[Tuple[str, int,
+                                                                 int]]]:
+    env = dict(os.environ, BACKGROUND_WORKERS='false')
+    result = subprocess.run([
+        sys.executable, '-X', 'importtime', '-c', CHILD_SCRIPT,
+        'clients' if include_clients else 'imports'
+    ],
+                            capture_output=True,
+                            text=True,
+                            env=env,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup profile run failed:\n{result.stderr}")
+
+    summary = json.loads(result.stdout.strip().splitlines()[-1])
+    return summary, parse_importtime(result.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--budget-ms',
+                        type=float,
+                        default=float(os.getenv('STARTUP_BUDGET_MS', 0)),
+                        help='fail if importing main takes longer')
+    parser.add_argument('--top',
+                        type=int,
+                        default=15,
+                        help='number of packages to list')
+    parser.add_argument('--no-clients',
+                        action='store_true',
+                        help='skip broker client construction')
+    args = parser.parse_args(argv)
+
+    summary, modules = run_child(not args.no_clients)
+
+    print("=== Startup phases ===")
+    for phase, seconds in summary['phases'].items():
+        print(f"{phase:<28}{seconds * 1000:>10.1f} ms")
+    for exchange, error in summary['errors'].items():
+        print(f"  {exchange} client failed: {error}")
+
+    # Self time summed per top-level package gives an additive breakdown
+    by_package = defaultdict(int)
+    for name, self_us, _ in modules:
+        by_package[name.split('.')[0]] += self_us
+
+    print(f"\n=== Import time by package (top {args.top}) ===")
+    for package, self_us in sorted(by_package.items(),
+                                   key=lambda item: item[1],
+                                   reverse=True)[:args.top]:
+        print(f"{package:<28}{self_us / 1000:>10.1f} ms")
+    print(f"{'total':<28}{sum(by_package.values()) / 1000:>10.1f} ms")
+
+    import_ms = summary['phases']['import main'] * 1000
+    if args.budget_ms and import_ms > args.budget_ms:
+        print(f"\nCold start {import_ms:.1f} ms exceeds budget "
+              f"{args.budget_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
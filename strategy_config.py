@@ -0,0 +1,212 @@
+"""
+Strategy Configuration
+Per-strategy defaults, symbol allow-lists and exchange routing, keyed by the
+webhook 'strategy' field and loaded from a JSON file (STRATEGIES_CONFIG,
+default strategies.json).
+
+The file is compiled into an immutable table of frozen profiles, so applying
+a profile is one dict lookup per signal. A watcher thread polls the file's
+modification time and swaps in a freshly compiled table when it changes; a
+file that fails to compile is logged and the previous table stays active.
+
+Example strategies.json:
+
+    {
+        "MA_Cross": {
+            "defaults": {"units": 1000, "sl_pips": 30, "tp_pips": 60},
+            "symbols": ["EUR_USD", "GBP_USD"],
+            "exchange": "oanda"
+        },
+        "Crypto_Breakout": {
+            "defaults": {"units": 0.01},
+            "exchange": {"BTCUSDT": "binance", "ETHUSDT": "binance"}
+        },
+        "*": {"defaults": {"risk": 1}}
+    }
+
+Defaults only fill fields the signal leaves out. The "*" profile applies
+to signals whose strategy has no profile of its own.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
+
+from metrics import metrics
+from signal_schema import SignalValidationError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE = '*'
+EXCHANGES = ('oanda', 'binance')
+
+
+class StrategyRejected(SignalValidationError):
+    """Raised when a signal is not allowed by its strategy profile"""
+
+
+class StrategyProfile:
+    """Compiled, read-only settings for one strategy"""
+
+    __slots__ = ('name', 'enabled', 'defaults', 'symbols', 'exchange',
+                 'exchange_by_symbol')
+
+    def __init__(self, name: str, settings: Dict[str, Any]):
+        if not isinstance(settings, dict):
+            raise ValueError(f"Strategy {name}: settings must be an object")
+
+        self.name = name
+        self.enabled = bool(settings.get('enabled', True))
+        self.defaults: Mapping[str, Any] = MappingProxyType(
+            dict(settings.get('defaults', {})))
+
+        symbols = settings.get('symbols')
+        if symbols is not None and not (isinstance(symbols, list) and all(
+                isinstance(s, str) for s in symbols)):
+            raise ValueError(
+                f"Strategy {name}: symbols must be a list of strings")
+        self.symbols = frozenset(s.upper()
+                                 for s in symbols) if symbols else None
+
+        exchange = settings.get('exchange')
+        self.exchange: Optional[str] = None
+        self.exchange_by_symbol: Mapping[str, str] = MappingProxyType({})
+        if isinstance(exchange, dict):
+            self.exchange_by_symbol = MappingProxyType(
+                {symbol.upper(): ex for symbol, ex in exchange.items()})
+        elif exchange is not None:
+            self.exchange = exchange
+
+        for ex in (self.exchange, *self.exchange_by_symbol.values()):
+            if ex is not None and ex not in EXCHANGES:
+                raise ValueError(f"Strategy {name}: unknown exchange {ex}")
+
+    def apply(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the payload with this profile's defaults and routing"""
+        if not self.enabled:
+            raise StrategyRejected(f"Strategy {self.name} is disabled")
+
+        data = dict(self.defaults)
+        data.update(payload)
+
+        symbol = str(data.get('symbol', '')).upper()
+        if self.symbols is not None and symbol not in self.symbols:
+            raise StrategyRejected(
+                f"Symbol {symbol} is not allowed for strategy {self.name}")
+
+        if 'exchange' not in data:
+            exchange = self.exchange_by_symbol.get(symbol, self.exchange)
+            if exchange is not None:
+                data['exchange'] = exchange
+        return data
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'defaults': dict(self.defaults),
+            'symbols': sorted(self.symbols) if self.symbols else None,
+            'exchange': self.exchange or dict(self.exchange_by_symbol) or None
+        }
+
+
+def compile_profiles(config: Dict[str, Any]) -> Mapping[str, StrategyProfile]:
+    """Compile a parsed config into an immutable name -> profile table"""
+    if not isinstance(config, dict):
+        raise ValueError("Strategy config must be a JSON object")
+    return MappingProxyType({
+        name: StrategyProfile(name, settings)
+        for name, settings in config.items()
+    })
+
+
+class StrategyTable:
+    """Holds the active compiled profiles and hot-reloads them"""
+
+    def __init__(self,
+                 config_path: Optional[Path] = None,
+                 poll_interval: Optional[float] = None):
+        self.config_path = config_path or Path(
+            os.getenv('STRATEGIES_CONFIG', 'strategies.json'))
+        self.poll_interval = poll_interval or float(
+            os.getenv('STRATEGY_RELOAD_SECONDS', 2))
+
+        self._profiles: Mapping[str, StrategyProfile] = MappingProxyType({})
+        self._mtime: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self.reload()
+
+    @property
+    def profiles(self) -> Mapping[str, StrategyProfile]:
+        return self._profiles
+
+    def reload(self) -> bool:
+        """Recompile the config if it changed; returns True on a swap"""
+        try:
+            mtime = self.config_path.stat().st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return False
+
+        try:
+            if mtime is None:
+                profiles = MappingProxyType({})
+            else:
+                with open(self.config_path, 'r') as f:
+                    profiles = compile_profiles(json.load(f))
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            # Keep serving the last good table
+            metrics.inc('strategy_config_reloads_total', result='error')
+            logger.error(
+                f"Invalid strategy config {self.config_path}, "
+                f"keeping previous: {str(e)}"
+            )
+            self._mtime = mtime
+            return False
+
+        # A single reference swap; readers see the old or the new table
+        self._profiles = profiles
+        self._mtime = mtime
+        metrics.inc('strategy_config_reloads_total', result='success')
+        metrics.set_gauge('strategy_profiles', len(profiles))
+        logger.info(
+            f"Loaded {len(profiles)} strategy profiles from {self.config_path}")
+        return True
+
+    def apply(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the signal's strategy profile, if any, to a decoded payload"""
+        profiles = self._profiles
+        if not profiles:
+            return payload
+
+        strategy = payload.get('strategy')
+        profile = profiles.get(strategy) if isinstance(strategy,
+                                                       str) else None
+        if profile is None:
+            profile = profiles.get(DEFAULT_PROFILE)
+        return payload if profile is None else profile.apply(payload)
+
+    def start(self) -> None:
+        """Start polling the config file for changes"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._watch,
+                                        name='strategy-config',
+                                        daemon=True)
+        self._thread.start()
+
+    def _watch(self) -> None:
+        while True:
+            time.sleep(self.poll_interval)
+            self.reload()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: profile.to_dict()
+            for name, profile in self._profiles.items()
+        }
@@ -0,0 +1,43 @@
+"""Shared pytest setup: the server modules live at the repository root"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from journal import TradeJournal  # noqa: E402
+
+
+@pytest.fixture
+def trade_journal(tmp_path):
+    """A trade journal in a temporary directory"""
+    return TradeJournal(tmp_path / 'trade_journal.jsonl')
+
+
+@pytest.fixture(scope='session')
+def server(tmp_path_factory):
+    """The server module in paper mode, with its state in a temporary dir"""
+    state_dir = tmp_path_factory.mktemp('server')
+    monkeypatch = pytest.MonkeyPatch()
+    for name, value in {
+            'PAPER_TRADING': 'true',
+            'WEBHOOK_SECRET': 'test-secret',
+            'BACKGROUND_WORKERS': 'false',
+            'DEBUG_LOG': state_dir / 'debug_log.txt',
+            'EXECUTION_WAL': state_dir / 'execution_wal.jsonl',
+            'SCHEDULER_DB': state_dir / 'scheduler.db',
+            'ACCOUNTS_CONFIG': state_dir / 'accounts.json',
+            'RISK_CONFIG': state_dir / 'risk_rules.json',
+            'STRATEGIES_CONFIG': state_dir / 'strategies.json'
+    }.items():
+        monkeypatch.setenv(name, str(value))
+
+    import journal
+    monkeypatch.setattr(journal.journal, 'path',
+                        state_dir / 'trade_journal.jsonl')
+
+    import main
+    yield main
+    monkeypatch.undo()
@@ -0,0 +1,120 @@
+"""Tests for fan-out target resolution and multi-account execution"""
+
+import pytest
+
+import accounts as accounts_module
+from accounts import (
+    AccountConfig,
+    AccountRegistry,
+    UnknownTargetError,
+    summarize_fanout,
+)
+from metrics import MetricsRegistry
+from risk_engine import RULE_TYPES, RiskEngine
+
+SIGNAL = {'symbol': 'EUR_USD', 'action': 'buy', 'units': 100, 'risk': 1}
+
+
+@pytest.fixture(autouse=True)
+def paper_accounts(trade_journal, monkeypatch):
+    monkeypatch.setenv('PAPER_TRADING', 'true')
+    monkeypatch.setattr(accounts_module, 'journal', trade_journal)
+
+
+@pytest.fixture
+def registry():
+    accounts = {
+        'main': AccountConfig('main', {}),
+        'half': AccountConfig('half', {'units_multiplier': 0.5}),
+        'fixed': AccountConfig('fixed', {'units': 7})
+    }
+    return AccountRegistry(accounts, {
+        'all': ['main', 'half', 'main', 'fixed'],
+        'small': ['half']
+    })
+
+
+def test_plain_signals_have_no_targets(registry):
+    assert registry.resolve_targets(SIGNAL) is None
+
+
+def test_targets_keep_order_without_duplicates(registry):
+    assert registry.resolve_targets(dict(
+        SIGNAL, account_group='all')) == ['main', 'half', 'fixed']
+    assert registry.resolve_targets(dict(
+        SIGNAL, accounts=['fixed', 'main', 'fixed'])) == ['fixed', 'main']
+
+
+@pytest.mark.parametrize('extra, name', [
+    ({'account_group': 'nope'}, 'nope'),
+    ({'accounts': ['main', 'ghost']}, 'ghost'),
+    ({'symbol': 'FOOBAR'}, 'FOOBAR'),
+])
+def test_unknown_targets_are_named(registry, extra, name):
+    with pytest.raises(UnknownTargetError, match=name):
+        registry.check_targets(dict(SIGNAL, **extra))
+
+
+def test_explicit_exchange_skips_symbol_routing(registry):
+    assert registry.check_targets(
+        dict(SIGNAL, symbol='FOOBAR', exchange='binance')) is None
+
+
+def test_groups_must_reference_known_accounts():
+    with pytest.raises(ValueError, match='ghost'):
+        AccountRegistry({}, {'all': ['ghost']})
+
+
+def test_fanout_sizes_the_order_per_account(registry, trade_journal):
+    response = registry.execute(dict(SIGNAL, account_group='all'))
+
+    assert response['status'] == 'success'
+    assert response['succeeded'] == 3
+    assert {
+        fill['account']: fill['units']
+        for fill in trade_journal.read('order_filled')
+    } == {
+        'main': 100,
+        'half': 50,
+        'fixed': 7
+    }
+
+
+def test_fanout_blocked_everywhere_is_blocked(registry, trade_journal):
+    registry.risk_engine = RiskEngine(
+        [RULE_TYPES['max_position']({
+            'type': 'max_position',
+            'limit': 1
+        })],
+        trade_journal=trade_journal,
+        metrics_registry=MetricsRegistry())
+
+    response = registry.execute(dict(SIGNAL, accounts=['main', 'half']))
+
+    assert response['status'] == 'blocked'
+    assert {r['status'] for r in response['results'].values()} == {'blocked'}
+
+
+def test_fanout_summary_statuses():
+    ok, error = {'status': 'success'}, {'status': 'error'}
+
+    assert summarize_fanout(['a', 'b'], {
+        'a': ok,
+        'b': error
+    })['status'] == 'partial'
+    assert summarize_fanout(['a', 'b'], {
+        'a': error,
+        'b': {
+            'status': 'blocked'
+        }
+    })['status'] == 'error'
+
+
+def test_webhook_rejects_unknown_targets_with_400(server):
+    client = server.app.test_client()
+    response = client.post('/webhook',
+                           json=dict(SIGNAL, account_group='nope'),
+                           headers={'X-Webhook-Secret': 'test-secret'})
+
+    assert response.status_code == 400
+    assert 'nope' in response.get_json()['error']
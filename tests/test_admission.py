@@ -0,0 +1,134 @@
+"""Tests for webhook admission control, lane priority and load shedding"""
+
+import threading
+import time
+
+import pytest
+
+from admission import ENTRY, EXIT, AdmissionController, AdmissionRejected
+
+SIGNAL = {'symbol': 'EUR_USD', 'action': 'buy', 'units': 1, 'risk': 1}
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for admission")
+        time.sleep(0.01)
+
+
+class Waiter(threading.Thread):
+    """Queues for a slot in the background and records what happened"""
+
+    def __init__(self, controller, lane, source='tv', strategy='s'):
+        super().__init__(daemon=True)
+        self.controller = controller
+        self.lane = lane
+        self.source = source
+        self.strategy = strategy
+        self.outcome = None
+        self.release = threading.Event()
+
+    def run(self):
+        try:
+            with self.controller.admit(self.source, self.strategy, self.lane):
+                self.outcome = 'admitted'
+                self.release.wait(5)
+        except AdmissionRejected as e:
+            self.outcome = e.reason
+
+
+def queue_waiter(controller, lane, **kwargs):
+    waiter = Waiter(controller, lane, **kwargs)
+    queued = controller._queued()
+    waiter.start()
+    wait_for(lambda: controller._queued() > queued)
+    return waiter
+
+
+def test_full_queue_sheds_with_retry_after():
+    controller = AdmissionController(max_in_flight=1,
+                                     max_queue=1,
+                                     queue_timeout=5)
+    with controller.admit('tv', 's'):
+        waiter = queue_waiter(controller, ENTRY)
+        with pytest.raises(AdmissionRejected) as rejected, controller.admit(
+                'tv', 's'):
+            pass
+
+    assert rejected.value.reason == 'queue_full'
+    assert rejected.value.retry_after >= 1
+    wait_for(lambda: waiter.outcome == 'admitted')
+    waiter.release.set()
+
+
+def test_exits_are_granted_before_entries():
+    controller = AdmissionController(max_in_flight=1,
+                                     max_queue=4,
+                                     queue_timeout=5)
+    with controller.admit('tv', 's'):
+        entry = queue_waiter(controller, ENTRY)
+        exit_ = queue_waiter(controller, EXIT)
+
+    wait_for(lambda: exit_.outcome == 'admitted')
+    assert entry.outcome is None
+    exit_.release.set()
+    wait_for(lambda: entry.outcome == 'admitted')
+    entry.release.set()
+
+
+def test_exits_displace_the_newest_queued_entry():
+    controller = AdmissionController(max_in_flight=1,
+                                     max_queue=2,
+                                     queue_timeout=5)
+    with controller.admit('tv', 's'):
+        oldest = queue_waiter(controller, ENTRY)
+        newest = queue_waiter(controller, ENTRY)
+        with pytest.raises(AdmissionRejected), controller.admit(
+                'tv', 's', ENTRY):
+            pass
+
+        # The queue stays full: the exit takes the newest entry's place
+        exit_ = Waiter(controller, EXIT)
+        exit_.start()
+        wait_for(lambda: newest.outcome == 'displaced')
+
+    wait_for(lambda: exit_.outcome == 'admitted')
+    for waiter in (exit_, oldest):
+        waiter.release.set()
+    wait_for(lambda: oldest.outcome == 'admitted')
+    oldest.release.set()
+
+
+def test_per_source_cap_leaves_slots_for_other_sources():
+    controller = AdmissionController(max_in_flight=4,
+                                     max_queue=4,
+                                     per_source_limit=1,
+                                     queue_timeout=0.05)
+    with controller.admit('noisy', 's1'):
+        with pytest.raises(AdmissionRejected) as rejected, controller.admit(
+                'noisy', 's2'):
+            pass
+        with controller.admit('quiet', 's3'):
+            pass
+
+    assert rejected.value.reason == 'queue_timeout'
+
+
+def test_shed_webhooks_get_429(server, monkeypatch):
+    controller = AdmissionController(max_in_flight=1,
+                                     max_queue=1,
+                                     queue_timeout=5)
+    monkeypatch.setattr(server, 'admission_controller', controller)
+    client = server.app.test_client()
+
+    with controller.admit('tv', 's'):
+        waiter = queue_waiter(controller, ENTRY)
+        response = client.post('/webhook',
+                               json=SIGNAL,
+                               headers={'X-Webhook-Secret': 'test-secret'})
+    waiter.release.set()
+
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
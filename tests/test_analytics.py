@@ -0,0 +1,121 @@
+"""Tests for fill normalization and running performance analytics"""
+
+import random
+
+import pytest
+
+import analytics as analytics_module
+from analytics import PerformanceAnalytics, PositionBook, build_fill
+
+
+def fill(side, units, price, symbol='EUR_USD', strategy='s',
+         signal_price=None):
+    return {
+        'account': 'a',
+        'strategy': strategy,
+        'symbol': symbol,
+        'side': side,
+        'units': units,
+        'filled_price': price,
+        'signal_price': signal_price,
+        'broker_pl': None
+    }
+
+
+def test_build_fill_reads_oanda_and_binance_responses():
+    data = {'symbol': 'EUR_USD', 'action': 'BUY', 'price': 1.1}
+    oanda = build_fill('a', data, {
+        'order': {
+            'orderFillTransaction': {
+                'price': '1.1002',
+                'units': '-100',
+                'pl': '2.5'
+            }
+        }
+    })
+    assert (oanda['side'], oanda['units'], oanda['filled_price'],
+            oanda['broker_pl']) == ('buy', 100.0, 1.1002, 2.5)
+
+    binance = build_fill('a', dict(data, symbol='BTCUSDT'), {
+        'order': {
+            'executedQty': '0.01',
+            'fills': [{
+                'price': '30000'
+            }]
+        }
+    })
+    assert (binance['units'], binance['filled_price'],
+            binance['strategy']) == (0.01, 30000.0, 'unknown')
+
+    assert build_fill('a', data, {'status': 'pending'}) is None
+
+
+def test_position_book_realizes_pl_at_average_cost():
+    book = PositionBook()
+    assert book.apply(fill('buy', 100, 1.0)) == (0.0, 0.0)
+    book.apply(fill('buy', 100, 2.0))
+
+    closed, realized = book.apply(fill('sell', 50, 2.0))
+    assert closed == 50
+    assert realized == pytest.approx(25.0)
+
+    # Flipping through flat realizes the rest and opens at the new price
+    closed, realized = book.apply(fill('sell', 200, 1.0))
+    assert closed == 150
+    assert realized == pytest.approx(-75.0)
+    assert book.apply(fill('buy', 50, 0.5)) == (50, pytest.approx(25.0))
+
+
+def test_running_aggregates():
+    analytics = PerformanceAnalytics()
+    for side, price in (('buy', 1.0), ('sell', 1.5), ('buy', 1.0),
+                        ('sell', 0.8)):
+        analytics.on_fill(fill(side, 10, price))
+
+    total = analytics.snapshot()['total']
+    assert total['fills'] == 4
+    assert total['trades'] == 2
+    assert total['win_rate'] == 0.5
+    assert total['net_pl'] == pytest.approx(3.0)
+    assert total['max_drawdown'] == pytest.approx(2.0)
+    assert total['profit_factor'] == pytest.approx(2.5)
+    assert set(analytics.snapshot()['strategy']) == {'s'}
+
+
+def test_slippage_is_signed_against_the_trader():
+    analytics = PerformanceAnalytics()
+    analytics.on_fill(fill('buy', 1, 1.0001, signal_price=1.0))
+    analytics.on_fill(fill('sell', 1, 1.0001, signal_price=1.0))
+
+    assert analytics.snapshot()['total']['avg_slippage_bps'] == pytest.approx(
+        0.0)
+
+
+def random_fills(count):
+    rng = random.Random(7)
+    return [
+        fill(rng.choice(['buy', 'sell']),
+             rng.randint(1, 5),
+             1 + rng.random(),
+             symbol=rng.choice(['EUR_USD', 'BTCUSDT']),
+             strategy=rng.choice(['s1', 's2']),
+             signal_price=1.5) for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize('min_fills', [1, 10**9])
+def test_recompute_matches_incremental_updates(min_fills, monkeypatch):
+    monkeypatch.setattr(analytics_module, 'VECTORIZE_MIN_FILLS', min_fills)
+    fills = random_fills(500)
+    incremental = PerformanceAnalytics()
+    for f in fills:
+        incremental.on_fill(f)
+
+    rebuilt = PerformanceAnalytics()
+    assert rebuilt.recompute(fills) == 500
+
+    expected, actual = incremental.snapshot(), rebuilt.snapshot()
+    for section in ('strategy', 'symbol'):
+        assert set(actual[section]) == set(expected[section])
+    for key, value in expected['total'].items():
+        assert actual['total'][key] == pytest.approx(value), key
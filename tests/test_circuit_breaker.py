@@ -0,0 +1,124 @@
+"""Tests for circuit breaker transitions, failure classification and hedging"""
+
+import threading
+import time
+
+import pytest
+
+from circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    BreakerRegistry,
+    CircuitBreaker,
+    CircuitOpenError,
+    is_broker_failure,
+    is_unsent,
+)
+
+
+class BrokerError(Exception):
+    """Shaped like a broker SDK error carrying an HTTP status"""
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def fail(error):
+    raise error
+
+
+@pytest.fixture
+def breaker():
+    return CircuitBreaker('test', min_calls=4, open_seconds=0.05)
+
+
+def test_breaker_opens_then_half_opens_then_closes(breaker):
+    for _ in range(4):
+        with pytest.raises(BrokerError):
+            breaker.call(fail, BrokerError(503))
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: 'ok')
+
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert breaker.call(lambda: 'ok') == 'ok'
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens(breaker):
+    for _ in range(4):
+        breaker.record(True, 0.01)
+    time.sleep(0.06)
+
+    with pytest.raises(BrokerError):
+        breaker.call(fail, BrokerError(500))
+    assert breaker.state == OPEN
+
+
+def test_half_open_admits_one_probe(breaker):
+    for _ in range(4):
+        breaker.record(True, 0.01)
+    time.sleep(0.06)
+
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_client_errors_do_not_open_the_breaker(breaker):
+    for _ in range(10):
+        with pytest.raises(BrokerError):
+            breaker.call(fail, BrokerError(400))
+    assert breaker.state == CLOSED
+
+
+@pytest.mark.parametrize('error, broker_failure, unsent', [
+    (BrokerError(400), False, True),
+    (BrokerError(429), True, True),
+    (BrokerError(503), True, False),
+    (TimeoutError('read timed out'), True, False),
+    (ConnectionRefusedError(), True, True),
+    (CircuitOpenError('open'), True, True),
+])
+def test_failure_classification(error, broker_failure, unsent):
+    assert is_broker_failure(error) == broker_failure
+    assert is_unsent(error) == unsent
+
+
+def test_hedged_read_returns_the_faster_backup():
+    registry = BreakerRegistry()
+    registry.hedging_enabled = True
+    registry.default_hedge_delay = 0.02
+    calls = []
+    release = threading.Event()
+
+    def read():
+        calls.append(1)
+        if len(calls) == 1:
+            # The primary stalls until the test is done
+            release.wait(1)
+            return 'primary'
+        return 'backup'
+
+    try:
+        assert registry.call('test.reads', read, hedge=True) == 'backup'
+    finally:
+        release.set()
+    assert len(calls) == 2
+
+
+def test_unhedged_calls_send_one_request():
+    registry = BreakerRegistry()
+    registry.hedging_enabled = True
+    calls = []
+
+    def read():
+        calls.append(1)
+        return 'ok'
+
+    assert registry.call('test.orders', read) == 'ok'
+    assert calls == [1]
@@ -0,0 +1,219 @@
+"""Tests for the execution write-ahead log and startup recovery"""
+
+import time
+
+import pytest
+import requests
+import urllib3
+
+import accounts as accounts_module
+from accounts import DEFAULT_ACCOUNT, AccountRegistry
+from exchange_handler import MultiExchangeHandler
+from execution_wal import ExecutionWAL
+
+ORDER = {'symbol': 'BTCUSDT', 'action': 'buy', 'units': 0.01, 'risk': 1}
+
+
+@pytest.fixture
+def wal_path(tmp_path):
+    return tmp_path / 'execution_wal.jsonl'
+
+
+@pytest.fixture(autouse=True)
+def isolated_journal(trade_journal, monkeypatch):
+    monkeypatch.setattr(accounts_module, 'journal', trade_journal)
+    return trade_journal
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for the execution WAL")
+        time.sleep(0.01)
+
+
+def incomplete_ids(wal_path):
+    return [intent['id'] for intent in ExecutionWAL(wal_path).incomplete()]
+
+
+def test_finished_intents_are_complete(wal_path):
+    wal = ExecutionWAL(wal_path, fsync=False)
+    done = wal.begin('a', ORDER)
+    wal.step(done, 'entry_filled', order_id='1')
+    wal.finish(done, 'success')
+    open_id = wal.begin('a', ORDER)
+    wal.step(open_id, 'entry_filled', order_id='2')
+
+    wait_for(lambda: incomplete_ids(wal_path) == [open_id])
+    intent = ExecutionWAL(wal_path).incomplete()[0]
+    assert intent['data'] == ORDER
+    assert [step['step'] for step in intent['steps']] == ['entry_filled']
+
+
+def test_torn_final_record_is_skipped(wal_path):
+    wal = ExecutionWAL(wal_path, fsync=False)
+    intent_id = wal.begin('a', ORDER)
+    with open(wal_path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "outcome", "id": "')
+
+    assert incomplete_ids(wal_path) == [intent_id]
+
+
+def test_compact_keeps_only_incomplete_intents(wal_path):
+    wal = ExecutionWAL(wal_path, fsync=False)
+    for _ in range(3):
+        wal.finish(wal.begin('a', ORDER), 'success')
+    open_id = wal.begin('a', ORDER)
+    wait_for(lambda: incomplete_ids(wal_path) == [open_id])
+
+    restarted = ExecutionWAL(wal_path, fsync=False)
+    assert [i['id'] for i in restarted.compact()] == [open_id]
+    with open(wal_path, encoding='utf-8') as f:
+        assert len(f.readlines()) == 1
+
+    restarted.begin('a', ORDER)
+    with pytest.raises(RuntimeError):
+        restarted.compact()
+
+
+class BrokenFile:
+    """Stands in for the log file and fails every write"""
+
+    def write(self, text):
+        raise ValueError(f"cannot write {len(text)} bytes")
+
+
+def test_write_errors_reach_waiters_and_the_writer_survives(wal_path):
+    wal = ExecutionWAL(wal_path, fsync=False)
+    wal.begin('a', ORDER)
+    log_file, wal._file = wal._file, BrokenFile()
+
+    with pytest.raises(ValueError):
+        wal.begin('a', ORDER)
+
+    wal._file = log_file
+    wal.begin('a', ORDER)
+    assert wal._thread.is_alive()
+
+
+def test_steps_are_not_waited_on(wal_path, monkeypatch):
+    monkeypatch.setenv('WAL_COMMIT_TIMEOUT', '0.05')
+    wal = ExecutionWAL(wal_path, fsync=True)
+    intent_id = wal.begin('a', ORDER)
+    monkeypatch.setattr('execution_wal.os.fsync', lambda _fd: time.sleep(0.5))
+
+    wal.step(intent_id, 'entry_filled', order_id='1')
+
+    assert [s['step'] for s in wal.steps(intent_id)] == ['entry_filled']
+
+
+def test_commit_waits_are_bounded(wal_path, monkeypatch):
+    monkeypatch.setenv('WAL_COMMIT_TIMEOUT', '0.05')
+    wal = ExecutionWAL(wal_path, fsync=True)
+    monkeypatch.setattr('execution_wal.os.fsync', lambda _fd: time.sleep(0.5))
+
+    with pytest.raises(TimeoutError):
+        wal.begin('a', ORDER)
+
+
+class FakeBinanceClient:
+    """Binance client whose order placement fails with a given error"""
+
+    def __init__(self, error):
+        self.error = error
+
+    def get_symbol_info(self, symbol):
+        return {'symbol': symbol}
+
+    def create_order(self, **_kwargs):
+        raise self.error
+
+
+class BrokerRejection(Exception):
+    """Shaped like BinanceAPIException: HTTP status plus API error code"""
+
+    def __init__(self):
+        super().__init__('Account has insufficient balance')
+        self.status_code = 400
+        self.code = -2010
+
+
+def connection_refused():
+    reason = urllib3.exceptions.NewConnectionError(None,
+                                                   'Connection refused')
+    return requests.ConnectionError(
+        urllib3.exceptions.MaxRetryError(None, '/api/v3/order', reason))
+
+
+def make_registry(wal_path, error=None):
+    registry = AccountRegistry({}, {})
+    registry.wal = ExecutionWAL(wal_path, fsync=False)
+    handler = MultiExchangeHandler(paper=False)
+    handler.wal = registry.wal
+    handler._binance_client = FakeBinanceClient(error)
+    registry._handlers[DEFAULT_ACCOUNT] = handler
+    return registry
+
+
+@pytest.mark.parametrize('error', [
+    BrokerRejection(),
+    connection_refused(),
+],
+                         ids=['broker_rejection', 'connection_refused'])
+def test_unsent_orders_fail_their_intent(wal_path, error):
+    registry = make_registry(wal_path, error)
+
+    with pytest.raises(type(error)):
+        registry.execute(dict(ORDER))
+
+    # A waited append orders the unwaited outcome record before it
+    registry.wal.finish(registry.wal.begin('flush', {}), 'done')
+    wait_for(lambda: incomplete_ids(wal_path) == [])
+
+
+def test_read_timeouts_leave_the_intent_for_recovery(wal_path):
+    registry = make_registry(wal_path, requests.ReadTimeout('read timed out'))
+
+    with pytest.raises(requests.ReadTimeout):
+        registry.execute(dict(ORDER))
+
+    intents = ExecutionWAL(wal_path).incomplete()
+    assert len(intents) == 1
+    assert intents[0]['data']['symbol'] == 'BTCUSDT'
+
+
+def test_recovery_reconciles_and_closes_incomplete_intents(
+        wal_path, isolated_journal):
+    wal = ExecutionWAL(wal_path, fsync=False)
+    intent_id = wal.begin(DEFAULT_ACCOUNT, ORDER)
+    wal.step(intent_id, 'entry_filled', order_id='1')
+    wait_for(lambda: ExecutionWAL(wal_path).incomplete()[0]['steps'])
+
+    class RecoveringHandler:
+        paper = False
+
+        def __init__(self):
+            self.seen = []
+
+        def recover_intent(self, intent, mode):
+            self.seen.append((intent['id'], mode,
+                              [s['step'] for s in intent['steps']]))
+            return {'status': 'finished', 'placed': ['sl', 'tp']}
+
+    registry = AccountRegistry({}, {})
+    registry.wal = ExecutionWAL(wal_path, fsync=False)
+    handler = RecoveringHandler()
+    registry._handlers[DEFAULT_ACCOUNT] = handler
+
+    results = registry.recover('finish')
+
+    assert handler.seen == [(intent_id, 'finish', ['entry_filled'])]
+    assert results == [{
+        'status': 'finished',
+        'placed': ['sl', 'tp'],
+        'intent_id': intent_id
+    }]
+    assert [e['intent_id'] for e in isolated_journal.read('intent_recovered')
+            ] == [intent_id]
+    wait_for(lambda: incomplete_ids(wal_path) == [])
@@ -0,0 +1,138 @@
+"""Tests for cached endpoint snapshots, ETags, field selection and encoding"""
+
+import gzip
+import json
+import logging
+
+import pytest
+
+from recent_logs import RecentLogHandler
+from response_cache import (
+    GZIP,
+    IDENTITY,
+    CachedEndpoint,
+    negotiate_encoding,
+    select_fields,
+)
+
+SNAPSHOT = {
+    'timestamp': '2026-01-01T00:00:00',
+    'status': 'online',
+    'exchanges': {
+        'oanda': {
+            'balance': 1000.0,
+            'positions': ['EUR_USD'] * 200
+        }
+    }
+}
+
+
+@pytest.fixture
+def builds():
+    return []
+
+
+@pytest.fixture
+def endpoint(builds):
+
+    def build():
+        builds.append(1)
+        return dict(SNAPSHOT, timestamp=f'build {len(builds)}')
+
+    return CachedEndpoint('test',
+                          build,
+                          ttl=60,
+                          volatile=('timestamp', ),
+                          compress_min_bytes=256)
+
+
+def test_snapshot_is_built_once_per_ttl(endpoint, builds):
+    endpoint.respond()
+    endpoint.respond()
+    assert len(builds) == 1
+
+    endpoint.invalidate()
+    endpoint.respond()
+    assert len(builds) == 2
+
+
+def test_matching_etag_gets_304(endpoint):
+    etag = endpoint.respond().headers['ETag']
+
+    response = endpoint.respond(if_none_match=etag)
+    assert response.status == 304
+    assert response.body == b''
+    assert endpoint.respond(if_none_match='W/"other"').status == 200
+
+
+def test_volatile_fields_do_not_change_the_etag(endpoint):
+    etag = endpoint.respond().headers['ETag']
+    endpoint.invalidate()
+
+    response = endpoint.respond(if_none_match=etag)
+    assert response.status == 304
+    assert response.headers['X-Snapshot-Version'] == '2'
+
+
+def test_fields_select_nested_keys(endpoint):
+    response = endpoint.respond('status,exchanges.oanda.balance')
+
+    assert json.loads(response.body) == {
+        'status': 'online',
+        'exchanges': {
+            'oanda': {
+                'balance': 1000.0
+            }
+        }
+    }
+    assert response.headers['ETag'] != endpoint.respond().headers['ETag']
+
+
+def test_unknown_fields_are_skipped():
+    assert select_fields(SNAPSHOT, ['nope', 'exchanges.nope.x']) == {
+        'exchanges': {}
+    }
+
+
+def test_large_bodies_are_gzipped_for_clients_that_accept_it(endpoint):
+    plain = endpoint.respond()
+    assert 'Content-Encoding' not in plain.headers
+
+    compressed = endpoint.respond(accept_encoding='gzip, deflate')
+    assert compressed.headers['Content-Encoding'] == GZIP
+    assert gzip.decompress(compressed.body) == plain.body
+
+    small = endpoint.respond('status', accept_encoding='gzip')
+    assert 'Content-Encoding' not in small.headers
+
+
+@pytest.mark.parametrize('accept, expected', [
+    ('', IDENTITY),
+    ('gzip;q=0', IDENTITY),
+    ('deflate, gzip;q=0.5', GZIP),
+    ('*', GZIP),
+])
+def test_encoding_negotiation(accept, expected, monkeypatch):
+    monkeypatch.setattr('response_cache.brotli', None)
+    assert negotiate_encoding(accept) == expected
+
+
+def test_recent_logs_skip_polls_and_number_new_lines(tmp_path):
+    log_path = tmp_path / 'debug_log.txt'
+    log_path.write_text('old line\n\n')
+    handler = RecentLogHandler(log_path, max_lines=2)
+    logger = logging.getLogger('tests.recent_logs')
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    try:
+        logger.info('polled', extra={'poll': True})
+        handler.handle(
+            logging.LogRecord('werkzeug', logging.INFO, __file__, 0,
+                              'GET /logs', (), None))
+        assert handler.snapshot() == (0, ['old line'])
+
+        logger.info('first')
+        logger.info('second')
+        assert handler.snapshot() == (2, ['first', 'second'])
+    finally:
+        logger.removeHandler(handler)
@@ -0,0 +1,238 @@
+"""Tests for pre-trade risk rules, reservations and risk state seeding"""
+
+import threading
+from datetime import datetime
+
+import pytest
+
+from metrics import MetricsRegistry
+from risk_engine import RULE_TYPES, RiskCheckFailed, RiskEngine
+
+
+def buy(units, symbol='EUR_USD', **fields):
+    return dict(symbol=symbol, action='buy', units=units, risk=1, **fields)
+
+
+def sell(units, symbol='EUR_USD', **fields):
+    return dict(symbol=symbol, action='sell', units=units, risk=1, **fields)
+
+
+@pytest.fixture
+def make_engine(trade_journal):
+
+    def make(*rules):
+        return RiskEngine([RULE_TYPES[rule['type']](rule) for rule in rules],
+                          trade_journal=trade_journal,
+                          metrics_registry=MetricsRegistry())
+
+    return make
+
+
+def test_max_position_blocks_growth_but_allows_reduction(make_engine):
+    engine = make_engine({'type': 'max_position', 'limit': 150})
+    engine.state.positions[('a', 'EUR_USD')] = 100.0
+
+    with pytest.raises(RiskCheckFailed):
+        engine.check('a', buy(100))
+    assert engine.check('a', sell(100)).allowed
+
+
+def test_warn_rules_do_not_block(make_engine, trade_journal):
+    engine = make_engine({
+        'type': 'max_position',
+        'limit': 10,
+        'action': 'warn'
+    })
+
+    decision = engine.check('a', buy(100))
+
+    assert decision.allowed
+    assert decision.violations[0]['action'] == 'warn'
+    assert [e['rule'] for e in trade_journal.read('risk_rule_hit')
+            ] == ['max_position']
+
+
+def test_rules_only_apply_to_their_accounts(make_engine):
+    engine = make_engine({
+        'type': 'max_position',
+        'limit': 10,
+        'accounts': ['a']
+    })
+
+    assert engine.check('b', buy(100)).allowed
+    with pytest.raises(RiskCheckFailed):
+        engine.check('a', buy(100))
+
+
+def test_max_daily_loss_blocks_new_exposure(make_engine):
+    engine = make_engine({'type': 'max_daily_loss', 'limit': 50})
+    engine.state.record_fill('a', 'EUR_USD', 0.0, None, realized_pl=-60.0)
+
+    with pytest.raises(RiskCheckFailed):
+        engine.check('a', buy(1))
+
+
+def test_max_orders_per_minute(make_engine):
+    engine = make_engine({'type': 'max_orders_per_minute', 'limit': 2})
+    engine.check('a', buy(1))
+    engine.check('a', buy(1))
+
+    with pytest.raises(RiskCheckFailed):
+        engine.check('a', buy(1))
+
+
+def test_check_reserves_until_settled(make_engine):
+    engine = make_engine({'type': 'max_position', 'limit': 150})
+    engine.check('a', buy(100))
+
+    # The in-flight order counts against the limit
+    assert engine.state.position('a', 'EUR_USD') == 100.0
+    with pytest.raises(RiskCheckFailed):
+        engine.check('a', buy(100))
+
+    engine.settle('a', buy(100), {'status': 'success', 'filled_price': 1.1})
+    assert engine.state.positions[('a', 'EUR_USD')] == 100.0
+    assert engine.state.reserved == {}
+
+
+def test_unfilled_orders_release_their_reservation(make_engine):
+    engine = make_engine({'type': 'max_position', 'limit': 150})
+
+    engine.check('a', buy(100))
+    engine.settle('a', buy(100), {'status': 'pending', 'filled_price': None})
+    engine.check('a', buy(100))
+    engine.release('a', buy(100))
+
+    assert engine.state.position('a', 'EUR_USD') == 0.0
+    assert engine.state.reserved == {}
+
+
+def test_concurrent_checks_cannot_jointly_exceed_a_limit(make_engine):
+    engine = make_engine({'type': 'max_position', 'limit': 150})
+    barrier = threading.Barrier(8)
+    outcomes = []
+
+    def submit():
+        barrier.wait()
+        try:
+            engine.check('a', buy(100))
+            outcomes.append('allowed')
+        except RiskCheckFailed:
+            outcomes.append('blocked')
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes.count('allowed') == 1
+    assert engine.state.position('a', 'EUR_USD') == 100.0
+
+
+def test_scheduled_fills_do_not_touch_reservations(make_engine):
+    engine = make_engine()
+    engine.check('a', buy(100))
+
+    engine.record_fill('a',
+                       sell(40), {
+                           'status': 'closed',
+                           'order': {
+                               'orderFillTransaction': {
+                                   'pl': '-3.5'
+                               }
+                           }
+                       },
+                       reserved=False)
+
+    assert engine.state.reserved[('a', 'EUR_USD')] == 100.0
+    assert engine.state.positions[('a', 'EUR_USD')] == -40.0
+    assert engine.state.daily_realized_pl('a') == -3.5
+
+
+def test_seed_from_fills_rebuilds_positions_and_todays_pl(make_engine):
+    engine = make_engine()
+    today = datetime.now().isoformat()
+
+    engine.state.seed_from_fills([
+        {
+            'timestamp': today,
+            'account': 'a',
+            'symbol': 'EUR_USD',
+            'side': 'buy',
+            'units': 100,
+            'filled_price': 1.1,
+            'broker_pl': None
+        },
+        {
+            'timestamp': today,
+            'account': 'a',
+            'symbol': 'EUR_USD',
+            'side': 'sell',
+            'units': 40,
+            'filled_price': 1.2,
+            'broker_pl': -5.0
+        },
+        {
+            'timestamp': '2020-01-02T10:00:00',
+            'account': 'a',
+            'symbol': 'BTCUSDT',
+            'side': 'buy',
+            'units': 1,
+            'filled_price': 30000.0,
+            'broker_pl': -9.0
+        },
+        {
+            'timestamp': today
+        },
+    ])
+
+    assert engine.state.positions == {
+        ('a', 'EUR_USD'): 60.0,
+        ('a', 'BTCUSDT'): 1.0
+    }
+    assert engine.state.prices['EUR_USD'] == 1.2
+    assert engine.state.daily_realized_pl('a') == -5.0
+
+
+def test_sync_positions_replaces_one_exchange_only(make_engine):
+    state = make_engine().state
+    state.positions.update({
+        ('a', 'EUR_USD'): 10.0,
+        ('a', 'BTCUSDT'): 1.0,
+        ('b', 'ETHUSDT'): 2.0
+    })
+
+    state.sync_positions('a', 'binance', {'ETHUSDT': 3.0})
+    state.sync_oanda_summary(
+        'a', {
+            'floating_pl': -2.0,
+            'positions': [{
+                'instrument': 'GBP_USD',
+                'long': {
+                    'units': '0'
+                },
+                'short': {
+                    'units': '-25'
+                }
+            }]
+        })
+
+    assert state.positions == {
+        ('a', 'ETHUSDT'): 3.0,
+        ('a', 'GBP_USD'): -25.0,
+        ('b', 'ETHUSDT'): 2.0
+    }
+    assert state.daily_pl('a') == -2.0
+
+
+def test_order_times_stay_bounded_without_a_rate_rule(make_engine,
+                                                      monkeypatch):
+    engine = make_engine()
+    # Every earlier order has already left the window
+    monkeypatch.setattr(engine.state, 'ORDER_WINDOW', -1.0)
+
+    for _ in range(100):
+        engine.check('a', buy(1))
+
+    assert len(engine.state._order_times['a']) == 1
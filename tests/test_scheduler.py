@@ -0,0 +1,184 @@
+"""Tests for scheduled action persistence, dispatch and expiry"""
+
+import threading
+import time
+
+import pytest
+
+import scheduler as scheduler_module
+from scheduler import ActionScheduler
+
+
+@pytest.fixture(autouse=True)
+def isolated_journal(trade_journal, monkeypatch):
+    monkeypatch.setattr(scheduler_module, 'journal', trade_journal)
+    return trade_journal
+
+
+@pytest.fixture
+def make_scheduler(tmp_path):
+    schedulers = []
+
+    def make(**kwargs):
+        action_scheduler = ActionScheduler(db_path=tmp_path / 'scheduler.db',
+                                           **kwargs)
+        schedulers.append(action_scheduler)
+        return action_scheduler
+
+    yield make
+    for action_scheduler in schedulers:
+        action_scheduler.stop()
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for scheduled actions")
+        time.sleep(0.01)
+
+
+def outcomes(trade_journal):
+    return {
+        entry['id']: entry['status']
+        for entry in trade_journal.read('scheduled_action')
+    }
+
+
+def test_actions_run_in_due_order(make_scheduler):
+    ran = []
+    action_scheduler = make_scheduler()
+    action_scheduler.register('execute_signal', ran.append)
+    now = time.time()
+    action_scheduler.schedule('execute_signal', now + 0.2, {'n': 2})
+    action_scheduler.schedule('execute_signal', now + 0.1, {'n': 1})
+
+    action_scheduler.start()
+    wait_for(lambda: len(ran) == 2)
+
+    assert ran == [{'n': 1}, {'n': 2}]
+    assert action_scheduler.pending() == []
+
+
+def test_pending_actions_survive_a_restart(make_scheduler):
+    first = make_scheduler()
+    first.register('close_trade', lambda _payload: 'closed')
+    action_id = first.schedule('close_trade',
+                               time.time() + 3600, {'symbol': 'EUR_USD'})
+    first.stop()
+
+    second = make_scheduler()
+    second.register('close_trade', lambda _payload: 'closed')
+    second.start()
+
+    assert [a['id'] for a in second.pending()] == [action_id]
+    assert second.pending()[0]['payload'] == {'symbol': 'EUR_USD'}
+
+
+def test_cancelled_actions_are_not_restored(make_scheduler, isolated_journal):
+    first = make_scheduler()
+    first.register('cancel_order', lambda _payload: 'cancelled')
+    action_id = first.schedule('cancel_order', time.time() + 3600, {})
+
+    assert first.cancel(action_id)
+    assert not first.cancel(action_id)
+    first.stop()
+
+    second = make_scheduler()
+    second.register('cancel_order', lambda _payload: 'cancelled')
+    second.start()
+    assert second.pending() == []
+    assert outcomes(isolated_journal) == {action_id: 'cancelled'}
+
+
+def test_overdue_deferred_signals_expire(make_scheduler, isolated_journal):
+    ran = []
+    action_scheduler = make_scheduler(max_lateness=60)
+    action_scheduler.register('execute_signal', ran.append)
+    action_id = action_scheduler.schedule('execute_signal',
+                                          time.time() - 120, {})
+
+    action_scheduler.start()
+    wait_for(lambda: action_id in outcomes(isolated_journal))
+
+    assert outcomes(isolated_journal)[action_id] == 'expired'
+    assert ran == []
+
+
+def test_overdue_protective_actions_still_run(make_scheduler,
+                                              isolated_journal):
+    ran = []
+    action_scheduler = make_scheduler(max_lateness=60)
+    action_scheduler.register('close_trade', ran.append, protective=True)
+    action_id = action_scheduler.schedule('close_trade', time.time() - 3600,
+                                          {'trade_id': '1'})
+
+    action_scheduler.start()
+    wait_for(lambda: action_id in outcomes(isolated_journal))
+
+    assert outcomes(isolated_journal)[action_id] == 'done'
+    assert ran == [{'trade_id': '1'}]
+
+
+def test_failed_actions_are_journaled_and_removed(make_scheduler,
+                                                  isolated_journal):
+    done = threading.Event()
+
+    def fail(_payload):
+        done.set()
+        raise RuntimeError('broker down')
+
+    action_scheduler = make_scheduler()
+    action_scheduler.register('close_trade', fail, protective=True)
+    action_id = action_scheduler.schedule('close_trade', time.time(), {})
+
+    action_scheduler.start()
+    wait_for(lambda: action_id in outcomes(isolated_journal))
+
+    assert done.is_set()
+    assert outcomes(isolated_journal)[action_id] == 'failed'
+    assert action_scheduler.pending() == []
+
+
+def test_unknown_action_kinds_are_refused(make_scheduler):
+    action_scheduler = make_scheduler()
+    with pytest.raises(ValueError):
+        action_scheduler.schedule('launch_rocket', time.time(), {})
+
+
+def test_interrupted_actions_are_reconciled_not_rerun(make_scheduler,
+                                                       isolated_journal):
+    ran, reconciled = [], []
+    first = make_scheduler()
+    first.register('close_trade', ran.append, reconcile=reconciled.append)
+    action_id = first.schedule('close_trade', time.time(), {'trade_id': '1'})
+    # Simulate a crash after the action was marked started
+    first._mark_started(first._actions[action_id])
+    first.stop()
+
+    second = make_scheduler()
+    second.register('close_trade', ran.append, reconcile=reconciled.append)
+    second.start()
+    wait_for(lambda: action_id in outcomes(isolated_journal))
+
+    assert outcomes(isolated_journal)[action_id] == 'reconciled'
+    assert reconciled == [{'trade_id': '1'}]
+    assert ran == []
+
+
+def test_actions_are_marked_started_before_they_run(make_scheduler):
+    started = []
+    action_scheduler = make_scheduler()
+
+    def handler(_payload):
+        started.append(action_scheduler._db.execute(
+            'SELECT started FROM scheduled_actions').fetchone()[0])
+
+    action_scheduler.register('execute_signal',
+                              handler,
+                              reconcile=lambda _payload: 'recovered')
+    action_scheduler.schedule('execute_signal', time.time(), {})
+    action_scheduler.start()
+    wait_for(lambda: started)
+
+    assert started[0] is not None
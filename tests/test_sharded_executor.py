@@ -0,0 +1,95 @@
+"""Tests for shard routing and risk checks in the server process"""
+
+import pytest
+
+from accounts import AccountConfig, AccountRegistry
+from metrics import MetricsRegistry
+from risk_engine import RULE_TYPES, RiskCheckFailed, RiskEngine
+from sharded_executor import (
+    SHARD_BY_ACCOUNT_SYMBOL,
+    ShardedExecutor,
+    shard_key,
+)
+
+SIGNAL = {'symbol': 'EUR_USD', 'action': 'buy', 'units': 100, 'risk': 1}
+
+
+@pytest.fixture
+def registry(trade_journal):
+    registry = AccountRegistry(
+        {
+            'main': AccountConfig('main', {}),
+            'big': AccountConfig('big', {'units_multiplier': 10})
+        }, {'all': ['main', 'big']})
+    registry.risk_engine = RiskEngine(
+        [RULE_TYPES['max_position']({
+            'type': 'max_position',
+            'limit': 500
+        })],
+        trade_journal=trade_journal,
+        metrics_registry=MetricsRegistry())
+    return registry
+
+
+@pytest.fixture
+def executor(registry):
+    """Executor whose shards answer in-process instead of in a subprocess"""
+    executor = ShardedExecutor(shards=4, registry=registry)
+    executor.sent = []
+
+    def answer(task):
+        executor.sent.append(task.data)
+        accounts = task.data.get('accounts')
+        if accounts is None:
+            task.future.set_result({'status': 'success'})
+        else:
+            task.future.set_result({
+                'results': {
+                    account: {
+                        'status': 'success'
+                    }
+                    for account in accounts
+                }
+            })
+
+    for shard in executor.shards:
+        shard.submit = answer
+    return executor
+
+
+def test_shard_keys():
+    assert shard_key({'symbol': 'eur_usd'}) == 'EUR_USD'
+    assert shard_key(dict(SIGNAL, accounts=['a', 'b']),
+                     SHARD_BY_ACCOUNT_SYMBOL) == 'a,b:EUR_USD'
+    assert shard_key(SIGNAL, SHARD_BY_ACCOUNT_SYMBOL) == 'default:EUR_USD'
+
+
+def test_a_symbol_always_maps_to_the_same_shard(executor):
+    shards = {
+        executor.shard_for(dict(SIGNAL, units=units)).shard_id
+        for units in range(1, 50)
+    }
+    assert len(shards) == 1
+
+
+def test_blocked_single_account_signals_never_reach_a_shard(executor):
+    with pytest.raises(RiskCheckFailed):
+        executor.execute(dict(SIGNAL, units=1000))
+    assert executor.sent == []
+
+
+def test_only_allowed_accounts_are_sent_to_the_shard(executor, registry):
+    response = executor.execute(dict(SIGNAL, account_group='all'))
+
+    assert executor.sent[0]['accounts'] == ['main']
+    assert 'account_group' not in executor.sent[0]
+    assert response['status'] == 'partial'
+    assert response['results']['big']['status'] == 'blocked'
+    assert registry.risk_engine.state.reserved == {}
+
+
+def test_fanout_blocked_everywhere_is_not_sent(executor):
+    response = executor.execute(dict(SIGNAL, units=1000, accounts=['main']))
+
+    assert response['status'] == 'blocked'
+    assert executor.sent == []
@@ -0,0 +1,62 @@
+"""Tests for webhook payload decoding and signal schema validation"""
+
+import pytest
+
+from signal_schema import Signal, SignalValidationError, decode_payload
+
+SIGNAL = {'symbol': 'eur_usd', 'action': 'BUY', 'units': 1000, 'risk': 1}
+
+
+def test_fields_are_coerced():
+    signal = Signal.from_dict(
+        dict(SIGNAL, units='1000', price='1.0850', accounts='main'))
+
+    assert signal.symbol == 'EUR_USD'
+    assert signal.action == 'buy'
+    assert signal.units == 1000 and isinstance(signal.units, int)
+    assert signal.price == 1.085
+    assert signal.accounts == ['main']
+
+
+@pytest.mark.parametrize('units', [True, '1e400', 'nan', 0, -5, 'ten', [1]])
+def test_bad_units_are_rejected(units):
+    with pytest.raises(SignalValidationError):
+        Signal.from_dict(dict(SIGNAL, units=units))
+
+
+@pytest.mark.parametrize('field', ['symbol', 'action', 'units', 'risk'])
+def test_required_fields(field):
+    payload = dict(SIGNAL)
+    del payload[field]
+    with pytest.raises(SignalValidationError, match=field):
+        Signal.from_dict(payload)
+
+
+@pytest.mark.parametrize('extra', [
+    {'sl_pips': 30},
+    {'tp_pips': 60},
+    {'order_type': 'limit'},
+    {'execute_at': 'next_open', 'delay_minutes': 5},
+    {'action': 'hold'},
+    {'exchange': 'kraken'},
+])
+def test_inconsistent_signals_are_rejected(extra):
+    with pytest.raises(SignalValidationError):
+        Signal.from_dict(dict(SIGNAL, **extra))
+
+
+def test_unknown_fields_and_the_secret_are_dropped():
+    signal = Signal.from_dict(dict(SIGNAL, secret='s', leverage=100))
+
+    assert signal.to_dict() == {
+        'symbol': 'EUR_USD',
+        'action': 'buy',
+        'units': 1000,
+        'risk': 1
+    }
+
+
+@pytest.mark.parametrize('raw', [b'', b'{not json', b'[1, 2]', b'"buy"'])
+def test_undecodable_payloads_are_rejected(raw):
+    with pytest.raises(SignalValidationError):
+        decode_payload(raw)
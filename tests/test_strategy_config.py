@@ -0,0 +1,119 @@
+"""Tests for strategy profiles and hot-reloading the strategy table"""
+
+import json
+import os
+
+import pytest
+
+from strategy_config import StrategyRejected, StrategyTable
+
+CONFIG = {
+    'MA_Cross': {
+        'defaults': {
+            'units': 1000,
+            'sl_pips': 30
+        },
+        'symbols': ['EUR_USD'],
+        'exchange': 'oanda'
+    },
+    'Crypto': {
+        'exchange': {
+            'BTCUSDT': 'binance'
+        }
+    },
+    'Paused': {
+        'enabled': False
+    },
+    '*': {
+        'defaults': {
+            'risk': 1
+        }
+    }
+}
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    return tmp_path / 'strategies.json'
+
+
+def write_config(path, config):
+    previous = path.stat().st_mtime if path.exists() else 0
+    path.write_text(json.dumps(config) if isinstance(config, dict) else config)
+    # Filesystems with coarse timestamps would hide a quick rewrite
+    os.utime(path, (previous + 1, previous + 1))
+
+
+@pytest.fixture
+def table(config_path):
+    write_config(config_path, CONFIG)
+    return StrategyTable(config_path, poll_interval=60)
+
+
+def test_defaults_fill_only_missing_fields(table):
+    data = table.apply({
+        'strategy': 'MA_Cross',
+        'symbol': 'eur_usd',
+        'units': 5
+    })
+
+    assert data['units'] == 5
+    assert data['sl_pips'] == 30
+    assert data['exchange'] == 'oanda'
+
+
+def test_routing_by_symbol_and_the_default_profile(table):
+    assert table.apply({
+        'strategy': 'Crypto',
+        'symbol': 'BTCUSDT'
+    })['exchange'] == 'binance'
+    assert table.apply({'strategy': 'Other', 'symbol': 'X'})['risk'] == 1
+
+
+@pytest.mark.parametrize('payload', [
+    {'strategy': 'MA_Cross', 'symbol': 'GBP_USD'},
+    {'strategy': 'Paused', 'symbol': 'EUR_USD'},
+])
+def test_disallowed_signals_are_rejected(table, payload):
+    with pytest.raises(StrategyRejected):
+        table.apply(payload)
+
+
+def test_changed_file_is_swapped_in(table, config_path):
+    write_config(config_path, {'MA_Cross': {'symbols': ['GBP_USD']}})
+
+    assert table.reload()
+    assert table.snapshot() == {
+        'MA_Cross': {
+            'enabled': True,
+            'defaults': {},
+            'symbols': ['GBP_USD'],
+            'exchange': None
+        }
+    }
+
+
+@pytest.mark.parametrize('bad_config', [
+    '{not json',
+    '["MA_Cross"]',
+    {'MA_Cross': {'symbols': 'EUR_USD'}},
+    {'MA_Cross': {'symbols': [1, 2]}},
+    {'MA_Cross': {'exchange': 'kraken'}},
+    {'MA_Cross': 'enabled'},
+])
+def test_bad_file_keeps_the_last_good_table(table, config_path, bad_config):
+    profiles = table.profiles
+    write_config(config_path, bad_config)
+
+    assert not table.reload()
+    assert table.profiles is profiles
+    # An unchanged bad file is not re-parsed on every poll
+    assert not table.reload()
+
+
+def test_missing_file_clears_the_table(table, config_path):
+    config_path.unlink()
+
+    assert table.reload()
+    payload = {'strategy': 'MA_Cross', 'symbol': 'GBP_USD'}
+    assert table.apply(payload) is payload
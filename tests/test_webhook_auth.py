@@ -0,0 +1,120 @@
+"""Tests for webhook HMAC signatures, nonce replay and secret checks"""
+
+import time
+
+import pytest
+
+from webhook_auth import (
+    AUTHENTICATED,
+    DEFERRED,
+    REJECTED,
+    NonceCache,
+    WebhookAuthenticator,
+    sign_request,
+)
+
+SECRET = 'test-secret'
+BODY = b'{"symbol": "EUR_USD", "action": "buy", "units": 1, "risk": 1}'
+
+
+@pytest.fixture
+def authenticator():
+    return WebhookAuthenticator(secret=SECRET, window=300, max_nonces=100)
+
+
+def test_valid_signature_is_authenticated(authenticator):
+    headers = sign_request(SECRET, BODY, nonce='n1')
+    assert authenticator.check_headers(headers, BODY) == (AUTHENTICATED, '')
+
+
+def test_tampered_body_is_rejected(authenticator):
+    headers = sign_request(SECRET, BODY, nonce='n1')
+    tampered = BODY.replace(b'"units": 1', b'"units": 100')
+    assert authenticator.check_headers(headers, tampered) == (REJECTED,
+                                                              'bad_signature')
+
+
+def test_wrong_key_is_rejected(authenticator):
+    headers = sign_request('other-secret', BODY, nonce='n1')
+    assert authenticator.check_headers(headers, BODY)[0] == REJECTED
+
+
+def test_stale_timestamp_is_rejected(authenticator):
+    headers = sign_request(SECRET,
+                           BODY,
+                           nonce='n1',
+                           timestamp=int(time.time()) - 301)
+    assert authenticator.check_headers(headers, BODY) == (REJECTED,
+                                                          'stale_timestamp')
+
+
+def test_replayed_nonce_is_rejected(authenticator):
+    headers = sign_request(SECRET, BODY, nonce='n1')
+    assert authenticator.check_headers(headers, BODY)[0] == AUTHENTICATED
+    assert authenticator.check_headers(headers, BODY) == (REJECTED, 'replay')
+
+
+def test_signature_is_the_nonce_when_none_is_sent(authenticator):
+    headers = sign_request(SECRET, BODY)
+    assert authenticator.check_headers(headers, BODY)[0] == AUTHENTICATED
+    assert authenticator.check_headers(headers, BODY) == (REJECTED, 'replay')
+
+
+def test_bad_signatures_do_not_fill_the_nonce_store(authenticator):
+    for i in range(10):
+        headers = sign_request('other-secret', BODY, nonce=f'n{i}')
+        authenticator.check_headers(headers, BODY)
+    assert len(authenticator.nonces) == 0
+
+
+def test_nonce_cache_expires_and_evicts():
+    cache = NonceCache(max_size=2)
+    assert cache.add('a', ttl=0)
+    assert cache.add('a', ttl=60)
+    assert not cache.add('a', ttl=60)
+
+    cache.add('b', ttl=60)
+    cache.add('c', ttl=60)
+    assert len(cache) == 2
+    assert cache.add('a', ttl=60)
+
+
+def test_header_secret(authenticator):
+    assert authenticator.check_headers({'X-Webhook-Secret': SECRET},
+                                       BODY) == (AUTHENTICATED, '')
+    assert authenticator.check_headers({'X-Webhook-Secret': 'nope'},
+                                       BODY) == (REJECTED, 'bad_secret')
+
+
+def test_body_secret_is_checked_before_parsing(authenticator):
+    body = b'{"secret": "test-secret", "symbol": "EUR_USD"}'
+    assert authenticator.check_headers({}, body) == (DEFERRED, '')
+    assert authenticator.check_headers(
+        {}, b'{"secret":"wrong"}') == (REJECTED, 'bad_secret')
+    # Unparseable bodies without the secret never reach the decoder
+    assert authenticator.check_headers({}, b'{not json') == (REJECTED,
+                                                             'missing_secret')
+
+
+def test_escaped_body_secret_is_left_to_the_parsed_check():
+    authenticator = WebhookAuthenticator(secret='a"b')
+    body = b'{"secret": "a\\"b"}'
+    assert authenticator.check_headers({}, body) == (DEFERRED, '')
+    assert authenticator.check_body_secret('a"b')
+
+
+def test_require_signature_disables_secret_fallbacks():
+    authenticator = WebhookAuthenticator(secret=SECRET,
+                                         require_signature=True)
+    assert authenticator.check_headers({'X-Webhook-Secret': SECRET},
+                                       BODY) == (REJECTED, 'missing_signature')
+    body = b'{"secret": "test-secret"}'
+    assert authenticator.check_headers({}, body)[0] == REJECTED
+
+
+def test_everything_is_rejected_without_a_configured_secret():
+    authenticator = WebhookAuthenticator(secret='')
+    headers = sign_request('', BODY, nonce='n1')
+    assert authenticator.check_headers(headers, BODY) == (
+        REJECTED, 'secret_not_configured')
+    assert not authenticator.check_body_secret('')
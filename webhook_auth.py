@@ -0,0 +1,185 @@
+"""
+Webhook Authentication
+Verifies webhook requests before their bodies are parsed.
+
+Signed requests carry an HMAC-SHA256 signature over the raw body:
+
+    X-Timestamp: <unix seconds>
+    X-Nonce:     <unique request id>            (optional)
+    X-Signature: sha256=<hex digest of "<timestamp>.<nonce>.<body>">
+
+Requests outside the timestamp window or reusing a nonce are rejected. When
+X-Nonce is omitted the signature itself serves as the nonce. Clients that
+cannot sign (e.g. TradingView alerts) may instead send the shared secret in
+an X-Webhook-Secret header or the JSON "secret" field, unless
+WEBHOOK_REQUIRE_SIGNATURE is enabled. A JSON "secret" is found by scanning
+the raw body, so requests with a wrong or missing secret are rejected
+before the body is parsed. All comparisons are constant-time.
+"""
+
+import hashlib
+import hmac
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Mapping, Optional, Tuple
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Result of the pre-parse header check
+AUTHENTICATED = 'authenticated'
+REJECTED = 'rejected'
+DEFERRED = 'deferred'
+
+# "secret": "<value>" anywhere in a raw JSON body
+SECRET_FIELD = re.compile(rb'"secret"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+class NonceCache:
+    """Bounded LRU of recently seen nonces with per-entry expiry"""
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, nonce: str, ttl: float) -> bool:
+        """Remember a nonce; returns False if it was already seen"""
+        now = time.monotonic()
+        with self._lock:
+            # Entries are inserted with the same TTL, so the oldest expire first
+            while self._entries:
+                oldest, expiry = next(iter(self._entries.items()))
+                if expiry > now:
+                    break
+                del self._entries[oldest]
+
+            if nonce in self._entries:
+                return False
+
+            self._entries[nonce] = now + ttl
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class WebhookAuthenticator:
+    """Authenticates webhook requests against a cached shared secret"""
+
+    def __init__(self,
+                 secret: Optional[str] = None,
+                 window: Optional[float] = None,
+                 max_nonces: Optional[int] = None,
+                 require_signature: Optional[bool] = None):
+        secret = secret if secret is not None else os.getenv('WEBHOOK_SECRET')
+        self._key = secret.encode() if secret else None
+        self.window = window if window is not None else float(
+            os.getenv('WEBHOOK_AUTH_WINDOW', 300))
+        self.require_signature = (
+            require_signature if require_signature is not None else
+            os.getenv('WEBHOOK_REQUIRE_SIGNATURE', 'False').lower() == 'true')
+        self.nonces = NonceCache(max_nonces or int(
+            os.getenv('WEBHOOK_NONCE_CACHE_SIZE', 10000)))
+
+        if self._key is None:
+            logger.error(
+                "WEBHOOK_SECRET is not set; all webhook requests will be rejected"
+            )
+
+    def _reject(self, reason: str) -> Tuple[str, str]:
+        metrics.inc('webhook_auth_failures_total', reason=reason)
+        return REJECTED, reason
+
+    def check_headers(self, headers: Mapping[str, str],
+                      raw_body: bytes) -> Tuple[str, str]:
+        """
+        Authenticate from headers and the raw body, without parsing JSON.
+        Returns (AUTHENTICATED | REJECTED | DEFERRED, reason). DEFERRED means
+        no auth headers were sent and the raw body carries the secret; it
+        must be confirmed as the top-level field once the body is parsed.
+        """
+        if self._key is None:
+            return self._reject('secret_not_configured')
+
+        signature = headers.get('X-Signature')
+        if signature:
+            return self._check_signature(headers, signature, raw_body)
+
+        header_secret = headers.get('X-Webhook-Secret')
+        if header_secret and not self.require_signature:
+            if hmac.compare_digest(header_secret.encode(), self._key):
+                return AUTHENTICATED, ''
+            return self._reject('bad_secret')
+
+        if self.require_signature:
+            return self._reject('missing_signature')
+        return self._scan_body_secret(raw_body)
+
+    def _scan_body_secret(self, raw_body: bytes) -> Tuple[str, str]:
+        candidates = [m.group(1) for m in SECRET_FIELD.finditer(raw_body)]
+        if not candidates:
+            return self._reject('missing_secret')
+        for candidate in candidates:
+            # Escaped values only compare equal once decoded
+            if b'\\' in candidate or hmac.compare_digest(
+                    candidate, self._key):
+                return DEFERRED, ''
+        return self._reject('bad_secret')
+
+    def _check_signature(self, headers: Mapping[str, str], signature: str,
+                         raw_body: bytes) -> Tuple[str, str]:
+        try:
+            timestamp = int(headers.get('X-Timestamp', ''))
+        except ValueError:
+            return self._reject('bad_timestamp')
+
+        if abs(time.time() - timestamp) > self.window:
+            return self._reject('stale_timestamp')
+
+        nonce = headers.get('X-Nonce', '')
+        message = f"{timestamp}.{nonce}.".encode() + raw_body
+        expected = hmac.new(self._key, message, hashlib.sha256).hexdigest()
+
+        if signature.startswith('sha256='):
+            signature = signature[7:]
+        if not hmac.compare_digest(signature.lower().encode(),
+                                   expected.encode()):
+            return self._reject('bad_signature')
+
+        # Only authenticated requests may occupy the nonce store
+        if not self.nonces.add(nonce or expected, self.window * 2):
+            return self._reject('replay')
+
+        return AUTHENTICATED, ''
+
+    def check_body_secret(self, secret: Optional[str]) -> bool:
+        """Constant-time check of a secret sent in the JSON body"""
+        if self._key is None or not isinstance(secret, str):
+            metrics.inc('webhook_auth_failures_total', reason='bad_secret')
+            return False
+        if hmac.compare_digest(secret.encode(), self._key):
+            return True
+        metrics.inc('webhook_auth_failures_total', reason='bad_secret')
+        return False
+
+
+def sign_request(secret: str,
+                 raw_body: bytes,
+                 nonce: str = '',
+                 timestamp: Optional[int] = None) -> dict:
+    """Build the auth headers for a signed webhook request"""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    message = f"{timestamp}.{nonce}.".encode() + raw_body
+    digest = hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+    headers = {'X-Timestamp': str(timestamp), 'X-Signature': f'sha256={digest}'}
+    if nonce:
+        headers['X-Nonce'] = nonce
+    return headers